@@ -22,6 +22,11 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+
+def include_name(name, type_, parent_names):
+    # Skip the R*Tree virtual table and its shadow tables, they are managed by hand
+    return not (type_ == 'table' and name.startswith('work_items_rtree'))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +52,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_name="sqlite",
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
         render_as_batch=True,  # Required for SQLite: No support for ALTER of constraints in SQLite dialect.
     )
 
@@ -71,6 +77,7 @@ def run_migrations_online() -> None:
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
+            include_name=include_name,
             render_as_batch=True,  # Required for SQLite: No support for ALTER of constraints in SQLite dialect.
         )
 
@@ -0,0 +1,60 @@
+"""Add R*Tree index of work items time ranges
+
+Revision ID: 714f970b1ff4
+Revises: 8379c814f0bd
+Create Date: 2026-10-18 12:31:52.804417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '714f970b1ff4'
+down_revision: Union[str, None] = '8379c814f0bd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_END = 10 ** 18
+
+
+def upgrade() -> None:
+    op.execute('CREATE VIRTUAL TABLE work_items_rtree USING rtree(id, start_ts, end_ts)')
+    op.execute(f"""
+    CREATE TRIGGER work_items_rtree_insert AFTER INSERT ON work_items BEGIN
+        INSERT INTO work_items_rtree (id, start_ts, end_ts) VALUES (
+            new.id,
+            MIN(new.start_timestamp, COALESCE(new.end_timestamp, {OPEN_END})),
+            MAX(new.start_timestamp, COALESCE(new.end_timestamp, {OPEN_END}))
+        );
+    END
+    """)
+    op.execute(f"""
+    CREATE TRIGGER work_items_rtree_update AFTER UPDATE OF start_timestamp, end_timestamp ON work_items BEGIN
+        UPDATE work_items_rtree SET
+            start_ts = MIN(new.start_timestamp, COALESCE(new.end_timestamp, {OPEN_END})),
+            end_ts = MAX(new.start_timestamp, COALESCE(new.end_timestamp, {OPEN_END}))
+        WHERE id = new.id;
+    END
+    """)
+    op.execute("""
+    CREATE TRIGGER work_items_rtree_delete AFTER DELETE ON work_items BEGIN
+        DELETE FROM work_items_rtree WHERE id = old.id;
+    END
+    """)
+    op.execute(f"""
+    INSERT INTO work_items_rtree (id, start_ts, end_ts)
+    SELECT
+        id,
+        MIN(start_timestamp, COALESCE(end_timestamp, {OPEN_END})),
+        MAX(start_timestamp, COALESCE(end_timestamp, {OPEN_END}))
+    FROM work_items
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER work_items_rtree_delete')
+    op.execute('DROP TRIGGER work_items_rtree_update')
+    op.execute('DROP TRIGGER work_items_rtree_insert')
+    op.execute('DROP TABLE work_items_rtree')
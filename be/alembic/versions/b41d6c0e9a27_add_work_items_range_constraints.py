@@ -0,0 +1,86 @@
+"""Add work items range constraints
+
+Revision ID: b41d6c0e9a27
+Revises: 714f970b1ff4
+Create Date: 2026-10-18 13:05:27.118904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b41d6c0e9a27'
+down_revision: Union[str, None] = '714f970b1ff4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_END = 10 ** 18
+
+# The batch mode recreates `work_items`, its triggers are dropped with the old table
+RTREE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER work_items_rtree_insert AFTER INSERT ON work_items BEGIN
+        INSERT INTO work_items_rtree (id, start_ts, end_ts) VALUES (
+            new.id,
+            MIN(new.start_timestamp, COALESCE(new.end_timestamp, {OPEN_END})),
+            MAX(new.start_timestamp, COALESCE(new.end_timestamp, {OPEN_END}))
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER work_items_rtree_update AFTER UPDATE OF start_timestamp, end_timestamp ON work_items BEGIN
+        UPDATE work_items_rtree SET
+            start_ts = MIN(new.start_timestamp, COALESCE(new.end_timestamp, {OPEN_END})),
+            end_ts = MAX(new.start_timestamp, COALESCE(new.end_timestamp, {OPEN_END}))
+        WHERE id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER work_items_rtree_delete AFTER DELETE ON work_items BEGIN
+        DELETE FROM work_items_rtree WHERE id = old.id;
+    END
+    """,
+)
+
+
+def _check_existing_work_items() -> None:
+    connection = op.get_bind()
+    invalid_ids = connection.execute(sa.text(
+        'SELECT id FROM work_items WHERE end_timestamp IS NOT NULL AND start_timestamp >= end_timestamp'
+    )).scalars().all()
+    if invalid_ids:
+        raise RuntimeError(f'Work items with the start not before the end, fix them first: {invalid_ids}')
+    current_ids = connection.execute(sa.text(
+        'SELECT id FROM work_items WHERE end_timestamp IS NULL'
+    )).scalars().all()
+    if len(current_ids) > 1:
+        raise RuntimeError(f'More than one current work item, stop all but one first: {current_ids}')
+
+
+def upgrade() -> None:
+    _check_existing_work_items()
+
+    with op.batch_alter_table('work_items', schema=None, table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        batch_op.create_check_constraint(
+            'ck_work_items_start_before_end',
+            'end_timestamp IS NULL OR start_timestamp < end_timestamp',
+        )
+
+    for statement in RTREE_TRIGGERS:
+        op.execute(statement)
+    op.execute(
+        'CREATE UNIQUE INDEX ux_work_items_current ON work_items ((end_timestamp IS NULL)) '
+        'WHERE end_timestamp IS NULL'
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX ux_work_items_current')
+
+    with op.batch_alter_table('work_items', schema=None, table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        batch_op.drop_constraint('ck_work_items_start_before_end', type_='check')
+
+    for statement in RTREE_TRIGGERS:
+        op.execute(statement)
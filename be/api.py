@@ -1,34 +1,57 @@
+import asyncio
+import hashlib
 import re
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Annotated
+from collections.abc import Awaitable, Callable
+from typing import Annotated, Any, Literal
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import FastAPI, APIRouter, Query, HTTPException, Depends, Request
+from fastapi import FastAPI, APIRouter, Query, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi_pagination import add_pagination, Page
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, StreamingResponse
 
 import schemas
-from database import get_db
-from dt import ts_to_dt
+import serializers
+import sql_stats
+from config import get_snapshot_dir, get_snapshot_format, get_snapshot_interval
+from database import get_db, get_async_db, log_sqlite_settings
+from dt import dt_to_ts, ts_to_dt
+from events import event_hub, sse_message
+from export import EXPORT_FORMATS, EXPORT_MEDIA_TYPES
+from report_cache import ReportCacheEntry, report_cache
 from schemas import TaskFilterParams
+from snapshot import snapshot_job
 from services import (
     category_list,
     category_create,
     category_read,
-    task_list,
     work_item_create,
+    work_item_create_bulk,
+    work_item_export,
     work_item_start,
     work_item_stop_current,
     category_update,
     task_read,
     task_update,
     task_create,
-    work_get_report_category,
-    work_get_report_task,
-    work_get_report_total,
-    work_item_list,
     work_item_delete, work_item_read, work_item_update, work_item_update_partial, BaseServiceError,
+    data_version_read_async,
+    work_report_data_version_async,
+    task_list_async,
+    work_get_today_async,
+    work_get_today_total_async,
+    work_item_list_rows_async,
+    work_item_list_cursor_async,
+    work_get_report_category_async,
+    work_get_report_task_async,
+    work_get_report_total_async,
+    work_get_report_async,
+    work_get_report_buckets_async,
 )
 
 origins = [
@@ -40,6 +63,7 @@ router = APIRouter(prefix='/api')
 
 # Dependency
 DbSession = Annotated[Session, Depends(get_db)]
+AsyncDbSession = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 def _get_default_report_datetime_range() -> tuple[datetime, datetime]:
@@ -58,10 +82,68 @@ def _get_default_report_datetime_range() -> tuple[datetime, datetime]:
     return start, end
 
 
-@router.get('/categories', response_model=list[schemas.CategoryOut], summary='Get all categories.')
-def categories_list(db_session: DbSession):
+def _etag(request: Request, *version) -> str:
+    """Weak ETag of the data version and the request path and parameters."""
+    key = repr((request.url.path, sorted(request.query_params.multi_items()), version))
+    return f'W/"{version[0]}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+
+def _check_etag(request: Request, response: Response, etag: str) -> None:
+    if_none_match = request.headers.get('if-none-match', '')
+    if etag in (tag.strip() for tag in if_none_match.split(',')):
+        raise HTTPException(status_code=304, headers={'ETag': etag})
+    response.headers['ETag'] = etag
+
+
+async def conditional_get(request: Request, response: Response, db_session: AsyncDbSession) -> None:
+    """Answer `If-None-Match` by the data version before any query of the endpoint."""
+    data_version = await data_version_read_async(db_session)
+    _check_etag(request, response, _etag(request, data_version.version))
+
+
+def _report_datetime_range(
+    start_datetime: datetime | None,
+    end_datetime: datetime | None,
+) -> tuple[datetime, datetime]:
+    """The requested range of a report, the default one if none; a half-specified range is a 400."""
+    if start_datetime is None and end_datetime is None:
+        return _get_default_report_datetime_range()
+    if start_datetime is None or end_datetime is None:
+        raise HTTPException(status_code=400, detail='Both start_datetime and end_datetime are required')
+    return start_datetime, end_datetime
+
+
+async def conditional_get_report(
+    request: Request,
+    response: Response,
+    db_session: AsyncDbSession,
+    start_datetime: Annotated[datetime | None, Query()] = None,
+    end_datetime: Annotated[datetime | None, Query()] = None,
+) -> tuple[int, int | None]:
+    """`conditional_get` for the reports: the time of the current work item is a part of the version."""
+    start_datetime, end_datetime = _report_datetime_range(start_datetime, end_datetime)
+
+    version = await work_report_data_version_async(db_session, start_datetime, end_datetime)
+    _check_etag(request, response, _etag(request, *version, start_datetime, end_datetime))
+    return version
+
+
+ConditionalGet = Depends(conditional_get)
+ReportVersion = Annotated[tuple[int, int | None], Depends(conditional_get_report)]
+
+
+@router.get(
+    '/categories',
+    response_model=list[schemas.CategoryOut],
+    summary='Get all categories.',
+    dependencies=[ConditionalGet],
+)
+def categories_list(response: Response, db_session: DbSession):
     """Returns the list of categories"""
-    return category_list(db_session)
+    return ORJSONResponse(
+        [serializers.category_values(category) for category in category_list(db_session)],
+        headers=dict(response.headers),  # ETag
+    )
 
 
 @router.post('/categories', response_model=schemas.CategoryOut, status_code=201)
@@ -70,7 +152,7 @@ def categories_add(category: schemas.CategoryIn, db_session: DbSession):
     return category_create(db_session, category.name, category.description)
 
 
-@router.get('/categories/{category_id}', response_model=schemas.CategoryOut)
+@router.get('/categories/{category_id}', response_model=schemas.CategoryOut, dependencies=[ConditionalGet])
 def categories_retrieve(category_id: int, db_session: DbSession):
     """Retrieves a category"""
     category = category_read(db_session, category_id)
@@ -88,23 +170,14 @@ def categories_save(category_id: int, category: schemas.CategoryOut, db_session:
     return updated_category
 
 
-@router.get('/tasks', response_model=list[schemas.TaskOut])
-def tasks_list(db_session: DbSession, filter_query: TaskFilterParams = Depends()):
-    rows = task_list(
+@router.get('/tasks', response_model=list[schemas.TaskOut], dependencies=[ConditionalGet])
+async def tasks_list(response: Response, db_session: AsyncDbSession, filter_query: TaskFilterParams = Depends()):
+    rows = await task_list_async(
         db_session,
         is_archived=filter_query.is_archived,
         is_current=filter_query.is_current,
     )
-    return [schemas.TaskOut(
-        id=row.id,
-        name=row.name,
-        category=schemas.CategoryMinimal(
-            id=row.category_id,
-            name=row.category_name,
-        ),
-        is_current=row.is_current,
-        is_archived=row.is_archived,
-    ) for row in rows]
+    return ORJSONResponse([serializers.task_values(row) for row in rows], headers=dict(response.headers))
 
 
 @router.post('/tasks', response_model=schemas.TaskOut, status_code=201)
@@ -123,7 +196,7 @@ def tasks_add(task: schemas.TaskIn, db_session: DbSession):
     )
 
 
-@router.get('/tasks/{task_id}', response_model=schemas.TaskOut)
+@router.get('/tasks/{task_id}', response_model=schemas.TaskOut, dependencies=[ConditionalGet])
 def tasks_retrieve(task_id: int, db_session: DbSession):
     """Retrieves a task"""
     task = task_read(db_session, task_id)
@@ -158,9 +231,56 @@ def tasks_save(task_id: int, task: schemas.TaskUpdate, db_session: DbSession):
     )
 
 
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether the `Accept-Encoding` header value accepts gzip: by its q-value, or the one of `*`."""
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+async def _report_response(
+    request: Request,
+    response: Response,
+    report_type: str,
+    start_datetime: datetime,
+    end_datetime: datetime,
+    report_version: tuple[int, int | None],
+    get_report: Callable[[], Awaitable[Any]],
+) -> Response:
+    """
+    The serialized report body from the report cache, or calculated by `get_report`
+    (the JSON values, see `serializers`), by the report version (see `work_report_data_version`).
+    """
+    key = (report_type, dt_to_ts(start_datetime), dt_to_ts(end_datetime))
+
+    entry = report_cache.get(key, report_version)
+    if entry is None:
+        entry = ReportCacheEntry(serializers.dumps(await get_report()), report_version)
+        report_cache.put(key, entry)
+
+    headers = dict(response.headers)  # ETag
+    if entry.gzip_body is not None and _accepts_gzip(request.headers.get('accept-encoding', '')):
+        headers.update({'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'})
+        return Response(entry.gzip_body, media_type='application/json', headers=headers)
+    return Response(entry.body, media_type='application/json', headers=headers)
+
+
 @router.get('/work/report_by_category', response_model=list[schemas.WorkReportCategory])
-def get_work_report_by_category(
-    db_session: DbSession,
+async def get_work_report_by_category(
+    request: Request,
+    response: Response,
+    db_session: AsyncDbSession,
+    report_version: ReportVersion,
     start_datetime: Annotated[datetime | None, Query()] = None,
     end_datetime: Annotated[datetime | None, Query()] = None,
 ):
@@ -169,19 +289,21 @@ def get_work_report_by_category(
     if start_datetime is None and end_datetime is None:
         start_datetime, end_datetime = _get_default_report_datetime_range()
 
-    rows = work_get_report_category(db_session, start_datetime, end_datetime)
-    return [schemas.WorkReportCategory(
-        category=schemas.CategoryMinimal(
-            id=row[0],
-            name=row[1],
-        ),
-        time=row[2],
-    ) for row in rows]
+    async def get_report():
+        rows = await work_get_report_category_async(db_session, start_datetime, end_datetime)
+        return [serializers.work_report_category_values(row) for row in rows]
+
+    return await _report_response(
+        request, response, 'category', start_datetime, end_datetime, report_version, get_report,
+    )
 
 
 @router.get('/work/report_by_task', response_model=list[schemas.WorkReportTask])
-def get_work_report_by_task(
-    db_session: DbSession,
+async def get_work_report_by_task(
+    request: Request,
+    response: Response,
+    db_session: AsyncDbSession,
+    report_version: ReportVersion,
     start_datetime: Annotated[datetime | None, Query()] = None,
     end_datetime: Annotated[datetime | None, Query()] = None,
 ):
@@ -190,23 +312,21 @@ def get_work_report_by_task(
     if start_datetime is None and end_datetime is None:
         start_datetime, end_datetime = _get_default_report_datetime_range()
 
-    rows = work_get_report_task(db_session, start_datetime, end_datetime)
-    return [schemas.WorkReportTask(
-        task=schemas.TaskWithCategoryMinimal(
-            id=row[0],
-            name=row[1],
-            category=schemas.CategoryMinimal(
-                id=row[2],
-                name=row[3],
-            )
-        ),
-        time=row[4],
-    ) for row in rows]
+    async def get_report():
+        rows = await work_get_report_task_async(db_session, start_datetime, end_datetime)
+        return [serializers.work_report_task_values(row) for row in rows]
+
+    return await _report_response(
+        request, response, 'task', start_datetime, end_datetime, report_version, get_report,
+    )
 
 
 @router.get('/work/report_total', response_model=schemas.WorkReportTotal)
-def get_work_report_total(
-    db_session: DbSession,
+async def get_work_report_total(
+    request: Request,
+    response: Response,
+    db_session: AsyncDbSession,
+    report_version: ReportVersion,
     start_datetime: Annotated[datetime | None, Query()] = None,
     end_datetime: Annotated[datetime | None, Query()] = None,
 ):
@@ -215,11 +335,74 @@ def get_work_report_total(
     if start_datetime is None and end_datetime is None:
         start_datetime, end_datetime = _get_default_report_datetime_range()
 
-    rows = work_get_report_total(db_session, start_datetime, end_datetime)
-    row = rows[0]
+    async def get_report():
+        rows = await work_get_report_total_async(db_session, start_datetime, end_datetime)
+        return serializers.work_report_total_values(rows[0][0])
 
-    return schemas.WorkReportTotal(
-        time=row[0],
+    return await _report_response(
+        request, response, 'total', start_datetime, end_datetime, report_version, get_report,
+    )
+
+
+@router.get('/work/report', response_model=schemas.WorkReport)
+async def get_work_report(
+    request: Request,
+    response: Response,
+    db_session: AsyncDbSession,
+    report_version: ReportVersion,
+    start_datetime: Annotated[datetime | None, Query()] = None,
+    end_datetime: Annotated[datetime | None, Query()] = None,
+):
+    """All of `report_by_category`, `report_by_task` and `report_total` by a single query."""
+    start_datetime, end_datetime = _report_datetime_range(start_datetime, end_datetime)
+
+    async def get_report():
+        report = await work_get_report_async(db_session, start_datetime, end_datetime)
+        return {
+            'by_category': [serializers.work_report_category_values(row) for row in report.by_category],
+            'by_task': [serializers.work_report_task_values(row) for row in report.by_task],
+            'total': serializers.work_report_total_values(report.total),
+        }
+
+    return await _report_response(
+        request, response, 'report', start_datetime, end_datetime, report_version, get_report,
+    )
+
+
+def _zone_info(tz: str | None) -> ZoneInfo | None:
+    if tz is None:
+        return None
+    try:
+        return ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f'Unknown time zone: {tz}')
+
+
+@router.get('/work/report_buckets', response_model=list[schemas.WorkReportBucket])
+async def get_work_report_buckets(
+    request: Request,
+    response: Response,
+    db_session: AsyncDbSession,
+    report_version: ReportVersion,
+    bucket: Literal['day', 'week', 'month'] = 'day',
+    tz: Annotated[str | None, Query(description='IANA time zone of the buckets, the server one by default')] = None,
+    group_by: Literal['task', 'category'] | None = None,
+    start_datetime: Annotated[datetime | None, Query()] = None,
+    end_datetime: Annotated[datetime | None, Query()] = None,
+):
+    """The report (the total, by tasks or by categories) for each day, week or month of the range."""
+    start_datetime, end_datetime = _report_datetime_range(start_datetime, end_datetime)
+    zone_info = _zone_info(tz)
+
+    async def get_report():
+        buckets = await work_get_report_buckets_async(
+            db_session, start_datetime, end_datetime, bucket, zone_info, group_by,
+        )
+        return [serializers.work_report_bucket_values(report_bucket, zone_info) for report_bucket in buckets]
+
+    return await _report_response(
+        request, response, f'buckets:{bucket}:{tz}:{group_by}', start_datetime, end_datetime, report_version,
+        get_report,
     )
 
 
@@ -242,8 +425,24 @@ def work_items_add(work_item: schemas.WorkItemIn, db_session: DbSession):
     )
 
 
-@router.get('/work/items/', response_model=Page[schemas.WorkItemOut], summary='Get all work items')
-def work_items_list(db_session: DbSession, order_by: list[str] = Query(None)):
+@router.post('/work/items/bulk', response_model=list[schemas.WorkItemOut], status_code=201)
+def work_items_add_bulk(work_items: list[schemas.WorkItemIn], db_session: DbSession):
+    created_work_items = work_item_create_bulk(
+        db_session,
+        [(work_item.start_dt, work_item.end_dt, work_item.task_id) for work_item in work_items],
+    )
+    return [schemas.WorkItemOut(
+        id=created_work_item.id,
+        start_dt=ts_to_dt(created_work_item.start_timestamp),
+        end_dt=created_work_item.end_timestamp and ts_to_dt(created_work_item.end_timestamp),
+        task=schemas.TaskMinimal(
+            id=created_work_item.task.id,
+            name=created_work_item.task.name,
+        ),
+    ) for created_work_item in created_work_items]
+
+
+def _work_items_service_order_by(order_by: list[str] | None) -> list[str]:
     order_by_map = {
         'start_dt': 'start_timestamp',
         'end_dt': 'end_timestamp',
@@ -256,21 +455,75 @@ def work_items_list(db_session: DbSession, order_by: list[str] = Query(None)):
         direction, order_field = order_by_match.groups()
         service_field = f'{direction}{order_by_map.get(order_field, order_field)}'
         service_order_by.append(service_field)
+    return service_order_by
 
-    page = work_item_list(
+
+@router.get(
+    '/work/items/',
+    response_model=Page[schemas.WorkItemOut],
+    summary='Get all work items',
+    dependencies=[ConditionalGet],
+)
+async def work_items_list(
+    response: Response,
+    db_session: AsyncDbSession,
+    order_by: list[str] = Query(None),
+    params: schemas.WorkItemListParams = Depends(),
+):
+    items, total, params = await work_item_list_rows_async(
         db_session,
-        service_order_by,
-        transformer=lambda items: [{
-            'id': item.id,
-            'task': {
-                'id': item.task_id,
-                'name': item.task_name,
-            },
-            'start_dt': ts_to_dt(item.start_timestamp),
-            'end_dt': item.end_timestamp and ts_to_dt(item.end_timestamp),
-        } for item in items],
+        _work_items_service_order_by(order_by),
+        params=params,
+    )
+    return ORJSONResponse(
+        serializers.page_values(serializers.work_items_values(items), total, params),
+        headers=dict(response.headers),
+    )
+
+
+@router.get(
+    '/work/items/cursor',
+    response_model=schemas.WorkItemCursorPage,
+    summary='Get all work items by the cursor pagination',
+    dependencies=[ConditionalGet],
+)
+async def work_items_list_cursor(
+    response: Response,
+    db_session: AsyncDbSession,
+    order_by: list[str] = Query(None),
+    cursor: str | None = None,
+    size: int = Query(50, ge=1, le=100),
+):
+    items, next_cursor = await work_item_list_cursor_async(
+        db_session,
+        _work_items_service_order_by(order_by),
+        cursor,
+        size,
+    )
+    return ORJSONResponse(
+        {
+            'items': serializers.work_items_values(items),
+            'size': size,
+            'next_cursor': next_cursor,
+        },
+        headers=dict(response.headers),
+    )
+
+
+@router.get('/work/items/export', summary='Export work items')
+def work_items_export(
+    db_session: DbSession,
+    export_format: Annotated[Literal['ndjson', 'csv'], Query(alias='format')] = 'ndjson',
+    start_datetime: Annotated[datetime | None, Query()] = None,
+    end_datetime: Annotated[datetime | None, Query()] = None,
+    task_id: Annotated[list[int] | None, Query()] = None,
+):
+    partitions = work_item_export(db_session, start_datetime, end_datetime, task_id)
+    return StreamingResponse(
+        EXPORT_FORMATS[export_format](partitions),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="work_items.{export_format}"'},
     )
-    return page
 
 
 @router.delete('/work/items/{work_item_id}', status_code=204)
@@ -278,7 +531,7 @@ def work_items_remove(work_item_id: int, db_session: DbSession):
     work_item_delete(db_session, work_item_id)
 
 
-@router.get('/work/items/{work_item_id}', response_model=schemas.WorkItemOut)
+@router.get('/work/items/{work_item_id}', response_model=schemas.WorkItemOut, dependencies=[ConditionalGet])
 def work_items_retrieve(work_item_id: int, db_session: DbSession):
     work_item = work_item_read(db_session, work_item_id)
     return schemas.WorkItemOut(
@@ -355,8 +608,63 @@ def work_stop_current(db_session: DbSession):
     work_item_stop_current(db_session)
 
 
+@router.get('/work/today', response_model=schemas.WorkToday)
+async def get_work_today(db_session: AsyncDbSession):
+    """The today total and the current work item (if any)."""
+    today = await work_get_today_async(db_session)
+    current = today.current
+    return schemas.WorkToday(
+        total=schemas.WorkReportTotal(time=today.total),
+        current=current and schemas.WorkItemOut(
+            id=current.id,
+            task=schemas.TaskMinimal(id=current.task_id, name=current.task_name),
+            start_dt=ts_to_dt(current.start_timestamp),
+            end_dt=None,
+        ),
+    )
+
+
+async def _get_today_total() -> int:
+    async with asynccontextmanager(get_async_db)() as db_session:
+        return await work_get_today_total_async(db_session)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_sqlite_settings()
+    event_hub.start(_get_today_total)
+    snapshot_dir = get_snapshot_dir()
+    snapshot_task = snapshot_dir and asyncio.create_task(
+        snapshot_job(snapshot_dir, get_snapshot_format(), get_snapshot_interval())
+    )
+    yield
+    if snapshot_task:
+        snapshot_task.cancel()
+    await event_hub.stop()
+
+
+@router.get('/work/events', summary='Stream of the work events (SSE)')
+async def work_events():
+    """
+    Server-Sent Events: `start`, `stop`, `create`, `update` and `delete` of the work items,
+    each batch of them (and every tick) followed by `today` with the today total.
+    """
+    initial_messages = [sse_message('today', {'time': await _get_today_total()})]
+    return StreamingResponse(
+        event_hub.stream(initial_messages),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@router.get('/stats/sql', response_model=list[schemas.SqlStatementStats], summary='Get SQL statements stats.')
+def sql_stats_list():
+    """Returns execution stats per statement fingerprint of this process, the most time consuming first"""
+    return sql_stats.get_stats()
+
+
 # Initialize API
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+The per row cost of the timestamp conversions: `before` is the `time` module way of
+`dt` (a `datetime.now().astimezone()` per naive `dt_to_ts`, `localtime` per `ts_to_dt`),
+`after` is the cached local zone, by a row and by a batch of the rows.
+
+    python -m benchmarks.bench_dt [--rows N] [--repeat N]
+"""
+import time
+from argparse import ArgumentParser
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+import dt
+
+
+def _dt_to_ts_before(value: datetime) -> int:
+    if value.tzinfo is None:
+        value_with_tz = value.replace(tzinfo=datetime.now().astimezone().tzinfo)
+        value_without_tz = value
+    else:
+        value_with_tz = value
+        value_without_tz = value.replace(tzinfo=None)
+    return int(time.mktime((value_without_tz - value_with_tz.utcoffset()).timetuple()))
+
+
+def _ts_to_dt_before(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts).replace(tzinfo=timezone.utc).astimezone()
+
+
+def _per_row_ns(function: Callable[[list], object], values: list, repeat: int) -> float:
+    """The best of the runs, nanoseconds per value."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        function(values)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / len(values)
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    now_ts = dt.get_now_timestamp()
+    # A work item start every ~17 minutes back from now: the rows of ~3 years, DST changes included
+    timestamps = [now_ts - i * 1037 for i in range(args.rows)]
+    naive_datetimes = [_ts_to_dt_before(ts).replace(tzinfo=None) for ts in timestamps]
+    dt.reset_local_tz()
+
+    cases = [
+        ('ts_to_dt', [
+            ('before', lambda values: [_ts_to_dt_before(ts) for ts in values]),
+            ('after', lambda values: [dt.ts_to_dt(ts) for ts in values]),
+            ('after, batch', dt.ts_to_dt_many),
+        ], timestamps),
+        ('dt_to_ts (naive)', [
+            ('before', lambda values: [_dt_to_ts_before(value) for value in values]),
+            ('after', lambda values: [dt.dt_to_ts(value) for value in values]),
+            ('after, batch', dt.dt_to_ts_many),
+        ], naive_datetimes),
+    ]
+    print(f'{args.rows} rows, the best of {args.repeat} runs, ns per row')
+    for name, functions, values in cases:
+        before_ns = None
+        for label, function in functions:
+            ns = _per_row_ns(function, values, args.repeat)
+            before_ns = before_ns or ns
+            print(f'{name:<18} {label:<14} {ns:>8.0f} {before_ns / ns:>6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+The timings of the `services` functions and of the `api` routes (through the ASGI app)
+over the datasets of 10k, 100k and 1M work items, saved as JSON to compare the runs and
+to see the scaling by the dataset size.
+
+    python -m benchmarks.bench_suite [--sizes 10000 100000 1000000] [--repeat 5]
+        [--output bench-results.json] [--compare previous-results.json]
+
+Every size runs in its own process over its own temporary DB, the environment (e.g.
+`TIMESHEET_DB_PROFILE`, `TIMESHEET_REPORT_ENGINE`) is passed through. The categories
+and tasks are created by `tests.factories`, the work items follow `WorkItemFactory`
+(5 minutes long, task by task) with 5 minutes gaps up to now, the last one is the current
+one; they are inserted by a single executemany since the factories take minutes for 1M.
+The report cache is cleared before every call, i.e. the reports are timed uncached.
+The write calls are rolled back, each one from the same dataset.
+"""
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+SIZES = (10000, 100000, 1000000)
+CATEGORIES = 10
+TASKS_PER_CATEGORY = 10
+WORK_ITEM_SECONDS = 300  # `WorkItemFactory`
+WORK_ITEM_STEP = 600
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _timings(runs: list[float]) -> dict:
+    return {
+        'min': min(runs),
+        'median': statistics.median(runs),
+        'mean': statistics.fmean(runs),
+        'runs': runs,
+    }
+
+
+def _run_size(size: int, repeat: int) -> dict:
+    """The timings of the size, in this process: the DB of `TIMESHEET_DB_FILENAME` is created."""
+    # The app modules read the configuration at the import, after the environment is set up
+    import asyncio
+
+    import httpx
+    from sqlalchemy import insert
+
+    import services
+    from api import app
+    from database import db_session_context, init_db, SessionLocal, transaction_session
+    from dt import get_now_timestamp, ts_to_dt
+    from models import WorkItem
+    from report_cache import day_total_cache, report_cache
+    from report_engine import report_engine
+    from schemas import WorkItemListParams
+    from tests.factories import CategoryFactory, TaskFactory
+
+    init_db()
+
+    # Dataset
+    populate_start = time.perf_counter()
+    now_ts = get_now_timestamp()
+    first_start_ts = now_ts - size * WORK_ITEM_STEP
+    with SessionLocal() as db_session:
+        db_session_context['session'] = db_session
+        try:
+            tasks = [
+                TaskFactory(category=category, is_archived=False)
+                for category in CategoryFactory.create_batch(CATEGORIES)
+                for _ in range(TASKS_PER_CATEGORY)
+            ]
+            task_ids = [task.id for task in tasks]
+            category_id = tasks[0].category_id
+            db_session.execute(insert(WorkItem.__table__), [
+                {
+                    'task_id': task_ids[i % len(task_ids)],
+                    'start_timestamp': first_start_ts + i * WORK_ITEM_STEP,
+                    'end_timestamp': None if i == size - 1 else first_start_ts + i * WORK_ITEM_STEP + WORK_ITEM_SECONDS,
+                }
+                for i in range(size)
+            ])
+            services.work_rollup_rebuild(db_session)  # the Core insert bypasses the rollup of the mapper events
+            db_session.commit()
+        finally:
+            db_session_context.pop('session', None)
+    populate_seconds = time.perf_counter() - populate_start
+
+    # The arguments: a work item in the middle, the free range after it, the last month, year and everything
+    middle_id = size // 2
+    middle_end_ts = first_start_ts + (middle_id - 1) * WORK_ITEM_STEP + WORK_ITEM_SECONDS
+    middle_start_dt = ts_to_dt(middle_end_ts - WORK_ITEM_SECONDS)
+    free_start_dt = ts_to_dt(middle_end_ts + 10)
+    free_end_dt = ts_to_dt(middle_end_ts + WORK_ITEM_STEP - WORK_ITEM_SECONDS - 10)
+    task_id = task_ids[0]
+    now_dt = ts_to_dt(now_ts)
+    month_start_dt = ts_to_dt(now_ts - 30 * 86400)
+    year_start_dt = ts_to_dt(now_ts - 365 * 86400)
+    all_start_dt = ts_to_dt(first_start_ts)
+    ranges = {'month': month_start_dt, 'year': year_start_dt, 'all': all_start_dt}
+
+    @contextmanager
+    def rolled_back_session() -> Iterator:
+        """The shared session (see `get_db`) of a transaction rolled back at the exit, as the tests one."""
+        try:
+            with transaction_session(rollback=True) as db_session:
+                db_session_context['session'] = db_session
+                try:
+                    yield db_session
+                finally:
+                    db_session_context.pop('session', None)
+        finally:
+            report_cache.clear()  # the rolled back data may be cached
+            day_total_cache.clear()
+            if report_engine is not None:
+                report_engine.clear()
+
+    def clear_caches() -> None:
+        report_cache.clear()
+        day_total_cache.clear()
+
+    def measure(call: Callable[[], object], write: bool, setup: Callable | None = None) -> dict:
+        runs = []
+        for i in range(repeat + 1):  # the first run warms up (the statements compilation, the engine)
+            with rolled_back_session() if write else SessionLocal() as db_session:
+                if setup is not None:
+                    setup(db_session)
+                clear_caches()
+                start = time.perf_counter()
+                call(db_session)
+                if i:
+                    runs.append(time.perf_counter() - start)
+        return _timings(runs)
+
+    # Services
+    def consume(partitions) -> None:
+        for _ in partitions:
+            pass
+
+    reads = {
+        'category_list': lambda s: services.category_list(s),
+        'category_read': lambda s: services.category_read(s, category_id),
+        'task_list': lambda s: services.task_list(s),
+        'task_read': lambda s: services.task_read(s, task_id),
+        'work_item_read': lambda s: services.work_item_read(s, middle_id),
+        'work_item_list_rows': lambda s: services.work_item_list_rows(
+            s, ['-start_timestamp'], WorkItemListParams(page=1, size=50, include_total=True),
+        ),
+        'work_item_list_rows (last page)': lambda s: services.work_item_list_rows(
+            s, ['-start_timestamp'], WorkItemListParams(page=size // 50, size=50, include_total=False),
+        ),
+        'work_item_list_cursor': lambda s: services.work_item_list_cursor(s, ['-start_timestamp'], None, 50),
+        'work_item_export': lambda s: consume(services.work_item_export(s)),
+        'work_item_export (month)': lambda s: consume(services.work_item_export(s, month_start_dt, now_dt)),
+        'work_item_snapshot_bounds': lambda s: services.work_item_snapshot_bounds(s),
+        'work_item_snapshot': lambda s: consume(services.work_item_snapshot(s, first_start_ts, now_ts)),
+        'data_version_read': lambda s: services.data_version_read(s),
+        'work_report_data_version': lambda s: services.work_report_data_version(s, month_start_dt, now_dt),
+        'work_get_today': lambda s: services.work_get_today(s),
+        'work_get_today_total': lambda s: services.work_get_today_total(s),
+        **{
+            f'{name} ({range_name})': lambda s, function=function, start_dt=start_dt: function(s, start_dt, now_dt)
+            for name, function in [
+                ('work_get_report_category', services.work_get_report_category),
+                ('work_get_report_task', services.work_get_report_task),
+                ('work_get_report_total', services.work_get_report_total),
+                ('work_get_report', services.work_get_report),
+            ]
+            for range_name, start_dt in ranges.items()
+        },
+        'work_get_report_buckets (month, day)': lambda s: services.work_get_report_buckets(
+            s, month_start_dt, now_dt, 'day', group_by='task',
+        ),
+        'work_get_report_buckets (all, month)': lambda s: services.work_get_report_buckets(
+            s, all_start_dt, now_dt, 'month', group_by='category',
+        ),
+    }
+    writes = {
+        'category_create': (lambda s: services.category_create(s, 'Benchmark', None), None),
+        'category_update': (lambda s: services.category_update(s, category_id, 'Benchmark', None), None),
+        'category_delete': (lambda s: services.category_delete(s, category_id), None),
+        'task_create': (lambda s: services.task_create(s, 'Benchmark', category_id), None),
+        'task_update': (lambda s: services.task_update(s, task_id, 'Benchmark', category_id, False), None),
+        'task_delete': (lambda s: services.task_delete(s, task_id), None),
+        'work_item_create': (lambda s: services.work_item_create(s, free_start_dt, free_end_dt, task_id), None),
+        'work_item_create_bulk': (
+            lambda s: services.work_item_create_bulk(s, [(free_start_dt, free_end_dt, task_id)]), None,
+        ),
+        'work_item_update': (
+            lambda s: services.work_item_update(
+                s, middle_id, task_id, middle_start_dt, free_end_dt,
+            ),
+            None,
+        ),
+        'work_item_update_partial': (
+            lambda s: services.work_item_update_partial(s, middle_id, task_id, None, None), None,
+        ),
+        'work_item_delete': (lambda s: services.work_item_delete(s, middle_id), None),
+        'work_item_stop_current': (lambda s: services.work_item_stop_current(s), None),
+        'work_item_start': (lambda s: services.work_item_start(s, task_id, None), services.work_item_stop_current),
+        'work_rollup_rebuild': (lambda s: services.work_rollup_rebuild(s), None),
+    }
+    services_timings = {name: measure(call, write=False) for name, call in reads.items()}
+    services_timings |= {name: measure(call, write=True, setup=setup) for name, (call, setup) in writes.items()}
+
+    # API
+    def report_params(start_dt: datetime) -> dict:
+        return {'start_datetime': start_dt.isoformat(), 'end_datetime': now_dt.isoformat()}
+
+    free_work_item = {'task_id': task_id, 'start_dt': free_start_dt.isoformat(), 'end_dt': free_end_dt.isoformat()}
+    routes = {
+        'GET /api/categories': ('GET', '/api/categories', {}),
+        'GET /api/categories/{id}': ('GET', f'/api/categories/{category_id}', {}),
+        'POST /api/categories': ('POST', '/api/categories', {'json': {'name': 'Benchmark', 'description': None}}),
+        'PUT /api/categories/{id}': (
+            'PUT', f'/api/categories/{category_id}',
+            {'json': {'id': category_id, 'name': 'Benchmark', 'description': None}},
+        ),
+        'GET /api/tasks': ('GET', '/api/tasks', {}),
+        'GET /api/tasks/{id}': ('GET', f'/api/tasks/{task_id}', {}),
+        'POST /api/tasks': ('POST', '/api/tasks', {'json': {'name': 'Benchmark', 'category': {'id': category_id}}}),
+        'PUT /api/tasks/{id}': (
+            'PUT', f'/api/tasks/{task_id}',
+            {'json': {'name': 'Benchmark', 'category': {'id': category_id}, 'is_archived': False}},
+        ),
+        'GET /api/work/items/': ('GET', '/api/work/items/', {'params': {'page': 1, 'size': 50}}),
+        'GET /api/work/items/cursor': ('GET', '/api/work/items/cursor', {'params': {'size': 50}}),
+        'GET /api/work/items/export': ('GET', '/api/work/items/export', {'params': {'format': 'ndjson'}}),
+        'GET /api/work/items/export (csv, month)': (
+            'GET', '/api/work/items/export', {'params': {'format': 'csv', **report_params(month_start_dt)}},
+        ),
+        'GET /api/work/items/{id}': ('GET', f'/api/work/items/{middle_id}', {}),
+        'POST /api/work/items/': ('POST', '/api/work/items/', {'json': free_work_item}),
+        'POST /api/work/items/bulk': ('POST', '/api/work/items/bulk', {'json': [free_work_item]}),
+        'PUT /api/work/items/{id}': ('PUT', f'/api/work/items/{middle_id}', {'json': {
+            'id': middle_id,
+            'task': {'id': task_id},
+            'start_dt': middle_start_dt.isoformat(),
+            'end_dt': free_end_dt.isoformat(),
+        }}),
+        'PATCH /api/work/items/{id}': ('PATCH', f'/api/work/items/{middle_id}', {'json': {'task': {'id': task_id}}}),
+        'DELETE /api/work/items/{id}': ('DELETE', f'/api/work/items/{middle_id}', {}),
+        'POST /api/work/stop_current': ('POST', '/api/work/stop_current', {}),
+        'POST /api/work/start': ('POST', '/api/work/start', {'json': {'task_id': task_id}}, services.work_item_stop_current),
+        'GET /api/work/today': ('GET', '/api/work/today', {}),
+        **{
+            f'GET /api/work/{report} ({range_name})': ('GET', f'/api/work/{report}', {'params': report_params(start_dt)})
+            for report in ('report_by_category', 'report_by_task', 'report_total', 'report')
+            for range_name, start_dt in ranges.items()
+        },
+        'GET /api/work/report_buckets (month, day)': (
+            'GET', '/api/work/report_buckets', {'params': {'bucket': 'day', 'group_by': 'task', **report_params(month_start_dt)}},
+        ),
+        'GET /api/work/report_buckets (all, month)': (
+            'GET', '/api/work/report_buckets',
+            {'params': {'bucket': 'month', 'group_by': 'category', **report_params(all_start_dt)}},
+        ),
+        'GET /api/stats/sql': ('GET', '/api/stats/sql', {}),
+    }
+
+    async def measure_routes() -> dict:
+        timings = {}
+        async with httpx.AsyncClient(app=app, base_url='http://benchmark') as client:
+            for name, (method, url, kwargs, *setup) in routes.items():
+                runs = []
+                for i in range(repeat + 1):
+                    # The writes by the shared rolled back session, the reads by the sessions of the app
+                    with rolled_back_session() if method != 'GET' else _nothing() as db_session:
+                        for setup_call in setup:
+                            setup_call(db_session)
+                        clear_caches()
+                        start = time.perf_counter()
+                        response = await client.request(method, url, **kwargs)
+                        if i:
+                            runs.append(time.perf_counter() - start)
+                    if response.status_code >= 400:
+                        raise RuntimeError(f'{name}: {response.status_code} {response.text}')
+                timings[name] = _timings(runs)
+        return timings
+
+    return {
+        'populate_seconds': populate_seconds,
+        'services': services_timings,
+        'api': asyncio.run(measure_routes()),
+    }
+
+
+@contextmanager
+def _nothing() -> Iterator[None]:
+    yield
+
+
+def _print_results(results: dict, compare: dict | None) -> None:
+    """The medians (ms) by the sizes, and the ratio to the compared run if any."""
+    sizes = list(results['sizes'])
+    for group in ('services', 'api'):
+        names = list(dict.fromkeys(name for size in sizes for name in results['sizes'][size][group]))
+        print(f'\n{group} (median ms)'.ljust(50) + ''.join(f'{size:>18}' for size in sizes))
+        for name in names:
+            line = name[:48].ljust(48)
+            for size in sizes:
+                timings = results['sizes'][size][group].get(name)
+                cell = '' if timings is None else f'{timings["median"] * 1000:.2f}'
+                previous = compare and compare['sizes'].get(size, {}).get(group, {}).get(name)
+                if timings is not None and previous:
+                    cell += f' ({timings["median"] / previous["median"]:.2f}x)'
+                line += cell.rjust(18)
+            print(line)
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='The numbers of the work items')
+    parser.add_argument('--repeat', type=int, default=5, help='The timed runs of every call (after a warm up one)')
+    parser.add_argument('--output', default='bench-results.json', help='The JSON results file')
+    parser.add_argument('--compare', help='The JSON results of a previous run to print the ratios to')
+    parser.add_argument('--run-size', type=int, help='Internal: run the size in this process')
+    args = parser.parse_args()
+
+    if args.run_size is not None:
+        Path(args.output).write_text(json.dumps(_run_size(args.run_size, args.repeat)))
+        return
+
+    results = {
+        'meta': {
+            'date': datetime.now().astimezone().isoformat(),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'env': {name: value for name, value in os.environ.items() if name.startswith('TIMESHEET_')},
+        },
+        'sizes': {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            print(f'{size} work items...', file=sys.stderr)
+            output = Path(directory, f'{size}.json')
+            subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_suite', '--run-size', str(size),
+                 '--repeat', str(args.repeat), '--output', str(output)],
+                env={**os.environ, 'TIMESHEET_DB_FILENAME': str(Path(directory, f'{size}.db'))},
+                check=True,
+            )
+            results['sizes'][str(size)] = json.loads(output.read_text())
+
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    compare = json.loads(Path(args.compare).read_text()) if args.compare else None
+    _print_results(results, compare)
+
+
+if __name__ == '__main__':
+    main()
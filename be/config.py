@@ -1,6 +1,92 @@
 import os
 
+# SQLite PRAGMAs applied to every new connection, by the profile name.
+# The `default` profile keeps the library defaults.
+SQLITE_PROFILES = {
+    'default': {},
+    'performance': {
+        'journal_mode': 'WAL',  # readers do not block writers and vice versa
+        'synchronous': 'NORMAL',  # safe with WAL, fsync on checkpoints only
+        'mmap_size': 268435456,  # 256MB
+        'cache_size': -65536,  # 64MB (negative value is in KiB)
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,  # ms
+    },
+}
+
+
+def get_database_filename() -> str:
+    return os.getenv('TIMESHEET_DB_FILENAME', '../db/timesheet.db')
+
 
 def get_database_name() -> str:
-    name = os.getenv('TIMESHEET_DB_FILENAME', '../db/timesheet.db')
-    return f'sqlite:///{name}'
+    return f'sqlite:///{get_database_filename()}'
+
+
+def get_read_only_database_name(driver: str = 'sqlite') -> str:
+    """The URI of the same DB opened in the read-only mode."""
+    return f'{driver}:///file:{get_database_filename()}?mode=ro&uri=true'
+
+
+def get_read_pool_size() -> int:
+    return int(os.getenv('TIMESHEET_DB_READ_POOL_SIZE', os.cpu_count() or 1))
+
+
+def get_write_timeout() -> float:
+    """Seconds to wait in the queue for the writer connection."""
+    return float(os.getenv('TIMESHEET_DB_WRITE_TIMEOUT', 30))
+
+
+def get_slow_query_threshold() -> float:
+    """Statements running at least this number of milliseconds are logged with their parameters."""
+    return float(os.getenv('TIMESHEET_SLOW_QUERY_MS', 200))
+
+
+def get_report_cache_size() -> int:
+    """The max number of the cached report bodies, 0 disables the cache."""
+    return int(os.getenv('TIMESHEET_REPORT_CACHE_SIZE', 256))
+
+
+REPORT_ENGINES = ('sql', 'numpy')
+
+
+def get_report_engine() -> str:
+    """
+    The engine of the reports: `sql` (the reference one) or `numpy`, the in-memory copy
+    of the work items (requires NumPy).
+    """
+    name = os.getenv('TIMESHEET_REPORT_ENGINE', 'sql')
+    if name not in REPORT_ENGINES:
+        raise ValueError(f'Unknown report engine: {name}')
+    return name
+
+
+def get_snapshot_dir() -> str | None:
+    """The directory of the monthly work items snapshots written in the background, None disables."""
+    return os.getenv('TIMESHEET_SNAPSHOT_DIR') or None
+
+
+def get_snapshot_format() -> str:
+    """`arrow` (IPC files, memory-mapped by the reader) or `parquet`."""
+    return os.getenv('TIMESHEET_SNAPSHOT_FORMAT', 'arrow')
+
+
+def get_snapshot_interval() -> float:
+    """Seconds between the background snapshot runs."""
+    return float(os.getenv('TIMESHEET_SNAPSHOT_INTERVAL', 3600))
+
+
+def get_events_tick() -> float:
+    """Seconds between the today total updates of the events stream while there are no changes."""
+    return float(os.getenv('TIMESHEET_EVENTS_TICK', 60))
+
+
+def get_sqlite_profile_name() -> str:
+    name = os.getenv('TIMESHEET_DB_PROFILE', 'default')
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f'Unknown SQLite profile: {name}')
+    return name
+
+
+def get_sqlite_pragmas() -> dict[str, str | int]:
+    return SQLITE_PROFILES[get_sqlite_profile_name()]
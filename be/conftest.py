@@ -6,11 +6,13 @@ from unittest.mock import patch
 from sqlalchemy_utils import database_exists, drop_database
 
 from config import get_database_name
-from database import SessionLocal, init_db
-from dt import get_local_tz
+from database import SessionLocal, engine, init_db
+from dt import get_local_tz, reset_local_tz
 from tests.const import FROZEN_LOCAL_DT
 
 from database import db_session_context
+from report_cache import day_total_cache, report_cache
+from report_engine import report_engine
 
 
 @pytest.fixture
@@ -29,10 +31,24 @@ def frozen_ts():
         'tests.factories.get_now_timestamp', return_value=ts,
     ), patch(
         'services.get_now_timestamp', return_value=ts,
+    ), patch(
+        'snapshot.get_now_timestamp', return_value=ts,
     ):
         yield ts
 
 
+@pytest.fixture
+def berlin_host(monkeypatch):
+    """The local time zone of the host is Europe/Berlin: the stored timestamps are shifted by its offset."""
+    monkeypatch.setenv('TZ', 'Europe/Berlin')
+    time.tzset()
+    reset_local_tz()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+    reset_local_tz()
+
+
 @pytest.fixture(scope='session')
 def db():
     db_name = get_database_name()
@@ -47,9 +63,22 @@ def db():
 
 @pytest.fixture(scope='function', autouse=True)
 def session(db):
-    session = SessionLocal()
-    session.begin_nested()
+    # The commits of the services release savepoints only, the outer transaction is rolled back.
+    # pysqlite does not begin a transaction before SAVEPOINT itself, so it is emitted explicitly.
+    connection = engine.connect()
+    driver_connection = connection.connection.driver_connection
+    driver_connection.isolation_level = None
+    transaction = connection.begin()
+    connection.exec_driver_sql('BEGIN')
+    session = SessionLocal(bind=connection, join_transaction_mode='create_savepoint')
     db_session_context['session'] = session
     yield session
-    session.rollback()
+    session.close()
+    transaction.rollback()
+    report_cache.clear()  # the rolled back data may be cached
+    day_total_cache.clear()
+    if report_engine is not None:
+        report_engine.clear()
+    driver_connection.isolation_level = ''
+    connection.close()
     db_session_context.pop('session', None)
@@ -1,19 +1,101 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, Engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy_utils import database_exists, create_database
 
-from config import get_database_name
+from config import (
+    get_database_name,
+    get_read_only_database_name,
+    get_read_pool_size,
+    get_sqlite_pragmas,
+    get_sqlite_profile_name,
+    get_write_timeout,
+    SQLITE_PROFILES,
+)
+import sql_stats
 from models import Base
 
-engine = create_engine(
+logger = logging.getLogger(__name__)
+
+# Some PRAGMAs change the DB file and cannot be applied by read-only connections
+WRITE_ONLY_PRAGMAS = {'journal_mode'}
+# Requests with these HTTP methods are served by the read-only connections
+READ_ONLY_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+def _make_pragmas_listener(read_only: bool):
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        """Apply PRAGMAs of the configured SQLite profile to the new connection."""
+        pragmas = {
+            name: value for name, value in get_sqlite_pragmas().items()
+            if not (read_only and name in WRITE_ONLY_PRAGMAS)
+        }
+        if read_only:
+            pragmas['query_only'] = 'ON'
+        if not pragmas:
+            return
+
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    return apply_sqlite_pragmas
+
+
+def _create_engine(url: str, read_only: bool = False, **kwargs) -> Engine:
+    new_engine = create_engine(
+        url,
+        # This is to prevent accidentally sharing the same connection
+        # for different things (for different requests).
+        # https://fastapi.tiangolo.com/tutorial/sql-databases/#create-the-sqlalchemy-engine
+        connect_args={'check_same_thread': False},
+        **kwargs,
+    )
+    event.listen(new_engine, 'connect', _make_pragmas_listener(read_only))
+    sql_stats.instrument(new_engine)
+    return new_engine
+
+
+def _create_async_engine(url: str, read_only: bool = False, **kwargs) -> AsyncEngine:
+    new_engine = create_async_engine(url, **kwargs)
+    # Hooks of the async engine are attached to its underlying sync engine
+    event.listen(new_engine.sync_engine, 'connect', _make_pragmas_listener(read_only))
+    sql_stats.instrument(new_engine.sync_engine)
+    return new_engine
+
+
+# SQLite allows only one writer at a time, so all writes go through a single
+# connection. Sessions waiting for it are queued by the pool.
+engine = _create_engine(
     get_database_name(),
-    echo=True,
-    # This is to prevent accidentally sharing the same connection
-    # for different things (for different requests).
-    # https://fastapi.tiangolo.com/tutorial/sql-databases/#create-the-sqlalchemy-engine
-    connect_args={'check_same_thread': False},
+    pool_size=1,
+    max_overflow=0,
+    pool_timeout=get_write_timeout(),
+)
+read_engine = _create_engine(
+    get_read_only_database_name(),
+    read_only=True,
+    pool_size=get_read_pool_size(),
+    max_overflow=0,
+)
+# Serves the `async def` endpoints: the event loop is not blocked while SQLite works
+async_read_engine = _create_async_engine(
+    get_read_only_database_name('sqlite+aiosqlite'),
+    read_only=True,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=get_read_pool_size(),
+    max_overflow=0,
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=async_read_engine)
 db_session_context = {}
 
 
@@ -27,15 +109,38 @@ def init_db():
     Base.metadata.create_all(engine)
 
 
-def get_db():
-    """TODO: Docstring"""
+def get_sqlite_settings() -> dict[str, str | int]:
+    """Read the actual values of the tunable PRAGMAs from a pool connection."""
+    names = {name: None for profile in SQLITE_PROFILES.values() for name in profile}
+    with engine.connect() as connection:
+        return {
+            name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in names
+        }
+
+
+def log_sqlite_settings() -> None:
+    # WARNING: the app servers (uvicorn, Unit) do not configure the app loggers, the last resort handler shows it
+    logger.warning('SQLite profile: %s %s', get_sqlite_profile_name(), get_sqlite_settings())
+
+
+def get_db(request: Request = None):
+    """
+    Yield a session for the request: the read-only one for safe HTTP methods,
+    the writer one otherwise (and without the request, e.g. from CLI).
+    """
     db_session = db_session_context.get('session')
     if db_session:
         yield db_session
         return
 
+    if request is not None and request.method in READ_ONLY_METHODS:
+        session_factory = ReadSessionLocal
+    else:
+        session_factory = SessionLocal
+
     try:
-        db_session = SessionLocal()
+        db_session = session_factory()
         yield db_session
         db_session.commit()
     except Exception as e:
@@ -44,3 +149,81 @@ def get_db():
     finally:
         db_session.close()
         db_session_context.pop('session', None)
+
+
+@contextmanager
+def transaction_session(rollback: bool = False) -> Iterator[Session]:
+    """
+    A writer session of a single transaction, committed at the exit and rolled back on an
+    exception (or always by `rollback`, e.g. to run the writes from the same data again).
+    The commits of the services release savepoints only, so a series of the service calls
+    is applied (or not) as a whole, e.g. a CLI batch. The shared session is its owner's.
+    """
+    db_session = db_session_context.get('session')
+    if db_session:
+        yield db_session
+        return
+
+    connection = engine.connect()
+    # pysqlite does not begin a transaction before SAVEPOINT itself, so it is emitted explicitly.
+    # IMMEDIATE takes the write lock at once (waiting by busy_timeout): with a deferred one a commit
+    # of another connection between the first read and the first write fails the write (WAL).
+    connection.connection.driver_connection.isolation_level = None
+    transaction = connection.begin()
+    connection.exec_driver_sql('BEGIN IMMEDIATE')
+    db_session = SessionLocal(bind=connection, join_transaction_mode='create_savepoint')
+    try:
+        yield db_session
+        if not rollback:
+            db_session.commit()  # releases the savepoint of the session
+            db_session.close()
+            transaction.commit()
+    except BaseException:
+        rollback = True
+        raise
+    finally:
+        if rollback:
+            db_session.close()
+            transaction.rollback()
+        # The connection returns to the pool, so the pysqlite transactions handling is restored
+        connection.connection.driver_connection.isolation_level = ''
+        connection.close()
+
+
+@contextmanager
+def read_session() -> Iterator[Session]:
+    """
+    A read-only session of a single deferred transaction, always rolled back: its reads see a
+    single state of the DB, and it does not take the write lock, so the writers of the other
+    connections go on while it is open (e.g. a long export stream). The shared session is its owner's.
+    """
+    db_session = db_session_context.get('session')
+    if db_session:
+        yield db_session
+        return
+
+    connection = read_engine.connect()
+    # The explicit deferred BEGIN makes the reads of the session one transaction (see above)
+    connection.connection.driver_connection.isolation_level = None
+    transaction = connection.begin()
+    connection.exec_driver_sql('BEGIN')
+    db_session = ReadSessionLocal(bind=connection)
+    try:
+        yield db_session
+    finally:
+        db_session.close()
+        transaction.rollback()
+        connection.connection.driver_connection.isolation_level = ''
+        connection.close()
+
+
+async def get_async_db():
+    """Yield an async read-only session."""
+    db_session = db_session_context.get('session')
+    if db_session:
+        # Proxy the shared session (e.g. the test one) instead of opening a new connection
+        yield AsyncSession(sync_session_class=lambda **kwargs: db_session)
+        return
+
+    async with AsyncReadSessionLocal() as db_session:
+        yield db_session
@@ -1,13 +1,113 @@
 import time
-from datetime import tzinfo, datetime, timezone
+from collections.abc import Iterable, Iterator
+from datetime import date, tzinfo, datetime, timezone, timedelta
+
+_DAY = 86400
+# Conversions closer than this to a UTC offset change of the local zone take the `time` module path
+_TRANSITION_MARGIN = 2 * _DAY
+_SPAN_BITS = 24  # the transitions are found by the spans of 2 ** 24 seconds (~194 days)
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+
+class _LocalZone:
+    """
+    The UTC offsets of the local time zone by timestamps. The offset changes (DST) of
+    a span of time are found once, by sampling `time.localtime` daily and bisecting the
+    changes, and cached: the conversions far from the changes are plain additions then.
+    The zone is read once, `reset()` after changing it (`TZ` and `time.tzset()`).
+    """
+
+    def __init__(self):
+        self._timezones: dict[tuple[int, str], timezone] = {}
+        self._spans: dict[int, tuple[timezone, list[tuple[int, timezone]]]] = {}
+        self._constant: tuple[int, int, timezone] = (0, 0, timezone.utc)  # the last constant offset range
+        self._current: tuple[int, int, timezone] = (0, 0, timezone.utc)  # the one of the current time
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def _timezone_at(self, ts: int) -> timezone:
+        local_time = time.localtime(ts)
+        key = (local_time.tm_gmtoff, local_time.tm_zone)
+        tz = self._timezones.get(key)
+        if tz is None:
+            tz = self._timezones[key] = timezone(timedelta(seconds=local_time.tm_gmtoff), local_time.tm_zone)
+        return tz
+
+    def _span(self, span: int) -> tuple[timezone, list[tuple[int, timezone]]]:
+        """The zone at the span start and the (timestamp, zone) changes within the span."""
+        cached = self._spans.get(span)
+        if cached is not None:
+            return cached
+
+        span_start = span << _SPAN_BITS
+        span_end = (span + 1) << _SPAN_BITS
+        initial = previous = self._timezone_at(span_start)
+        previous_ts = span_start
+        transitions = []
+        for ts in [*range(span_start + _DAY, span_end, _DAY), span_end - 1]:
+            tz = self._timezone_at(ts)
+            if tz is previous:
+                previous_ts = ts
+                continue
+            low, high = previous_ts, ts  # the change is within (low, high]
+            while high - low > 1:
+                middle = (low + high) // 2
+                if self._timezone_at(middle) is previous:
+                    low = middle
+                else:
+                    high = middle
+            transitions.append((high, tz))
+            previous, previous_ts = tz, ts
+        self._spans[span] = initial, transitions
+        return initial, transitions
+
+    def constant_range(self, ts: int) -> tuple[int, int, timezone]:
+        """[start, end) around the timestamp without offset changes and its zone, at least the current span."""
+        start, end, tz = self._constant
+        if start <= ts < end:
+            return self._constant
+
+        span = ts >> _SPAN_BITS
+        start = (span - 1) << _SPAN_BITS
+        end = (span + 2) << _SPAN_BITS
+        tz = None
+        for neighbour in (span - 1, span, span + 1):
+            initial, transitions = self._span(neighbour)
+            if tz is None and neighbour == span - 1:
+                tz = initial
+            for transition_ts, transition_tz in transitions:
+                if transition_ts <= ts:
+                    start, tz = transition_ts, transition_tz
+                elif transition_ts < end:
+                    end = transition_ts
+        self._constant = start, end, tz
+        return self._constant
+
+    def current(self) -> timezone:
+        """The zone of the current time."""
+        now_ts = int(time.time())
+        start, end, tz = self._current
+        if not start <= now_ts < end:
+            start, end, tz = self._current = self.constant_range(now_ts)
+        return tz
+
+
+_local_zone = _LocalZone()
+
+
+def reset_local_tz() -> None:
+    """Forget the cached offsets of the local time zone, e.g. after `time.tzset()`."""
+    _local_zone.reset()
 
 
 def get_local_tz() -> tzinfo:
-    return datetime.now().astimezone().tzinfo
+    return _local_zone.current()
 
 
-def dt_to_ts(dt: datetime) -> int:
-    """Convert a given datetime into the timestamp in UTC TZ."""
+def _dt_to_ts(dt: datetime) -> int:
+    """`dt_to_ts` by `time.mktime`, the reference one."""
     if dt.tzinfo is None:
         # If dt is a naive (no tzinfo provided) then set up a local tz
         dt_without_tz = dt
@@ -21,9 +121,60 @@ def dt_to_ts(dt: datetime) -> int:
     return int(timestamp)
 
 
+def dt_to_ts(dt: datetime) -> int:
+    """Convert a given datetime into the timestamp in UTC TZ."""
+    if dt.tzinfo is None:
+        utc_dt = dt - get_local_tz().utcoffset(None)
+    else:
+        utc_dt = dt.replace(tzinfo=None) - dt.utcoffset()
+    # `mktime` of the UTC wall time, i.e. minus the local offset at that wall time
+    wall_ts = (utc_dt.replace(microsecond=0) - _EPOCH) // _SECOND
+    start, end, tz = _local_zone.constant_range(wall_ts)
+    if start + _TRANSITION_MARGIN <= wall_ts < end - _TRANSITION_MARGIN:
+        return wall_ts - tz.utcoffset(None) // _SECOND
+    return _dt_to_ts(dt)
+
+
+def _ts_to_dt(ts: int) -> datetime:
+    """`ts_to_dt` by `time.localtime`, the reference one."""
+    return datetime.fromtimestamp(ts).replace(tzinfo=timezone.utc).astimezone()
+
+
 def ts_to_dt(ts: int) -> datetime:
     """Convert UTC ts to local dt."""
-    return datetime.fromtimestamp(ts).replace(tzinfo=timezone.utc).astimezone()
+    if ts.__class__ is int:
+        start, end, tz = _local_zone.constant_range(ts)
+        if start + _TRANSITION_MARGIN <= ts < end - _TRANSITION_MARGIN:
+            # The local wall time of ts taken as UTC, in the local zone
+            return datetime.fromtimestamp(ts + tz.utcoffset(None) // _SECOND, tz)
+    return _ts_to_dt(ts)
+
+
+def ts_to_dt_many(timestamps: Iterable[int | None]) -> list[datetime | None]:
+    """`ts_to_dt` of the timestamps (None is kept), e.g. of a column of rows or of an array."""
+    if hasattr(timestamps, 'tolist'):  # NumPy arrays
+        timestamps = timestamps.tolist()
+    start = end = offset = 0
+    tz = None
+    result = []
+    append = result.append
+    for ts in timestamps:
+        if ts is None:
+            append(None)
+        elif ts.__class__ is int and start <= ts < end:
+            append(datetime.fromtimestamp(ts + offset, tz))
+        else:
+            append(ts_to_dt(ts))
+            if ts.__class__ is int:
+                start, end, tz = _local_zone.constant_range(ts)
+                start, end = start + _TRANSITION_MARGIN, end - _TRANSITION_MARGIN
+                offset = tz.utcoffset(None) // _SECOND
+    return result
+
+
+def dt_to_ts_many(datetimes: Iterable[datetime | None]) -> list[int | None]:
+    """`dt_to_ts` of the datetimes (None is kept)."""
+    return [None if dt is None else dt_to_ts(dt) for dt in datetimes]
 
 
 def get_now_timestamp() -> int:
@@ -33,3 +184,80 @@ def get_now_timestamp() -> int:
     timestamp = time.mktime(utc_dt.timetuple())
     # TODO: utctimetuple ?
     return int(timestamp)
+
+
+def get_day_start_timestamp(ts: int) -> int:
+    """Return the timestamp of the start (local midnight) of the local day the given timestamp belongs to."""
+    local_dt = ts_to_dt(ts)
+    # naive `astimezone` resolves the UTC offset (DST) of the day start itself
+    day_start = datetime(local_dt.year, local_dt.month, local_dt.day).astimezone()
+    return dt_to_ts(day_start)
+
+
+def get_next_day_start_timestamp(day_start_ts: int) -> int:
+    """Return the timestamp of the start of the local day following the day started at the given timestamp."""
+    local_dt = ts_to_dt(day_start_ts) + timedelta(days=1)
+    next_day_start = datetime(local_dt.year, local_dt.month, local_dt.day).astimezone()
+    return dt_to_ts(next_day_start)
+
+
+def get_month_start_timestamp(ts: int) -> int:
+    """Return the timestamp of the start of the local month the given timestamp belongs to."""
+    local_dt = ts_to_dt(ts)
+    return dt_to_ts(datetime(local_dt.year, local_dt.month, 1).astimezone())
+
+
+def split_by_days(start_ts: int, end_ts: int) -> Iterator[tuple[int, int]]:
+    """Split the range into (day start timestamp, seconds within the day) parts by local days."""
+    day_start_ts = get_day_start_timestamp(start_ts)
+    while day_start_ts < end_ts:
+        next_day_start_ts = get_next_day_start_timestamp(day_start_ts)
+        yield day_start_ts, min(end_ts, next_day_start_ts) - max(start_ts, day_start_ts)
+        day_start_ts = next_day_start_ts
+
+
+REPORT_BUCKETS = ('day', 'week', 'month')
+
+
+def _bucket_start_timestamp(day: date, tz: tzinfo | None) -> int:
+    """The timestamp of the midnight starting the day in the time zone (the local one if None)."""
+    if tz is None:
+        return dt_to_ts(datetime(day.year, day.month, day.day).astimezone())
+    return dt_to_ts(datetime(day.year, day.month, day.day, tzinfo=tz))
+
+
+def _next_bucket_day(day: date, bucket: str) -> date:
+    if bucket == 'day':
+        return day + timedelta(days=1)
+    if bucket == 'week':
+        return day + timedelta(days=7)
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def get_bucket_boundaries(start_ts: int, end_ts: int, bucket: str, tz: tzinfo | None = None) -> list[int]:
+    """
+    Split the range by the days, weeks (from Monday) or months of the time zone: the range
+    start, the starts of the buckets within the range and the range end. The boundaries follow
+    the UTC offset changes of the time zone, e.g. the DST days are 23 or 25 hours long.
+    """
+    if bucket not in REPORT_BUCKETS:
+        raise ValueError(f'Unknown bucket: {bucket}')
+    if start_ts >= end_ts:
+        return []
+
+    day = ts_to_dt(start_ts).astimezone(tz).date()
+    if bucket == 'week':
+        day -= timedelta(days=day.weekday())
+    elif bucket == 'month':
+        day = day.replace(day=1)
+
+    boundaries = [start_ts]
+    while True:
+        day = _next_bucket_day(day, bucket)
+        bucket_start_ts = _bucket_start_timestamp(day, tz)
+        if bucket_start_ts >= end_ts:
+            break
+        if bucket_start_ts > start_ts:
+            boundaries.append(bucket_start_ts)
+    boundaries.append(end_ts)
+    return boundaries
@@ -0,0 +1,118 @@
+"""
+Live work events for the Server-Sent Events stream.
+
+The services record the work item events in the session, they are published to the
+hub after the commit. A single producer task of the hub turns them (and a periodic
+tick, the current work item time grows) into the SSE messages with the today total,
+calculated once for all the subscribers.
+"""
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import get_events_tick
+
+logger = logging.getLogger(__name__)
+
+_PENDING_EVENTS_KEY = 'work_events'
+
+# SSE comment lines keeping the idle connections open, seconds
+KEEPALIVE_INTERVAL = 15
+
+
+def sse_message(event_type: str, data: dict) -> str:
+    return f'event: {event_type}\ndata: {json.dumps(data)}\n\n'
+
+
+class EventHub:
+    def __init__(self, tick: float):
+        self.tick = tick
+        self._subscribers: set[asyncio.Queue] = set()
+        self._events: asyncio.Queue | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._producer: asyncio.Task | None = None
+
+    @property
+    def subscribers_count(self) -> int:
+        return len(self._subscribers)
+
+    def start(self, get_today_total: Callable[[], Awaitable[int]]) -> None:
+        """Start the producer on the running loop."""
+        self._loop = asyncio.get_running_loop()
+        self._events = asyncio.Queue()
+        self._producer = asyncio.create_task(self._produce(get_today_total))
+
+    async def stop(self) -> None:
+        if self._producer is not None:
+            self._producer.cancel()
+            try:
+                await self._producer
+            except asyncio.CancelledError:
+                pass
+        self._producer = self._loop = self._events = None
+
+    def publish(self, event_type: str, data: dict) -> None:
+        """Thread safe: called after the commits in the threadpool too."""
+        loop = self._loop
+        if loop is None or not self._subscribers:
+            return
+        loop.call_soon_threadsafe(self._events.put_nowait, (event_type, data))
+
+    async def _produce(self, get_today_total: Callable[[], Awaitable[int]]) -> None:
+        while True:
+            messages = []
+            try:
+                event_type, data = await asyncio.wait_for(self._events.get(), self.tick)
+                messages.append(sse_message(event_type, data))
+                while not self._events.empty():  # a batch of the events, the total once
+                    messages.append(sse_message(*self._events.get_nowait()))
+            except asyncio.TimeoutError:
+                pass
+
+            if not self._subscribers:
+                continue
+            try:
+                messages.append(sse_message('today', {'time': await get_today_total()}))
+            except Exception:
+                logger.exception('Cannot calculate the today total')
+            for queue in self._subscribers:
+                for message in messages:
+                    queue.put_nowait(message)
+
+    async def stream(self, initial_messages: list[str]) -> AsyncIterator[str]:
+        """The SSE messages for a subscriber: the initial ones, then the produced ones."""
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        try:
+            for message in initial_messages:
+                yield message
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+        finally:
+            self._subscribers.discard(queue)
+
+
+event_hub = EventHub(get_events_tick())
+
+
+def work_event_record(db_session: Session, event_type: str, **data) -> None:
+    """Record the work event to be published after the commit."""
+    db_session.info.setdefault(_PENDING_EVENTS_KEY, []).append((event_type, data))
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_on_commit(db_session: Session) -> None:
+    for event_type, data in db_session.info.pop(_PENDING_EVENTS_KEY, []):
+        event_hub.publish(event_type, data)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_on_rollback(db_session: Session, previous_transaction) -> None:
+    db_session.info.pop(_PENDING_EVENTS_KEY, None)
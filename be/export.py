@@ -0,0 +1,59 @@
+"""Serialization of the exported work items: NDJSON or CSV chunks, a chunk per rows partition."""
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator, Sequence
+
+from sqlalchemy import Row
+
+from dt import ts_to_dt_many
+
+EXPORT_FIELDS = ('id', 'task_id', 'task_name', 'start_dt', 'end_dt')
+
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _export_values(rows: Sequence[Row]) -> list[tuple]:
+    """The exported values of the partition rows, the dates converted by a batch."""
+    start_dts = ts_to_dt_many([row.start_timestamp for row in rows])
+    end_dts = ts_to_dt_many([row.end_timestamp for row in rows])
+    return [
+        (
+            row.id,
+            row.task_id,
+            row.task_name,
+            start_dt.isoformat(),
+            end_dt and end_dt.isoformat(),
+        )
+        for row, start_dt, end_dt in zip(rows, start_dts, end_dts)
+    ]
+
+
+def export_ndjson(partitions: Iterable[Sequence[Row]]) -> Iterator[str]:
+    for rows in partitions:
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_FIELDS, values)), ensure_ascii=False) + '\n'
+            for values in _export_values(rows)
+        )
+
+
+def export_csv(partitions: Iterable[Sequence[Row]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for rows in partitions:
+        writer.writerows(_export_values(rows))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # the header of the empty export
+        yield buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    'ndjson': export_ndjson,
+    'csv': export_csv,
+}
@@ -1,35 +1,72 @@
 #!/usr/bin/env python3
 import logging
+import shlex
+import sys
 from argparse import ArgumentParser
+from collections.abc import Iterable
+from itertools import groupby
 from datetime import datetime
+from typing import TextIO
+
+from sqlalchemy.orm import Session
 
 import services
-from database import get_db, init_db
+import sql_stats
+from database import init_db, read_session, transaction_session
+from dt import dt_to_ts
+from export import EXPORT_FORMATS
+from snapshot import snapshot_write
 
 HOURS_IN_WORKING_DAY = 8
 
+# The commands of the batch lines by their names and the options of the single command
+BATCH_COMMANDS = {
+    'category': 'category', '-c': 'category', '--category': 'category',
+    'task': 'task', '-t': 'task', '--task': 'task',
+    'work': 'work', '-w': 'work', '--work': 'work',
+}
+
+# The actions only reading the DB: the single commands of them do not take the write lock
+READ_ONLY_ACTIONS = {'show', 'export', 'report', 'snapshot'}
 
-def category_print_all() -> None:
+
+def category_print_all(db_session: Session) -> None:
     """Deprecated. TODO: remove"""
-    rows = services.category_list(get_db())
+    rows = services.category_list(db_session)
     for row in rows:
         print(row)
 
 
-def task_print_all() -> None:
-    rows = services.task_list(get_db())
+def task_print_all(db_session: Session) -> None:
+    rows = services.task_list(db_session)
     for row in rows:
         print(row)
 
 
-def work_print_all():
-    rows = services.work_item_list(get_db())
-    for row in rows:
-        print(row)
+def work_print_all(db_session: Session):
+    for rows in services.work_item_export(db_session, None, None):
+        for row in rows:
+            print(row)
+
+
+def work_export(
+    db_session: Session,
+    export_format: str,
+    start_dt: datetime | None,
+    end_dt: datetime | None,
+    task_ids: list[int] | None = None,
+) -> None:
+    """Stream the work items (of the tasks, if given) to stdout by the session transaction."""
+    if export_format not in EXPORT_FORMATS:
+        raise Exception(f'Unknown export format: {export_format}')
 
+    partitions = services.work_item_export(db_session, start_dt, end_dt, task_ids)
+    for chunk in EXPORT_FORMATS[export_format](partitions):
+        sys.stdout.write(chunk)
 
-def _work_print_report_category(start_dt: datetime, end_dt: datetime) -> None:
-    res = services.work_get_report_category(get_db(), start_dt, end_dt)
+
+def _work_print_report_category(db_session: Session, start_dt: datetime, end_dt: datetime) -> None:
+    res = services.work_get_report_category(db_session, start_dt, end_dt)
 
     for i, row in enumerate(res):
         category_id, category_name, time_days = row
@@ -44,57 +81,91 @@ def _init_db(mgrt):
     init_db()
 
 
-def _category(category):
+def _category(db_session: Session, category):
     action, *cmd_args = category
     if action == 'add':
         name, description = cmd_args
-        services.category_create(get_db(), name, description)
+        return services.category_create(db_session, name, description)
     elif action == 'remove':
         _id = cmd_args[0]
-        services.category_delete(get_db(), _id)
+        services.category_delete(db_session, _id)
     elif action == 'update':
         _id, new_name, new_description = cmd_args
-        services.category_update(get_db(), _id, new_name, new_description)
+        return services.category_update(db_session, _id, new_name, new_description)
     elif action == 'show':
-        category_print_all()
+        category_print_all(db_session)
     else:
         raise Exception(f'Unknown action for category command: {action}')
 
 
-def _task(task):
+def _task(db_session: Session, task):
     action, *cmd_args = task
     if action == 'add':
         name, category_id = cmd_args
-        services.task_create(get_db(), name, category_id)
+        return services.task_create(db_session, name, category_id)
     elif action == 'remove':
         _id = cmd_args[0]
-        services.task_delete(get_db(), _id)
+        services.task_delete(db_session, _id)
     elif action == 'update':
-        _id, new_id, new_category_id = cmd_args
-        services.task_update(get_db(), _id, new_id, new_category_id)
+        _id, new_name, new_category_id = cmd_args
+        task = services.task_read(db_session, _id)
+        if task is None:
+            raise Exception(f'Task not found: {_id}')
+        return services.task_update(db_session, _id, new_name, new_category_id, task.is_archived)
     elif action == 'show':
-        task_print_all()
+        task_print_all(db_session)
     else:
         raise Exception(f'Unknown action for task command: {action}')
 
 
-def _work(work):
+def _work_add_args(cmd_args: list[str]) -> tuple[datetime, datetime, int]:
+    start, end, task_id = cmd_args
+    start_dt = datetime.strptime(start, '%Y-%m-%dT%H:%M:%S')
+    end_dt = datetime.strptime(end, '%Y-%m-%dT%H:%M:%S')
+    return start_dt, end_dt, int(task_id)
+
+
+def _work_add_many(db_session: Session, work_items: list[tuple[datetime, datetime, int]]) -> list:
+    """The `work add` commands by a single bulk insert, returns the work items in the commands order."""
+    created = {
+        work_item.start_timestamp: work_item
+        for work_item in services.work_item_create_bulk(db_session, work_items)
+    }
+    return [created[dt_to_ts(start_dt)] for start_dt, _, _ in work_items]
+
+
+def _work(db_session: Session, work):
     action, *cmd_args = work
     if action == 'start':
         task_id = cmd_args[0]
-        services.work_item_start(get_db(), task_id, None)
+        return services.work_item_start(db_session, task_id, None)
     elif action == 'stop':
-        services.work_item_stop_current(get_db())
+        services.work_item_stop_current(db_session)
     elif action == 'add':
-        start, end, task_id = cmd_args
-        start_dt = datetime.strptime(start, '%Y-%m-%dT%H:%M:%S')
-        end_dt = datetime.strptime(end, '%Y-%m-%dT%H:%M:%S')
-        services.work_item_create(get_db(), start_dt, end_dt, int(task_id))
+        start_dt, end_dt, task_id = _work_add_args(cmd_args)
+        return services.work_item_create(db_session, start_dt, end_dt, task_id)
     elif action == 'remove':
         id_ = cmd_args[0]
-        services.work_item_delete(get_db(), int(id_))
+        services.work_item_delete(db_session, int(id_))
     elif action == 'show':
-        work_print_all()
+        work_print_all(db_session)
+    elif action == 'export':
+        export_format, *cmd_args = cmd_args or ['ndjson']
+        start_dt = end_dt = None
+        if cmd_args and not cmd_args[0].isdigit():
+            start, end, *cmd_args = cmd_args
+            start_dt = datetime.strptime(start, '%Y-%m-%dT%H:%M:%S')
+            end_dt = datetime.strptime(end, '%Y-%m-%dT%H:%M:%S')
+        task_ids = [int(task_id) for task_id in cmd_args]
+        work_export(db_session, export_format, start_dt, end_dt, task_ids)
+    elif action == 'snapshot':
+        directory, *cmd_args = cmd_args
+        snapshot_format = cmd_args[0] if cmd_args else 'arrow'
+        paths = snapshot_write(db_session, directory, snapshot_format)
+        print(f'Snapshot months written: {len(paths)}')
+    elif action == 'rollup':
+        rows_count = services.work_rollup_rebuild(db_session)
+        print(f'Daily rollup rebuilt: {rows_count} rows')
     elif action == 'report':
         if len(cmd_args) < 3:
             print(f'Not enough arguments: {cmd_args}')
@@ -102,27 +173,132 @@ def _work(work):
         start_dt = datetime.strptime(start, '%Y-%m-%dT%H:%M:%S')
         end_dt = datetime.strptime(end, '%Y-%m-%dT%H:%M:%S')
         if report_type == 'category':
-            _work_print_report_category(start_dt, end_dt)
+            _work_print_report_category(db_session, start_dt, end_dt)
         else:
             raise Exception(f'Unknown report type for work command and action report: {report_type}')
     else:
         raise Exception(f'Unknown action for work command: {action}')
 
 
+COMMANDS = {
+    'category': _category,
+    'task': _task,
+    'work': _work,
+}
+
+
+def _batch_result(line_numbers: str, result) -> str:
+    result_id = getattr(result, 'id', None)
+    return f'{line_numbers}: ok' + ('' if result_id is None else f' id={result_id}') + '\n'
+
+
+def batch_run(db_session: Session, lines: Iterable[str], results: TextIO) -> int:
+    """
+    Run the commands of the lines (`<category|task|work> <action> [<arg> ...]`, the shell
+    quoting, `#` comments) by the session and write a result line per command to results.
+    The consecutive `work add` commands are inserted by a single bulk insert (validated as
+    a whole, the error is reported on the line of the invalid work item). Stops at the first
+    failed command, returns the number of the commands run.
+    """
+    commands = []
+    for line_number, line in enumerate(lines, 1):
+        try:
+            command, *cmd_args = shlex.split(line, comments=True) or [None]
+            if command is not None and (command not in BATCH_COMMANDS or not cmd_args):
+                raise Exception(f'Unknown command: {line.strip()}')
+        except Exception as e:
+            results.write(f'{line_number}: error {e!r}\n')
+            raise
+        if command is not None:
+            commands.append((line_number, BATCH_COMMANDS[command], cmd_args))
+
+    def is_work_add(command: tuple[int, str, list[str]]) -> bool:
+        return command[1] == 'work' and command[2][0] == 'add'
+
+    for work_add, group in groupby(commands, key=is_work_add):
+        group = list(group)
+        if work_add and len(group) > 1:
+            work_items = []
+            for line_number, _, (_, *cmd_args) in group:
+                try:
+                    work_items.append(_work_add_args(cmd_args))
+                except Exception as e:
+                    results.write(f'{line_number}: error {e!r}\n')
+                    raise
+            try:
+                work_items = _work_add_many(db_session, work_items)
+            except Exception as e:
+                # The validation errors point to the invalid work item
+                index = e.index if isinstance(e, services.WorkItemDtRangeValidationError) else None
+                line_numbers = f'{group[0][0]}-{group[-1][0]}' if index is None else group[index][0]
+                results.write(f'{line_numbers}: error {e!r}\n')
+                raise
+            results.writelines(
+                _batch_result(line_number, work_item) for (line_number, _, _), work_item in zip(group, work_items)
+            )
+            continue
+
+        for line_number, command, cmd_args in group:
+            try:
+                result = COMMANDS[command](db_session, cmd_args)
+            except Exception as e:
+                results.write(f'{line_number}: error {e!r}\n')
+                raise
+            results.write(_batch_result(line_number, result))
+    return len(commands)
+
+
+def _batch(batch: str) -> None:
+    """Run the batch file (`-` is stdin) by a single transaction, rolled back if any command fails."""
+    lines = sys.stdin if batch == '-' else open(batch, encoding='utf-8')
+    with lines:
+        try:
+            with transaction_session() as db_session:
+                commands_count = batch_run(db_session, lines, sys.stderr)
+        except Exception:
+            print('Batch failed, rolled back', file=sys.stderr)
+            sys.exit(1)
+    print(f'Batch committed: {commands_count} commands', file=sys.stderr)
+
+
+def sql_stats_print() -> None:
+    for row in sql_stats.get_stats():
+        print(
+            f'{row["count"]:>6} {row["total_time"] * 1000:>10.2f}ms {row["max_time"] * 1000:>10.2f}ms'
+            f' {row["statement"]}'
+        )
+
+
+def _command_session(command: list[str]):
+    """The session of the single command: a read one for the read-only actions."""
+    return read_session() if command[0] in READ_ONLY_ACTIONS else transaction_session()
+
+
 def work(args):
     logging.info(args)
 
     if args.init is not None:
         _init_db(args.init)
+    elif args.batch is not None:
+        if any([args.category is not None, args.task is not None, args.work is not None]):
+            raise Exception('--batch is not compatible with --category, --task and --work')
+
+        _batch(args.batch)
     elif args.category is not None:
         if any([args.task is not None, args.work is not None]):
             raise Exception('--category is not compatible with --task and/or --work')
 
-        _category(args.category)
+        with _command_session(args.category) as db_session:
+            _category(db_session, args.category)
     elif args.task is not None:
-        _task(args.task)
+        with _command_session(args.task) as db_session:
+            _task(db_session, args.task)
     elif args.work is not None:
-        _work(args.work)
+        with _command_session(args.work) as db_session:
+            _work(db_session, args.work)
+
+    if args.sql_stats:
+        sql_stats_print()
 
 
 def main():
@@ -161,12 +337,28 @@ def main():
         <id>
     (report):
         <start:yyyy-mm-ddThh:mm:ss> <end:yyyy-mm-ddThh:mm:ss> <report_type:category|?>
+    (export):
+        [<format:ndjson|csv>] [<start:yyyy-mm-ddThh:mm:ss> <end:yyyy-mm-ddThh:mm:ss>] [<task_id> ...], write to stdout
+    (snapshot):
+        <directory> [<format:arrow|parquet>], write the finished months missing in the directory or changed since
+    (rollup):
+        no args, rebuild the daily rollup used by the reports
     """
     parser.add_argument('-w', '--work', nargs='+', help=work_help)
 
+    batch_help = """
+    Run the commands of the file (- is stdin) by a single transaction, a command per line:
+    <category|task|work> <action> [<arg> ...] with the arguments of -c, -t, -w and the shell quoting.
+    A result line per command is written to stderr; the first failed command rolls back the whole batch
+    """
+    parser.add_argument('-b', '--batch', metavar='FILE|-', help=batch_help)
+
     init_help = """Initialize the DB schema"""
     parser.add_argument('-i', '--init', nargs='*', help=init_help)
 
+    sql_stats_help = """Print SQL statements stats (count, total and max time) after the command"""
+    parser.add_argument('--sql-stats', action='store_true', help=sql_stats_help)
+
     args = parser.parse_args()
 
     work(args)
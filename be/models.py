@@ -1,5 +1,5 @@
 import sqlalchemy.sql.elements
-from sqlalchemy import Text, ForeignKey, Boolean
+from sqlalchemy import Text, ForeignKey, Boolean, Index, DDL, event, table, column, CheckConstraint, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.sql import false
 
@@ -26,7 +26,7 @@ class Task(Base):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(Text(), nullable=False, unique=True)
     is_archived: Mapped[bool] = mapped_column(Boolean(), default=False, server_default=false())
-    category_id: Mapped[int] = mapped_column(ForeignKey('categories.id'))
+    category_id: Mapped[int] = mapped_column(ForeignKey('categories.id'), index=True)
     category: Mapped['Category'] = relationship(back_populates='tasks')
     work_items: Mapped[list['WorkItem']] = relationship(back_populates='task', cascade='all, delete-orphan')
 
@@ -38,11 +38,202 @@ class Task(Base):
     #     return self.work_items.fi
 
 
+WORK_ITEMS_CURRENT_INDEX = 'ux_work_items_current'
+WORK_ITEMS_START_BEFORE_END_CHECK = 'ck_work_items_start_before_end'
+
+
 class WorkItem(Base):
     __tablename__ = 'work_items'
+    __table_args__ = (
+        # Covers the reporting range filters and the overlap validation
+        Index('ix_work_items_start_end_task', 'start_timestamp', 'end_timestamp', 'task_id'),
+        # Serves `end_timestamp IS NULL` (the current work item) and `end_timestamp > ?` lookups
+        Index('ix_work_items_end_start_task', 'end_timestamp', 'start_timestamp', 'task_id'),
+        # Only one current (not finished) work item is allowed
+        Index(
+            WORK_ITEMS_CURRENT_INDEX,
+            text('(end_timestamp IS NULL)'),
+            unique=True,
+            sqlite_where=text('end_timestamp IS NULL'),
+        ),
+        CheckConstraint(
+            'end_timestamp IS NULL OR start_timestamp < end_timestamp',
+            name=WORK_ITEMS_START_BEFORE_END_CHECK,
+        ),
+        Base.__table_args__,
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    task_id: Mapped[int] = mapped_column(ForeignKey('tasks.id'))
+    task_id: Mapped[int] = mapped_column(ForeignKey('tasks.id'), index=True)
     task: Mapped['Task'] = relationship(back_populates='work_items')
     start_timestamp: Mapped[int]
     end_timestamp: Mapped[int | None] = mapped_column(nullable=True, server_default=sqlalchemy.sql.elements.TextClause('NULL'))
+
+
+# R*Tree index of the work items time ranges, kept in sync by triggers.
+# The current work item has the "infinite" end. Note: R*Tree coordinates are
+# 32-bit floats rounded outwards, so lookups return a superset of the matches
+# and have to be rechecked against the `work_items` columns. An inverted range
+# (the end before the start) is stored as the box of its both points.
+WORK_ITEMS_RTREE_OPEN_END = 10 ** 18
+work_items_rtree = table(
+    'work_items_rtree',
+    column('id'),
+    column('start_ts'),
+    column('end_ts'),
+)
+WORK_ITEMS_RTREE_DDL = (
+    'CREATE VIRTUAL TABLE work_items_rtree USING rtree(id, start_ts, end_ts)',
+    f"""
+    CREATE TRIGGER work_items_rtree_insert AFTER INSERT ON work_items BEGIN
+        INSERT INTO work_items_rtree (id, start_ts, end_ts) VALUES (
+            new.id,
+            MIN(new.start_timestamp, COALESCE(new.end_timestamp, {WORK_ITEMS_RTREE_OPEN_END})),
+            MAX(new.start_timestamp, COALESCE(new.end_timestamp, {WORK_ITEMS_RTREE_OPEN_END}))
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER work_items_rtree_update AFTER UPDATE OF start_timestamp, end_timestamp ON work_items BEGIN
+        UPDATE work_items_rtree SET
+            start_ts = MIN(new.start_timestamp, COALESCE(new.end_timestamp, {WORK_ITEMS_RTREE_OPEN_END})),
+            end_ts = MAX(new.start_timestamp, COALESCE(new.end_timestamp, {WORK_ITEMS_RTREE_OPEN_END}))
+        WHERE id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER work_items_rtree_delete AFTER DELETE ON work_items BEGIN
+        DELETE FROM work_items_rtree WHERE id = old.id;
+    END
+    """,
+)
+for statement in WORK_ITEMS_RTREE_DDL:
+    event.listen(WorkItem.__table__, 'after_create', DDL(statement))
+
+
+class TableRowCount(Base):
+    """Row counts of the tables kept by triggers: the totals of the lists without `COUNT(*)` scans."""
+    __tablename__ = 'table_row_counts'
+    __table_args__ = {}
+
+    table_name: Mapped[str] = mapped_column(Text, primary_key=True)
+    row_count: Mapped[int]
+
+
+WORK_ITEMS_ROW_COUNT_DDL = (
+    """
+    CREATE TRIGGER work_items_row_count_insert AFTER INSERT ON work_items BEGIN
+        INSERT INTO table_row_counts (table_name, row_count) VALUES ('work_items', 1)
+        ON CONFLICT (table_name) DO UPDATE SET row_count = row_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER work_items_row_count_delete AFTER DELETE ON work_items BEGIN
+        UPDATE table_row_counts SET row_count = row_count - 1 WHERE table_name = 'work_items';
+    END
+    """,
+)
+for statement in WORK_ITEMS_ROW_COUNT_DDL:
+    event.listen(WorkItem.__table__, 'after_create', DDL(statement))
+
+
+class ActiveWork(Base):
+    """
+    The current (not finished) work item and its task, the single row (if any) kept by
+    triggers on `work_items`: `is_current` of the tasks is a lookup instead of a join of the work items.
+    """
+    __tablename__ = 'active_work'
+    __table_args__ = {}
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    work_item_id: Mapped[int] = mapped_column(ForeignKey('work_items.id'))
+    task_id: Mapped[int] = mapped_column(ForeignKey('tasks.id'))
+
+
+ACTIVE_WORK_ID = 1
+ACTIVE_WORK_DDL = (
+    f"""
+    CREATE TRIGGER work_items_active_work_insert AFTER INSERT ON work_items
+    WHEN new.end_timestamp IS NULL BEGIN
+        INSERT INTO active_work (id, work_item_id, task_id) VALUES ({ACTIVE_WORK_ID}, new.id, new.task_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER work_items_active_work_update AFTER UPDATE OF task_id, end_timestamp ON work_items BEGIN
+        DELETE FROM active_work WHERE work_item_id = old.id;
+        INSERT INTO active_work (id, work_item_id, task_id)
+        SELECT {ACTIVE_WORK_ID}, new.id, new.task_id WHERE new.end_timestamp IS NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER work_items_active_work_delete AFTER DELETE ON work_items
+    WHEN old.end_timestamp IS NULL BEGIN
+        DELETE FROM active_work WHERE work_item_id = old.id;
+    END
+    """,
+)
+for statement in ACTIVE_WORK_DDL:
+    event.listen(ActiveWork.__table__, 'after_create', DDL(statement))
+
+
+class DataVersion(Base):
+    """
+    The single row version of the data: incremented by triggers on every change of
+    the categories, tasks and work items. Used to answer conditional GETs (ETag).
+    """
+    __tablename__ = 'data_version'
+    __table_args__ = {}
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int]
+
+
+DATA_VERSION_ID = 1
+DATA_VERSION_TABLES = ('categories', 'tasks', 'work_items')
+event.listen(
+    DataVersion.__table__,
+    'after_create',
+    DDL(f'INSERT INTO data_version (id, version) VALUES ({DATA_VERSION_ID}, 0)'),
+)
+for table_name in DATA_VERSION_TABLES:
+    for operation in ('INSERT', 'UPDATE', 'DELETE'):
+        event.listen(Base.metadata.tables[table_name], 'after_create', DDL(f"""
+        CREATE TRIGGER {table_name}_data_version_{operation.lower()} AFTER {operation} ON {table_name} BEGIN
+            UPDATE data_version SET version = version + 1 WHERE id = {DATA_VERSION_ID};
+        END
+        """))
+
+
+class WorkItemChange(Base):
+    """
+    The log of the changed (inserted, updated, deleted) work item ids kept by triggers:
+    the in-memory copies of the work items (see `report_engine`) re-read the changed rows only.
+    Only the last `WORK_ITEM_CHANGES_KEPT` changes are kept.
+    """
+    __tablename__ = 'work_item_changes'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    work_item_id: Mapped[int]
+
+
+WORK_ITEM_CHANGES_KEPT = 10000
+for operation, row in (('INSERT', 'new'), ('UPDATE', 'new'), ('DELETE', 'old')):
+    event.listen(WorkItem.__table__, 'after_create', DDL(f"""
+    CREATE TRIGGER work_items_changes_{operation.lower()} AFTER {operation} ON work_items BEGIN
+        INSERT INTO work_item_changes (work_item_id) VALUES ({row}.id);
+        DELETE FROM work_item_changes WHERE id <= last_insert_rowid() - {WORK_ITEM_CHANGES_KEPT};
+    END
+    """))
+
+
+class WorkDailyRollup(Base):
+    """Work seconds of the finished work items per local day and task."""
+    __tablename__ = 'work_daily_rollup'
+    __table_args__ = {}  # no AUTOINCREMENT for the composite primary key
+
+    day: Mapped[int] = mapped_column(primary_key=True)  # timestamp of the local day start
+    task_id: Mapped[int] = mapped_column(ForeignKey('tasks.id'), primary_key=True)
+    work_seconds: Mapped[int]
+
+    def __repr__(self):
+        return f'WorkDailyRollup(day={self.day!r}, task_id={self.task_id!r}, work_seconds={self.work_seconds!r})'
@@ -0,0 +1,98 @@
+"""
+The in-process LRU cache of the serialized report bodies by (report type, start_ts, end_ts).
+
+The cache is keyed by the data version (see `services.work_report_data_version`): every
+write of the categories, tasks and work items, of this process or another one (e.g. the
+CLI), moves it, and the entries of another version are misses. The reports including the
+current work item depend on now: they are keyed by the time they are calculated for too,
+i.e. are stable once the range is over.
+
+The today total of the finished work items is cached the same way by `day_total_cache`.
+"""
+import gzip
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from config import get_report_cache_size
+
+# Bodies of at least this size are stored gzipped too
+GZIP_MIN_SIZE = 1024
+
+
+class ReportCacheEntry:
+    def __init__(self, body: bytes, version: Hashable = None):
+        self.body = body
+        self.version = version  # the data version the report is calculated at
+        self.gzip_body = gzip.compress(body) if len(body) >= GZIP_MIN_SIZE else None
+
+
+class ReportCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[str, int, int], ReportCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, int, int], version: Hashable = None) -> ReportCacheEntry | None:
+        """The entry calculated at the data version, the entries of another version are misses."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple[str, int, int], entry: ReportCacheEntry) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+report_cache = ReportCache(get_report_cache_size())
+
+
+class DayTotalCache:
+    """
+    Work seconds of the finished work items of a single (the latest requested) local day,
+    with the data version they are read at (checked by the reader).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day_start_ts: int | None = None
+        self._version = 0
+        self._work_seconds = 0
+
+    def get(self, day_start_ts: int) -> tuple[int, int] | None:
+        """The data version and the work seconds of the day."""
+        with self._lock:
+            if self._day_start_ts != day_start_ts:
+                return None
+            return self._version, self._work_seconds
+
+    def put(self, day_start_ts: int, version: int, work_seconds: int) -> None:
+        with self._lock:
+            self._day_start_ts = day_start_ts
+            self._version = version
+            self._work_seconds = work_seconds
+
+    def clear(self) -> None:
+        with self._lock:
+            self._day_start_ts = None
+
+
+day_total_cache = DayTotalCache()
@@ -0,0 +1,191 @@
+"""
+The in-memory report engine: the work items as NumPy arrays, the reports by the vectorized
+clipping of the ranges and `np.bincount` by tasks (categories), without querying the work items.
+
+Selected by `TIMESHEET_REPORT_ENGINE=numpy`, the SQL reports of `services` are the reference.
+Before every report the data version is checked by a single row lookup; on a change the work
+items logged in `work_item_changes` since the last refresh are re-read (everything if the log
+has been trimmed), the tasks and categories are re-read completely.
+"""
+import threading
+from typing import NamedTuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from config import get_report_engine
+from models import Category, DataVersion, Task, WorkItem, WorkItemChange, DATA_VERSION_ID
+
+try:
+    import numpy as np
+except ImportError:  # optional
+    np = None
+
+# `end` of the current (not finished) work item
+CURRENT_END = -1
+
+
+class ReportCategoryRow(NamedTuple):
+    category_id: int
+    category_name: str
+    work_seconds: int
+
+
+class ReportTaskRow(NamedTuple):
+    task_id: int
+    task_name: str
+    category_id: int
+    category_name: str
+    work_seconds: int
+
+
+class ReportTotalRow(NamedTuple):
+    work_seconds: int
+
+
+class _State(NamedTuple):
+    version: int
+    change_id: int  # the last applied `work_item_changes.id`
+    ids: 'np.ndarray'
+    start: 'np.ndarray'
+    end: 'np.ndarray'
+    task_id: 'np.ndarray'
+    task_category_id: 'np.ndarray'  # by task id
+    tasks: dict[int, tuple[str, int, str]]  # task name, category id, category name by task id
+
+
+def _work_items_arrays(rows) -> tuple['np.ndarray', 'np.ndarray', 'np.ndarray', 'np.ndarray']:
+    """ids, start, end, task_id of the (id, start_timestamp, end_timestamp, task_id) rows."""
+    data = np.array(rows, dtype=np.int64).reshape(-1, 4)
+    return data[:, 0].copy(), data[:, 1].copy(), data[:, 2].copy(), data[:, 3].copy()
+
+
+class NumpyReportEngine:
+    def __init__(self):
+        if np is None:
+            raise RuntimeError('The numpy report engine requires NumPy')
+        self._state: _State | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self, db_session: Session) -> _State:
+        """The state of the data version of the session transaction."""
+        version, change_id = db_session.execute(
+            select(
+                DataVersion.version,
+                select(func.coalesce(func.max(WorkItemChange.id), 0)).scalar_subquery(),
+            ).where(DataVersion.id == DATA_VERSION_ID)
+        ).one()
+
+        state = self._state
+        if state is not None and state.version == version:
+            return state
+
+        with self._lock:
+            state = self._state
+            if state is None or state.version != version:
+                state = self._load(db_session, state, version, change_id)
+                self._state = state
+            return state
+
+    def clear(self) -> None:
+        with self._lock:
+            self._state = None
+
+    def _load(self, db_session: Session, state: _State | None, version: int, change_id: int) -> _State:
+        work_items = select(
+            WorkItem.id,
+            WorkItem.start_timestamp,
+            func.coalesce(WorkItem.end_timestamp, CURRENT_END),
+            WorkItem.task_id,
+        )
+        first_change_id = db_session.scalar(select(func.min(WorkItemChange.id)))
+        is_incremental = (
+            state is not None
+            and change_id >= state.change_id
+            and (change_id == state.change_id or first_change_id is not None and first_change_id <= state.change_id + 1)
+        )
+
+        if is_incremental:
+            changed_ids = np.array(db_session.scalars(
+                select(WorkItemChange.work_item_id).distinct().where(WorkItemChange.id > state.change_id)
+            ).all(), dtype=np.int64)
+            changed = _work_items_arrays(
+                db_session.execute(work_items.where(WorkItem.id.in_(changed_ids.tolist()))).all()
+            )
+            kept = ~np.isin(state.ids, changed_ids)
+            ids, start, end, task_id = (
+                np.concatenate([column[kept], changed_column])
+                for column, changed_column in zip((state.ids, state.start, state.end, state.task_id), changed)
+            )
+        else:
+            ids, start, end, task_id = _work_items_arrays(db_session.execute(work_items).all())
+
+        tasks = {
+            row.id: (row.name, row.category_id, row.category_name)
+            for row in db_session.execute(
+                select(Task.id, Task.name, Task.category_id, Category.name.label('category_name')).join(Task.category)
+            )
+        }
+        # Category 0 (none) for the tasks deleted without their work items, as the inner joins of the SQL reports
+        task_category_id = np.zeros(max(max(tasks, default=0), task_id.max(initial=0)) + 1, dtype=np.int64)
+        for id_, (_, category_id, _) in tasks.items():
+            task_category_id[id_] = category_id
+
+        return _State(version, change_id, ids, start, end, task_id, task_category_id, tasks)
+
+    @staticmethod
+    def _work_seconds(state: _State, start_ts: int, end_ts: int, now_ts: int) -> tuple['np.ndarray', 'np.ndarray']:
+        """The task ids and the work seconds within the range of the work items intersecting it."""
+        is_current = state.end == CURRENT_END
+        reported = (
+            ~is_current & (state.start < end_ts) & (state.end > start_ts)
+            # The current work item by the rule of the SQL reports: started within the range, or now is within it
+            | is_current & ((state.start >= start_ts) & (state.start < end_ts) | (start_ts < now_ts <= end_ts))
+        )
+        start = state.start[reported]
+        work_seconds = np.where(
+            is_current[reported],
+            min(now_ts, end_ts) - np.maximum(start, start_ts),
+            np.clip(state.end[reported], start_ts, end_ts) - np.clip(start, start_ts, end_ts),
+        )
+        return state.task_id[reported], work_seconds
+
+    def report_task(self, db_session: Session, start_ts: int, end_ts: int, now_ts: int) -> list[ReportTaskRow]:
+        """The rows of `services.work_get_report_task`."""
+        state = self.refresh(db_session)
+        task_id, work_seconds = self._work_seconds(state, start_ts, end_ts, now_ts)
+        minlength = len(state.task_category_id)
+        reported = np.bincount(task_id, minlength=minlength) > 0
+        seconds = np.bincount(task_id, weights=work_seconds, minlength=minlength)
+
+        rows = []
+        for id_ in np.flatnonzero(reported).tolist():
+            if id_ not in state.tasks:
+                continue
+            task_name, category_id, category_name = state.tasks[id_]
+            rows.append(ReportTaskRow(id_, task_name, category_id, category_name, int(seconds[id_])))
+        return rows
+
+    def report_category(self, db_session: Session, start_ts: int, end_ts: int, now_ts: int) -> list[ReportCategoryRow]:
+        """The rows of `services.work_get_report_category`."""
+        state = self.refresh(db_session)
+        task_id, work_seconds = self._work_seconds(state, start_ts, end_ts, now_ts)
+        category_id = state.task_category_id[task_id]
+        reported = np.bincount(category_id) > 0
+        seconds = np.bincount(category_id, weights=work_seconds)
+
+        category_names = {category_id: category_name for _, category_id, category_name in state.tasks.values()}
+        return [
+            ReportCategoryRow(id_, category_names[id_], int(seconds[id_]))
+            for id_ in np.flatnonzero(reported).tolist()
+            if id_ in category_names
+        ]
+
+    def report_total(self, db_session: Session, start_ts: int, end_ts: int, now_ts: int) -> list[ReportTotalRow]:
+        """The rows of `services.work_get_report_total`."""
+        state = self.refresh(db_session)
+        _, work_seconds = self._work_seconds(state, start_ts, end_ts, now_ts)
+        return [ReportTotalRow(int(work_seconds.sum()))]
+
+
+report_engine = NumpyReportEngine() if get_report_engine() == 'numpy' else None
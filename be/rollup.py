@@ -0,0 +1,118 @@
+"""
+The daily rollup of the finished work items: work seconds per local day and task.
+
+The rollup is maintained by the `WorkItem` mapper events, i.e. in the same
+transaction (flush) as the work item changes. The current (not finished) work
+item is not a part of the rollup.
+"""
+from collections import defaultdict
+from collections.abc import Iterable
+
+from sqlalchemy import Connection, bindparam, delete, event, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from dt import split_by_days
+from models import WorkDailyRollup, WorkItem
+
+
+def rollup_apply(
+    connection: Connection,
+    task_id: int,
+    start_ts: int,
+    end_ts: int | None,
+    sign: int = 1,
+) -> None:
+    """Add (sign=1) or subtract (sign=-1) the work item range to/from the rollup."""
+    rollup_apply_many(connection, [(task_id, start_ts, end_ts)], sign)
+
+
+def rollup_apply_many(
+    connection: Connection,
+    ranges: Iterable[tuple[int, int, int | None]],
+    sign: int = 1,
+) -> None:
+    """`rollup_apply` for (task_id, start_ts, end_ts) of many work items by a single executemany."""
+    totals = defaultdict(int)
+    for task_id, start_ts, end_ts in ranges:
+        if end_ts is None:
+            continue
+        for day, work_seconds in split_by_days(start_ts, end_ts):
+            totals[(day, task_id)] += work_seconds
+    if not totals:
+        return
+
+    stmt = insert(WorkDailyRollup)
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[WorkDailyRollup.day, WorkDailyRollup.task_id],
+            set_={'work_seconds': WorkDailyRollup.work_seconds + stmt.excluded.work_seconds},
+        ),
+        [
+            {'day': day, 'task_id': task_id, 'work_seconds': sign * work_seconds}
+            for (day, task_id), work_seconds in totals.items()
+        ],
+    )
+
+    if sign < 0:
+        # The emptied rows of the subtracted keys only, by the primary key
+        connection.execute(
+            delete(WorkDailyRollup).where(
+                WorkDailyRollup.day == bindparam('rollup_day'),
+                WorkDailyRollup.task_id == bindparam('rollup_task_id'),
+                WorkDailyRollup.work_seconds == 0,
+            ),
+            [{'rollup_day': day, 'rollup_task_id': task_id} for day, task_id in totals],
+        )
+
+
+def _read_work_item_range(connection: Connection, id_: int) -> tuple[int, int, int | None] | None:
+    return connection.execute(
+        select(WorkItem.task_id, WorkItem.start_timestamp, WorkItem.end_timestamp).where(WorkItem.id == id_)
+    ).one_or_none()
+
+
+@event.listens_for(WorkItem, 'after_insert')
+def _rollup_work_item_insert(mapper, connection: Connection, target: WorkItem) -> None:
+    rollup_apply(connection, target.task_id, target.start_timestamp, target.end_timestamp)
+
+
+@event.listens_for(WorkItem, 'before_update')
+def _rollup_work_item_update(mapper, connection: Connection, target: WorkItem) -> None:
+    # The stored row is the only reliable source of the old values (attributes may be expired)
+    old = _read_work_item_range(connection, target.id)
+    new = (target.task_id, target.start_timestamp, target.end_timestamp)
+    if old is None or tuple(old) == new:
+        return
+
+    rollup_apply(connection, *old, sign=-1)
+    rollup_apply(connection, *new)
+
+
+@event.listens_for(WorkItem, 'before_delete')
+def _rollup_work_item_delete(mapper, connection: Connection, target: WorkItem) -> None:
+    old = _read_work_item_range(connection, target.id)
+    if old is not None:
+        rollup_apply(connection, *old, sign=-1)
+
+
+def rollup_rebuild(db_session: Session) -> int:
+    """Recalculate the whole rollup from the work items, returns the number of the rollup rows."""
+    totals = defaultdict(int)
+    rows = db_session.execute(
+        select(WorkItem.task_id, WorkItem.start_timestamp, WorkItem.end_timestamp)
+        .where(WorkItem.end_timestamp.is_not(None))
+        .execution_options(yield_per=10000)
+    )
+    for task_id, start_ts, end_ts in rows:
+        for day, work_seconds in split_by_days(start_ts, end_ts):
+            totals[(day, task_id)] += work_seconds
+
+    db_session.execute(delete(WorkDailyRollup))
+    if totals:
+        db_session.execute(insert(WorkDailyRollup), [
+            {'day': day, 'task_id': task_id, 'work_seconds': work_seconds}
+            for (day, task_id), work_seconds in totals.items()
+            if work_seconds
+        ])
+    return len(totals)
@@ -2,6 +2,8 @@ from datetime import datetime
 from typing import Annotated
 
 from fastapi.params import Query
+from fastapi_pagination import Params
+from fastapi_pagination.bases import RawParams
 from pydantic import BaseModel
 
 
@@ -87,6 +89,20 @@ class WorkReportTotal(BaseModel):
     time: float
 
 
+class WorkReport(BaseModel):
+    by_category: list[WorkReportCategory]
+    by_task: list[WorkReportTask]
+    total: WorkReportTotal
+
+
+class WorkReportBucket(BaseModel):
+    start_dt: datetime
+    end_dt: datetime
+    total: WorkReportTotal
+    by_category: list[WorkReportCategory] | None
+    by_task: list[WorkReportTask] | None
+
+
 #
 # WorkItem
 #
@@ -104,6 +120,21 @@ class WorkItemOut(BaseModel):
     end_dt: datetime | None
 
 
+class WorkItemListParams(Params):
+    include_total: bool = Query(True, description='Include the total number of items (and pages)')
+
+    def to_raw_params(self) -> RawParams:
+        raw_params = super().to_raw_params()
+        raw_params.include_total = self.include_total
+        return raw_params
+
+
+class WorkItemCursorPage(BaseModel):
+    items: list[WorkItemOut]
+    size: int
+    next_cursor: str | None
+
+
 class WorkItemPartialUpdate(BaseModel):
     id: int | None = None
     task: TaskMinimal | None = None
@@ -111,6 +142,24 @@ class WorkItemPartialUpdate(BaseModel):
     end_dt: datetime | None = None
 
 
+class WorkToday(BaseModel):
+    total: WorkReportTotal
+    current: WorkItemOut | None
+
+
 class WorkStart(BaseModel):
     task_id: int
     start: int | None
+
+
+#
+# Stats
+#
+
+class SqlStatementStats(BaseModel):
+    statement: str
+    count: int
+    total_time: float
+    avg_time: float
+    max_time: float
+    histogram: dict[str, int]
@@ -0,0 +1,132 @@
+"""
+The response rows as plain JSON values, for `orjson`, bypassing the pydantic response models.
+
+Building the `schemas` models and validating them again by the `response_model`
+dominates the CPU time of the large lists and reports. The values here are the same
+JSON as of the models (the field order and types included, e.g. the report time is a
+float), this is checked by the tests against the `schemas`.
+"""
+from collections.abc import Sequence
+from datetime import tzinfo
+from math import ceil
+from typing import Any
+
+import orjson
+from fastapi_pagination import Params
+from sqlalchemy import Row
+
+from dt import ts_to_dt, ts_to_dt_many
+from models import Category
+from services import WorkReportBucket
+
+
+def dumps(values: Any) -> bytes:
+    return orjson.dumps(values)
+
+
+def _dt_value(ts: int | None, tz: tzinfo | None = None) -> str | None:
+    if ts is None:
+        return None
+    return (ts_to_dt(ts) if tz is None else ts_to_dt(ts).astimezone(tz)).isoformat()
+
+
+def category_values(category: Category) -> dict:
+    """`schemas.CategoryOut`"""
+    return {
+        'name': category.name,
+        'description': category.description,
+        'id': category.id,
+    }
+
+
+def task_values(row: Row) -> dict:
+    """`schemas.TaskOut` of the `task_list` row"""
+    return {
+        'id': row.id,
+        'name': row.name,
+        'category': {
+            'id': row.category_id,
+            'name': row.category_name,
+        },
+        'is_current': bool(row.is_current),
+        'is_archived': bool(row.is_archived),
+    }
+
+
+def work_items_values(rows: Sequence[Row]) -> list[dict]:
+    """`schemas.WorkItemOut` of the work items list rows, the dates converted by a batch"""
+    start_dts = ts_to_dt_many([row.start_timestamp for row in rows])
+    end_dts = ts_to_dt_many([row.end_timestamp for row in rows])
+    return [
+        {
+            'id': row.id,
+            'task': {
+                'id': row.task_id,
+                'name': row.task_name,
+            },
+            'start_dt': start_dt.isoformat(),
+            'end_dt': end_dt and end_dt.isoformat(),
+        }
+        for row, start_dt, end_dt in zip(rows, start_dts, end_dts)
+    ]
+
+
+def page_values(items: list, total: int | None, params: Params) -> dict:
+    """`fastapi_pagination.Page` of the items, see `Page.create`."""
+    size = params.size if params.size is not None else (total or None)
+    if size in {0, None}:
+        pages = 0
+    elif total is not None:
+        pages = ceil(total / size)
+    else:
+        pages = None
+
+    return {
+        'items': items,
+        'total': total,
+        'page': params.page if params.page is not None else 1,
+        'size': size,
+        'pages': pages,
+    }
+
+
+def work_report_category_values(row: tuple) -> dict:
+    """`schemas.WorkReportCategory` of (category_id, category_name, work_seconds)"""
+    return {
+        'category': {
+            'id': row[0],
+            'name': row[1],
+        },
+        'time': float(row[2]),
+    }
+
+
+def work_report_task_values(row: tuple) -> dict:
+    """`schemas.WorkReportTask` of (task_id, task_name, category_id, category_name, work_seconds)"""
+    return {
+        'task': {
+            'id': row[0],
+            'name': row[1],
+            'category': {
+                'id': row[2],
+                'name': row[3],
+            },
+        },
+        'time': float(row[4]),
+    }
+
+
+def work_report_total_values(work_seconds: int) -> dict:
+    """`schemas.WorkReportTotal`"""
+    return {'time': float(work_seconds)}
+
+
+def work_report_bucket_values(bucket: WorkReportBucket, tz: tzinfo | None = None) -> dict:
+    """`schemas.WorkReportBucket`, the dates in the time zone"""
+    return {
+        'start_dt': _dt_value(bucket.start_ts, tz),
+        'end_dt': _dt_value(bucket.end_ts, tz),
+        'total': work_report_total_values(bucket.total),
+        'by_category': bucket.by_category and [work_report_category_values(row) for row in bucket.by_category],
+        'by_task': bucket.by_task and [work_report_task_values(row) for row in bucket.by_task],
+    }
@@ -1,17 +1,53 @@
+import json
 import logging
 import re
-from collections.abc import Callable
-from datetime import datetime
-from typing import Sequence, Type, Any
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, tzinfo
+from typing import Sequence, Type, NamedTuple
 
 from fastapi import HTTPException
-from sqlalchemy import Row, select, case, literal_column, and_, text, desc, or_, Boolean
-from sqlalchemy.orm import Session
-from fastapi_pagination.ext.sqlalchemy import paginate
-
-from dt import dt_to_ts, get_now_timestamp
-
-from models import Task, Category, WorkItem
+from sqlalchemy import (
+    Row, Select, select, func, literal, and_, text, desc, or_, true, case, Integer, insert, update, delete,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import false
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute, Session, joinedload
+from fastapi_pagination.bases import AbstractParams
+from fastapi_pagination import resolve_params
+from fastapi_pagination.ext.sqlalchemy import create_paginate_query
+
+from dt import (
+    dt_to_ts,
+    get_now_timestamp,
+    get_day_start_timestamp,
+    get_next_day_start_timestamp,
+    get_bucket_boundaries,
+)
+
+from models import (
+    ActiveWork,
+    Task,
+    Category,
+    DataVersion,
+    TableRowCount,
+    WorkDailyRollup,
+    WorkItem,
+    WorkItemChange,
+    work_items_rtree,
+    DATA_VERSION_ID,
+    WORK_ITEMS_CURRENT_INDEX,
+    WORK_ITEMS_RTREE_OPEN_END,
+    WORK_ITEMS_START_BEFORE_END_CHECK,
+)
+from events import work_event_record
+from report_engine import report_engine
+from report_cache import day_total_cache
+from rollup import rollup_apply, rollup_apply_many, rollup_rebuild
 
 logger = logging.getLogger(__name__)
 
@@ -25,8 +61,13 @@ class WorkItemStartAlreadyStartedError(BaseServiceError):
 
 
 class WorkItemDtRangeValidationError(BaseServiceError):
-    def __init__(self, message: str):
+    def __init__(self, message: str, index: int | None = None):
         super().__init__(message)
+        self.index = index  # of the invalid work item of a bulk create
+
+
+class WorkItemCursorError(BaseServiceError):
+    pass
 
 
 # CATEGORY
@@ -78,7 +119,21 @@ def task_create(db_session: Session, name: str, category_id: int) -> Task | None
 
 
 def task_delete(db_session: Session, id_: int) -> None:
-    """DELETE FROM main.tasks WHERE id=?, id_"""
+    """
+    DELETE FROM main.work_items WHERE task_id=?, id_
+    DELETE FROM main.tasks WHERE id=?, id_
+    The foreign keys are not enforced: the work items of the task (`Task.work_items` cascade)
+    are deleted by a statement firing the triggers (the row count, the R*Tree index), the
+    daily rollup is applied explicitly for it.
+    """
+    deleted = db_session.execute(
+        delete(WorkItem)
+        .where(WorkItem.task_id == id_)
+        .returning(WorkItem.id, WorkItem.task_id, WorkItem.start_timestamp, WorkItem.end_timestamp)
+    ).all()
+    rollup_apply_many(db_session.connection(), [row[1:] for row in deleted], sign=-1)
+    if deleted:
+        work_event_record(db_session, 'delete', work_item_ids=[row.id for row in deleted])
     db_session.query(Task).filter(Task.id == id_).delete()
 
 
@@ -93,18 +148,10 @@ def task_update(db_session: Session, id_: int, name: str, category_id: int, is_a
     return task_read(db_session, id_)
 
 
-def task_list(
-        db_session: Session,
-        is_archived: bool | None = None,
-        is_current: bool | None = None,
-) -> Sequence[Row]:
+def _task_query(is_current: bool | None = None) -> Select:
     """
-    'SELECT t.id, t.name, t.category_id, c.name AS category_name, t.is_archived, '
-    'CASE WHEN w.id IS NULL THEN 0 ELSE 1 END is_current '
-    'FROM main.tasks AS t '
-    'LEFT JOIN main.work_items AS w ON (t.id = w.task_id AND w.end_timestamp is NULL)'
-    'JOIN main.categories AS c ON (t.category_id = c.id)'
-    'ORDER BY t.id'
+    The tasks with `is_current` by the single row `active_work` (outer) join.
+    Filtered by `is_current=True` it is the inner join: the lookup of the current task only.
     """
     smth = select(
         Task.id,
@@ -112,25 +159,36 @@ def task_list(
         Task.category_id,
         Category.name.label('category_name'),
         Task.is_archived,
-        case(
-            (
-                WorkItem.id.is_(None),
-                literal_column('FALSE', Boolean),
-            ),
-            else_=literal_column('TRUE', Boolean)
-        ).label('is_current'),
+        ActiveWork.task_id.is_not(None).label('is_current'),
     ).join(
         Task.category
     ).join(
-        WorkItem,
-        onclause=and_(Task.id == WorkItem.task_id, WorkItem.end_timestamp.is_(None)),
-        isouter=True,  # LEFT OUTER JOIN
-    ).order_by(desc(Task.id))
+        ActiveWork,
+        onclause=ActiveWork.task_id == Task.id,
+        isouter=not is_current,
+    )
+    if is_current is False:
+        smth = smth.filter(ActiveWork.task_id.is_(None))
+    return smth
+
+
+def task_list(
+        db_session: Session,
+        is_archived: bool | None = None,
+        is_current: bool | None = None,
+) -> Sequence[Row]:
+    """
+    'SELECT t.id, t.name, t.category_id, c.name AS category_name, t.is_archived, '
+    'a.task_id IS NOT NULL AS is_current '
+    'FROM main.tasks AS t '
+    'JOIN main.categories AS c ON (t.category_id = c.id)'
+    'LEFT JOIN main.active_work AS a ON (a.task_id = t.id)'
+    'ORDER BY t.id DESC'
+    """
+    smth = _task_query(is_current).order_by(desc(Task.id))
     # Filtration
     if is_archived is not None:
         smth = smth.filter(Task.is_archived == is_archived)
-    if is_current is not None:
-        smth = smth.filter(literal_column('is_current', Boolean) == is_current)
 
     rows = db_session.execute(smth).all()
     return rows
@@ -138,42 +196,23 @@ def task_list(
 
 def task_read(db_session: Session, id_: int) -> Row[tuple] | None:
     """
-    'SELECT t.id, t.name, t.category_id, c.name AS category_name, '
-    'CASE WHEN w.id IS NULL THEN 0 ELSE 1 END is_current '
+    'SELECT t.id, t.name, t.category_id, c.name AS category_name, t.is_archived, '
+    'a.task_id IS NOT NULL AS is_current '
     'FROM main.tasks AS t '
-    'LEFT JOIN main.work_items AS w ON (t.id = w.task_id AND w.end_timestamp is NULL)'
     'JOIN main.categories AS c ON (t.category_id = c.id)'
+    'LEFT JOIN main.active_work AS a ON (a.task_id = t.id)'
     'WHERE t.id=?',
     id_,
     """
-    smth = select(
-        Task.id,
-        Task.name,
-        Task.category_id,
-        Category.name.label('category_name'),
-        Task.is_archived,
-        case(
-            (
-                WorkItem.id.is_(None),
-                literal_column('0'),
-            ),
-            else_=literal_column('1')
-        ).label('is_current'),
-    ).join(
-        Task.category
-    ).join(
-        WorkItem,
-        onclause=and_(Task.id == WorkItem.task_id, WorkItem.end_timestamp.is_(None)),
-        isouter=True,  # LEFT OUTER JOIN
-    ).filter(Task.id == id_)
+    smth = _task_query().filter(Task.id == id_)
     row = db_session.execute(smth).one_or_none()
     return row
 
 
 # WORK
 
-def work_item_list(db_session: Session, order_by: list[str], transformer: Callable) -> Any:
-    # order_by expression processing
+def _work_item_ordering(order_by: list[str]) -> list[tuple[InstrumentedAttribute, bool]]:
+    """(model column, is descending) by the `order_by` elements like `-start_timestamp`."""
     ordering = []
     for ob in order_by:
         order_by_match = re.match(r'([+-]?)(\w+)', ob)
@@ -183,13 +222,135 @@ def work_item_list(db_session: Session, order_by: list[str], transformer: Callab
         model_column = getattr(WorkItem, order_field, None)
         if model_column is None:
             raise ValueError(f'Cannot find model column for `order_by` element: {ob}')
+        ordering.append((model_column, direction == '-'))
+    return ordering
 
-        if direction == '-':
-            model_column = desc(model_column)
-        ordering.append(model_column)
 
-    return paginate(
-        db_session,
+def _work_item_list_query() -> Select:
+    return select(
+        WorkItem.id,
+        WorkItem.task_id,
+        Task.name.label('task_name'),
+        WorkItem.start_timestamp,
+        WorkItem.end_timestamp,
+    ).join(
+        WorkItem.task,
+    )
+
+
+def work_item_list_rows(
+    db_session: Session,
+    order_by: list[str],
+    params: AbstractParams | None = None,
+) -> tuple[Sequence[Row], int | None, AbstractParams]:
+    """
+    The rows of the page of work items, the total and the resolved params. The total (if
+    included by the params) is read from the row count kept by triggers instead of `COUNT(*)`:
+    every work item has a task, the join does not change the count.
+    """
+    params = resolve_params(params)
+    ordering = [
+        desc(model_column) if is_desc else model_column
+        for model_column, is_desc in _work_item_ordering(order_by)
+    ]
+
+    total = None
+    if params.to_raw_params().include_total:
+        total = db_session.scalar(
+            select(TableRowCount.row_count).where(TableRowCount.table_name == WorkItem.__tablename__)
+        ) or 0
+    items = db_session.execute(
+        create_paginate_query(_work_item_list_query().order_by(*ordering), params)
+    ).all()
+    return items, total, params
+
+
+def _encode_cursor(order_by: list[str], key: list) -> str:
+    return urlsafe_b64encode(json.dumps({'order_by': order_by, 'key': key}).encode()).decode()
+
+
+def _decode_cursor(cursor: str, order_by: list[str]) -> list:
+    try:
+        data = json.loads(urlsafe_b64decode(cursor.encode()))
+        key = data['key']
+        cursor_order_by = data['order_by']
+    except (ValueError, TypeError, KeyError) as e:
+        raise WorkItemCursorError('Invalid cursor') from e
+    if cursor_order_by != order_by or len(key) != len(order_by) + 1:
+        raise WorkItemCursorError('The cursor does not match the ordering')
+    return key
+
+
+def _keyset_after(model_column, value, is_desc: bool):
+    """The column value is after the given one in the ordering (SQLite sorts NULLs first)."""
+    if value is None:
+        return false() if is_desc else model_column.is_not(None)
+    if is_desc:
+        return or_(model_column < value, model_column.is_(None))
+    return model_column > value
+
+
+def _keyset_equal(model_column, value):
+    return model_column.is_(None) if value is None else model_column == value
+
+
+def work_item_list_cursor(
+    db_session: Session,
+    order_by: list[str],
+    cursor: str | None,
+    size: int,
+) -> tuple[Sequence[Row], str | None]:
+    """
+    Keyset pagination: the page following the cursor (the ordering key of the last row of
+    the previous page) and the cursor of the next page, None for the last page.
+    The rows are found by the index instead of skipping OFFSET rows, no COUNT query.
+    """
+    ordering = _work_item_ordering(order_by) + [(WorkItem.id, False)]  # the unique key of the ordering
+    query = _work_item_list_query().order_by(*[
+        desc(model_column) if is_desc else model_column
+        for model_column, is_desc in ordering
+    ])
+
+    if cursor is not None:
+        key = _decode_cursor(cursor, order_by)
+        query = query.where(or_(*[
+            and_(
+                *[_keyset_equal(model_column, value) for (model_column, _), value in zip(ordering[:i], key)],
+                _keyset_after(ordering[i][0], key[i], ordering[i][1]),
+            )
+            for i in range(len(ordering))
+        ]))
+
+    rows = db_session.execute(query.limit(size + 1)).all()
+    if len(rows) <= size:
+        return rows, None
+
+    rows = rows[:size]
+    last_row = rows[-1]
+    return rows, _encode_cursor(order_by, [getattr(last_row, model_column.key) for model_column, _ in ordering])
+
+
+def work_item_export(
+    db_session: Session,
+    start_dt: datetime | None = None,
+    end_dt: datetime | None = None,
+    task_ids: list[int] | None = None,
+    partition_size: int = 1000,
+) -> Iterator[Sequence[Row]]:
+    """
+    Stream the work items intersecting the range by partitions of rows.
+    The rows are fetched from the cursor on demand (`yield_per`), i.e. by a single
+    read transaction of the session: consistent while the other connections write.
+    """
+    filters = []
+    if start_dt is not None:
+        filters.append(or_(WorkItem.end_timestamp == None, WorkItem.end_timestamp > dt_to_ts(start_dt)))
+    if end_dt is not None:
+        filters.append(WorkItem.start_timestamp < dt_to_ts(end_dt))
+    if task_ids:
+        filters.append(WorkItem.task_id.in_(task_ids))
+
+    result = db_session.execute(
         select(
             WorkItem.id,
             WorkItem.task_id,
@@ -198,9 +359,86 @@ def work_item_list(db_session: Session, order_by: list[str], transformer: Callab
             WorkItem.end_timestamp,
         ).join(
             WorkItem.task,
-        ).order_by(*ordering),
-        transformer=transformer,
+        ).where(
+            *filters,
+        ).order_by(
+            WorkItem.id,
+        ).execution_options(yield_per=partition_size)
     )
+    return result.partitions()
+
+
+def work_item_snapshot_bounds(db_session: Session) -> Row:
+    """
+    first_start_timestamp, current_start_timestamp
+    The start of the first work item and of the current one (if any), by the indexes.
+    """
+    return db_session.execute(
+        select(
+            select(func.min(WorkItem.start_timestamp)).scalar_subquery().label('first_start_timestamp'),
+            select(WorkItem.start_timestamp)
+            .where(WorkItem.end_timestamp == None)
+            .scalar_subquery()
+            .label('current_start_timestamp'),
+        )
+    ).one()
+
+
+def work_item_snapshot_state(db_session: Session) -> Row:
+    """
+    version, change_id, first_change_id
+    The data version and the range of the ids of the work item changes log.
+    """
+    return db_session.execute(
+        select(
+            DataVersion.version,
+            select(func.coalesce(func.max(WorkItemChange.id), 0)).scalar_subquery().label('change_id'),
+            select(func.min(WorkItemChange.id)).scalar_subquery().label('first_change_id'),
+        ).where(DataVersion.id == DATA_VERSION_ID)
+    ).one()
+
+
+def work_item_snapshot_changes(db_session: Session, change_id: int) -> Sequence[Row]:
+    """
+    work_item_id, start_timestamp
+    The work items changed after the change id, the start is None for the deleted ones.
+    """
+    return db_session.execute(
+        select(WorkItemChange.work_item_id, WorkItem.start_timestamp)
+        .distinct()
+        .outerjoin(WorkItem, WorkItem.id == WorkItemChange.work_item_id)
+        .where(WorkItemChange.id > change_id)
+    ).all()
+
+
+def work_item_snapshot(
+    db_session: Session,
+    start_ts: int,
+    end_ts: int,
+    partition_size: int = 10000,
+) -> Iterator[Sequence[Row]]:
+    """The work items started within the range with their tasks and categories, by partitions of rows."""
+    result = db_session.execute(
+        select(
+            WorkItem.id,
+            WorkItem.task_id,
+            Task.name.label('task_name'),
+            Task.category_id,
+            Category.name.label('category_name'),
+            WorkItem.start_timestamp,
+            WorkItem.end_timestamp,
+        ).join(
+            WorkItem.task,
+        ).join(
+            Task.category,
+        ).where(
+            WorkItem.start_timestamp >= start_ts,
+            WorkItem.start_timestamp < end_ts,
+        ).order_by(
+            WorkItem.start_timestamp,
+        ).execution_options(yield_per=partition_size)
+    )
+    return result.partitions()
 
 
 def work_item_read(db_session: Session, id_: int) -> WorkItem | None:
@@ -213,22 +451,22 @@ def work_item_read(db_session: Session, id_: int) -> WorkItem | None:
 
 def work_item_start(db_session: Session, task_id: int, start: int | None) -> WorkItem:
     """
-    SELECT id FROM main.work_items WHERE end_timestamp IS NULL
     INSERT INTO main.work_items (task_id, start_timestamp) VALUES (?,?), task_id, start
+    The single current work item is guaranteed by the unique index.
     # FIXME: this the same as `work_item_create` but from now
     """
-    started_work_item = db_session.query(WorkItem).filter(WorkItem.end_timestamp.is_(None)).one_or_none()
-
-    # Validate active work
-    if started_work_item is not None:
-        raise WorkItemStartAlreadyStartedError('Cannot start work: already started')
-
     start = start or get_now_timestamp()
-    obj = WorkItem(task_id=task_id, start_timestamp=start)
-    db_session.add(obj)
-    db_session.flush()
-    db_session.refresh(obj)
-    return obj
+    try:
+        id_ = db_session.execute(
+            insert(WorkItem.__table__).values(task_id=task_id, start_timestamp=start).returning(WorkItem.id)
+        ).scalar_one()
+    except IntegrityError as e:
+        if WORK_ITEMS_CURRENT_INDEX in str(e.orig):
+            raise WorkItemStartAlreadyStartedError('Cannot start work: already started') from e
+        raise
+
+    work_event_record(db_session, 'start', work_item_id=id_)
+    return work_item_read(db_session, id_)
 
 
 def work_item_stop_current(db_session: Session) -> None:
@@ -242,30 +480,45 @@ def work_item_stop_current(db_session: Session) -> None:
     if res is None:
         raise Exception('There is no work item to stop!')
 
-    res.end_timestamp = get_now_timestamp()
-    db_session.flush()
-    logger.info('Work stopped')
+    end_ts = get_now_timestamp()
+    if res.start_timestamp >= end_ts:
+        # Stopped within the second of its start (or started ahead of the clock): the work item
+        # would not end after its start, it is kept running
+        raise WorkItemDtRangeValidationError('Cannot stop work: it has to last at least a second')
 
+    res.end_timestamp = end_ts
+    with _work_item_constraints():
+        db_session.flush()
+    work_event_record(db_session, 'stop', work_item_id=res.id)
+    logger.info('Work stopped')
 
-def _work_item_dt_range_validation(
-    db_session: Session,
-    object_id: int | None,
-    start_ts: int,
-    end_ts: int | None,
-) -> None:
-    # 1. Validate
-    if end_ts is not None and start_ts >= end_ts:
-        raise WorkItemDtRangeValidationError(
-            'The start date and time of the work element must be before its end.'
-        )
 
-    # 2. Validate existing work items
+@contextmanager
+def _work_item_constraints():
+    """Map violations of the work items DB constraints (see `models.WorkItem`) to the validation errors."""
+    try:
+        yield
+    except IntegrityError as e:
+        if WORK_ITEMS_START_BEFORE_END_CHECK in str(e.orig):
+            raise WorkItemDtRangeValidationError(
+                'The start date and time of the work element must be before its end.'
+            ) from e
+        if WORK_ITEMS_CURRENT_INDEX in str(e.orig):
+            raise WorkItemDtRangeValidationError(
+                'The work item with this date and time range already exists.'
+            ) from e
+        raise
+
+
+def _work_item_dt_range_conflicts(object_id: int | None, start_ts: int, end_ts: int | None) -> Select:
+    """Select the existing work items conflicting with the given date and time range."""
     conditions = [
         # for all work items
         and_(WorkItem.start_timestamp <= start_ts, WorkItem.end_timestamp >= start_ts),
     ]
+    other_conditions = []
     if end_ts is None:
-        conditions.append(WorkItem.end_timestamp == None)  # only one current WI is available
+        other_conditions.append(WorkItem.end_timestamp == None)  # only one current WI is available
     else:
         conditions.extend([
             # for finished work items
@@ -274,31 +527,181 @@ def _work_item_dt_range_validation(
             and_(WorkItem.end_timestamp == None, WorkItem.start_timestamp <= end_ts),
         ])
 
+    # The range conditions are checked for the candidates found by the R*Tree index only
+    candidate_ids = select(work_items_rtree.c.id).where(
+        work_items_rtree.c.start_ts <= (start_ts if end_ts is None else end_ts),
+        work_items_rtree.c.end_ts >= start_ts,
+    )
     filters = [
-        or_(*conditions),
+        or_(and_(WorkItem.id.in_(candidate_ids), or_(*conditions)), *other_conditions),
     ]
-    if object_id is not None:  # on create
+    if object_id is not None:  # on update
         filters.append(WorkItem.id != object_id)
 
-    result = db_session.query(WorkItem).filter(*filters).one_or_none()
-    if result is not None:
+    return select(WorkItem.id).where(*filters)
+
+
+def _work_item_write_update(
+    db_session: Session,
+    work_item: WorkItem,
+    task_id: int,
+    start_ts: int,
+    end_ts: int | None,
+) -> None:
+    """
+    Update the work item by the single statement validated by the DB:
+    the range conflicts subquery and the constraints.
+    """
+    old_range = (work_item.task_id, work_item.start_timestamp, work_item.end_timestamp)
+    with _work_item_constraints():
+        updated_id = db_session.execute(
+            # Core UPDATE, the daily rollup is maintained below
+            update(WorkItem.__table__).where(
+                WorkItem.id == work_item.id,
+                ~_work_item_dt_range_conflicts(work_item.id, start_ts, end_ts).exists(),
+            ).values(
+                task_id=task_id,
+                start_timestamp=start_ts,
+                end_timestamp=end_ts,
+            ).returning(WorkItem.id)
+        ).scalar_one_or_none()
+    if updated_id is None:
         raise WorkItemDtRangeValidationError('The work item with this date and time range already exists.')
 
+    rollup_apply(db_session.connection(), *old_range, sign=-1)
+    rollup_apply(db_session.connection(), task_id, start_ts, end_ts)
+    work_event_record(db_session, 'update', work_item_id=work_item.id)
+    db_session.expire(work_item)
+
 
 def work_item_create(db_session: Session, start_dt: datetime, end_dt: datetime | None, task_id: int) -> WorkItem:
+    """
+    INSERT INTO main.work_items (task_id, start_timestamp, end_timestamp)
+    SELECT ?, ?, ? WHERE NOT EXISTS (<conflicting work items>)
+    The range rules are checked by the DB within the single statement.
+    """
     start_ts = dt_to_ts(start_dt)
     end_ts = end_dt and dt_to_ts(end_dt)
-    _work_item_dt_range_validation(db_session, None, start_ts, end_ts)
 
-    obj = WorkItem(
-        task_id=task_id,
-        start_timestamp=start_ts,
-        end_timestamp=end_ts,
+    with _work_item_constraints():
+        id_ = db_session.execute(
+            # Core INSERT, the daily rollup is maintained below
+            insert(WorkItem.__table__).from_select(
+                ['task_id', 'start_timestamp', 'end_timestamp'],
+                select(
+                    literal(task_id, Integer),
+                    literal(start_ts, Integer),
+                    literal(end_ts, Integer),
+                ).where(~_work_item_dt_range_conflicts(None, start_ts, end_ts).exists()),
+            ).returning(WorkItem.id)
+        ).scalar_one_or_none()
+    if id_ is None:
+        raise WorkItemDtRangeValidationError('The work item with this date and time range already exists.')
+
+    rollup_apply(db_session.connection(), task_id, start_ts, end_ts)
+    work_event_record(db_session, 'create', work_item_id=id_)
+    return work_item_read(db_session, id_)
+
+
+def _work_items_bulk_conflicts(
+    db_session: Session,
+    ranges: list[tuple[int, int | None]],
+) -> int | None:
+    """
+    The index of the first of the sorted (start_ts, end_ts) ranges intersecting a previous one
+    or the existing work items, None if none. The existing work items are read by a single
+    range query covering the whole batch.
+    """
+    open_end = float('inf')
+
+    max_end_ts = -open_end
+    for index, (start_ts, end_ts) in enumerate(ranges):
+        if max_end_ts >= start_ts:
+            return index
+        max_end_ts = max(max_end_ts, open_end if end_ts is None else end_ts)
+
+    batch_start_ts = ranges[0][0]
+    batch_end_ts = WORK_ITEMS_RTREE_OPEN_END if max_end_ts == open_end else max_end_ts
+    candidate_ids = select(work_items_rtree.c.id).where(
+        work_items_rtree.c.start_ts <= batch_end_ts,
+        work_items_rtree.c.end_ts >= batch_start_ts,
     )
-    db_session.add(obj)
-    db_session.flush()
-    db_session.refresh(obj)
-    return obj
+    existing = db_session.execute(
+        select(WorkItem.start_timestamp, WorkItem.end_timestamp)
+        .where(or_(WorkItem.id.in_(candidate_ids), WorkItem.end_timestamp == None))
+        .order_by(WorkItem.start_timestamp)
+    ).all()
+
+    # The existing work items may intersect each other: the running maximum of the ends
+    existing_starts = []
+    existing_max_ends = []
+    max_end_ts = -open_end
+    for start_ts, end_ts in existing:
+        max_end_ts = max(max_end_ts, open_end if end_ts is None else end_ts)
+        existing_starts.append(start_ts)
+        existing_max_ends.append(max_end_ts)
+
+    for index, (start_ts, end_ts) in enumerate(ranges):
+        # The existing work items started before the end of the range
+        count = bisect_right(existing_starts, open_end if end_ts is None else end_ts)
+        if count and existing_max_ends[count - 1] >= start_ts:
+            return index
+    return None
+
+
+def work_item_create_bulk(
+    db_session: Session,
+    work_items: list[tuple[datetime, datetime | None, int]],
+) -> list[WorkItem]:
+    """
+    Create the (start_dt, end_dt, task_id) work items: all or nothing.
+    The batch is validated as a whole and inserted by a single executemany.
+    The validation errors have the index of the (first found) invalid work item.
+    """
+    if not work_items:
+        return []
+
+    rows = [
+        {
+            'task_id': task_id,
+            'start_timestamp': dt_to_ts(start_dt),
+            'end_timestamp': end_dt and dt_to_ts(end_dt),
+        } for start_dt, end_dt, task_id in work_items
+    ]
+    for index, row in enumerate(rows):
+        if row['end_timestamp'] is not None and row['start_timestamp'] >= row['end_timestamp']:
+            raise WorkItemDtRangeValidationError(
+                'The start date and time of the work element must be before its end.',
+                index,
+            )
+
+    order = sorted(range(len(rows)), key=lambda index: rows[index]['start_timestamp'])
+    rows = [rows[index] for index in order]
+    conflict = _work_items_bulk_conflicts(db_session, [(row['start_timestamp'], row['end_timestamp']) for row in rows])
+    if conflict is not None:
+        raise WorkItemDtRangeValidationError(
+            'The work item with this date and time range already exists.',
+            order[conflict],
+        )
+
+    with _work_item_constraints():
+        ids = db_session.scalars(
+            # Core INSERT, the daily rollup is maintained below
+            insert(WorkItem.__table__).returning(WorkItem.id, sort_by_parameter_order=True),
+            rows,
+        ).all()
+    rollup_apply_many(
+        db_session.connection(),
+        [(row['task_id'], row['start_timestamp'], row['end_timestamp']) for row in rows],
+    )
+    work_event_record(db_session, 'create', work_item_ids=ids)
+
+    return db_session.scalars(
+        select(WorkItem)
+        .options(joinedload(WorkItem.task))
+        .where(WorkItem.id.in_(ids))
+        .order_by(WorkItem.start_timestamp)
+    ).all()
 
 
 def work_item_delete(db_session: Session, id_: int) -> None:
@@ -306,21 +709,15 @@ def work_item_delete(db_session: Session, id_: int) -> None:
     if work_item is None:
         raise HTTPException(status_code=404, detail='WorkItem not found')
     db_session.delete(work_item)
+    work_event_record(db_session, 'delete', work_item_id=id_)
     db_session.commit()
 
 
 def work_item_update(db_session: Session, id_: int, task_id: int, start: datetime, end: datetime | None) -> WorkItem:
-    start_ts = dt_to_ts(start)
-    end_ts = end and dt_to_ts(end)
-    _work_item_dt_range_validation(db_session, id_, start_ts, end_ts)
-
-    db_session.query(WorkItem).filter(WorkItem.id == id_).update({
-        'task_id': task_id,
-        'start_timestamp': start_ts,
-        'end_timestamp': end_ts,
-    })
+    work_item = work_item_read(db_session, id_)
+    _work_item_write_update(db_session, work_item, task_id, dt_to_ts(start), end and dt_to_ts(end))
     db_session.commit()
-    return work_item_read(db_session, id_)
+    return work_item
 
 
 def work_item_update_partial(
@@ -332,127 +729,453 @@ def work_item_update_partial(
 ) -> WorkItem:
     work_item = work_item_read(db_session, id_)
 
-    if task_id is not None:
-        work_item.task_id = task_id
-    if start is not None:
-        work_item.start_timestamp = dt_to_ts(start)
-    if end is not None:
-        work_item.end_timestamp = dt_to_ts(end)
-
-    _work_item_dt_range_validation(
+    _work_item_write_update(
         db_session,
-        id_,
-        work_item.start_timestamp,
-        work_item.end_timestamp,
+        work_item,
+        work_item.task_id if task_id is None else task_id,
+        work_item.start_timestamp if start is None else dt_to_ts(start),
+        work_item.end_timestamp if end is None else dt_to_ts(end),
     )
-
     db_session.commit()
 
     return work_item
 
 
-# Reporting
+# Data version
 
-def work_get_report_category(db_session: Session, start_dt: datetime, end_dt: datetime) -> Sequence[Row]:
+def data_version_read(db_session: Session) -> Row:
     """
-    category_id, category_name, work_seconds
+    version, current_start_timestamp
+    The data version and the start of the current work item (if any) by a single lookup.
+    """
+    return db_session.execute(
+        select(
+            DataVersion.version,
+            select(WorkItem.start_timestamp)
+            .where(WorkItem.end_timestamp == None)
+            .scalar_subquery()
+            .label('current_start_timestamp'),
+        ).where(DataVersion.id == DATA_VERSION_ID)
+    ).one()
+
+
+def work_report_data_version(db_session: Session, start_dt: datetime, end_dt: datetime) -> tuple[int, int | None]:
+    """
+    The data version of the reports for the range: the data version and the time the
+    report is calculated for, if the current work item is included (its time grows with now).
     """
+    version, current_start_ts = data_version_read(db_session)
+    if current_start_ts is None:
+        return version, None
+
     start_ts = dt_to_ts(start_dt)
     end_ts = dt_to_ts(end_dt)
-    now_ts = get_now_timestamp()
+    if current_start_ts >= end_ts:
+        return version, None
+    return version, min(max(get_now_timestamp(), start_ts), end_ts)
+
 
+# Reporting
+
+# Work seconds per task within the [:start_ts, :end_ts] range:
+# the whole local days are read from the daily rollup, the finished work items
+# are clipped by the edge (partial) days, the current work item is clipped by the range.
+# The edge work items are looked up by the R*Tree index and rechecked by the exact columns.
+WORK_SECONDS_BY_TASK_SQL = """
+    SELECT wt.task_id, SUM(wt.work_seconds) AS work_seconds
+    FROM (
+       SELECT r.task_id, r.work_seconds
+       FROM main.work_daily_rollup r
+       WHERE r.day >= :days_start_ts AND r.day < :days_end_ts
+       UNION ALL
+       SELECT wi.task_id, MIN(wi.end_timestamp, :head_end_ts) - MAX(wi.start_timestamp, :start_ts)
+       FROM main.work_items_rtree r
+       INNER JOIN main.work_items wi ON (wi.id = r.id)
+       WHERE r.end_ts > :start_ts AND r.start_ts < :head_end_ts
+           AND wi.end_timestamp > :start_ts AND wi.start_timestamp < :head_end_ts
+       UNION ALL
+       SELECT wi.task_id, MIN(wi.end_timestamp, :end_ts) - MAX(wi.start_timestamp, :tail_start_ts)
+       FROM main.work_items_rtree r
+       INNER JOIN main.work_items wi ON (wi.id = r.id)
+       WHERE r.end_ts > :tail_start_ts AND r.start_ts < :end_ts
+           AND wi.end_timestamp > :tail_start_ts AND wi.start_timestamp < :end_ts
+       UNION ALL
+       SELECT wi.task_id,
+           CASE WHEN (:now_ts > :end_ts) THEN :end_ts ELSE :now_ts END
+           - CASE WHEN (wi.start_timestamp < :start_ts) THEN :start_ts ELSE wi.start_timestamp END
+       FROM main.work_items wi
+       WHERE wi.end_timestamp IS NULL AND (
+           (wi.start_timestamp >= :start_ts AND wi.start_timestamp < :end_ts)
+           OR (:now_ts > :start_ts AND :now_ts <= :end_ts)
+       )
+    ) wt
+    GROUP BY wt.task_id
+"""
+
+
+def _work_seconds_by_task_params(start_dt: datetime, end_dt: datetime) -> dict[str, int]:
+    """Bind parameters of `WORK_SECONDS_BY_TASK_SQL` for the range."""
+    start_ts = dt_to_ts(start_dt)
+    end_ts = dt_to_ts(end_dt)
+
+    # The whole local days within the range
+    days_start_ts = get_day_start_timestamp(start_ts)
+    if days_start_ts < start_ts:
+        days_start_ts = get_next_day_start_timestamp(days_start_ts)
+    days_end_ts = get_day_start_timestamp(end_ts)
+
+    if days_start_ts >= days_end_ts:
+        # No whole days: the range is a single edge
+        days_start_ts = days_end_ts = head_end_ts = tail_start_ts = end_ts
+    else:
+        head_end_ts = days_start_ts
+        tail_start_ts = days_end_ts
+
+    return {
+        'start_ts': start_ts,
+        'end_ts': end_ts,
+        'now_ts': get_now_timestamp(),
+        'days_start_ts': days_start_ts,
+        'days_end_ts': days_end_ts,
+        'head_end_ts': head_end_ts,
+        'tail_start_ts': tail_start_ts,
+    }
+
+
+def work_get_report_category(db_session: Session, start_dt: datetime, end_dt: datetime) -> Sequence[Row]:
+    """
+    category_id, category_name, work_seconds
+    """
+    if report_engine is not None:
+        return report_engine.report_category(db_session, dt_to_ts(start_dt), dt_to_ts(end_dt), get_now_timestamp())
     return db_session.execute(
         text(
-        """
+        f"""
         SELECT t.category_id, c.name AS catrgory_name,
-        COALESCE(SUM(ww.end_ts - ww.start_ts), 0) AS work_seconds 
-        FROM (
-           SELECT wi.task_id,
-               CASE 
-                   WHEN (wi.start_timestamp < :start_ts) THEN :start_ts ELSE wi.start_timestamp
-               END start_ts,
-               CASE 
-                   WHEN (COALESCE(wi.end_timestamp, :now_ts) > :end_ts) THEN :end_ts ELSE COALESCE(wi.end_timestamp, :now_ts)
-               END end_ts
-           FROM main.work_items wi
-           WHERE (
-               wi.start_timestamp >= :start_ts AND wi.start_timestamp < :end_ts
-           ) OR (
-               COALESCE(wi.end_timestamp, :now_ts) > :start_ts AND COALESCE(wi.end_timestamp, :now_ts) <= :end_ts
-           ) OR (wi.start_timestamp < :start_ts AND wi.end_timestamp > :end_ts)
-        ) ww 
-        INNER JOIN main.tasks t ON (ww.task_id = t.id) 
-        INNER JOIN main.categories c ON (t.category_id = c.id) 
+        COALESCE(SUM(wt.work_seconds), 0) AS work_seconds
+        FROM ({WORK_SECONDS_BY_TASK_SQL}) wt
+        INNER JOIN main.tasks t ON (wt.task_id = t.id)
+        INNER JOIN main.categories c ON (t.category_id = c.id)
         GROUP BY t.category_id, c.name
-        """).bindparams(**{
-            'start_ts': start_ts,
-            'now_ts': now_ts,
-            'end_ts': end_ts,
-        }),
+        """).bindparams(**_work_seconds_by_task_params(start_dt, end_dt)),
     ).all()
 
 
 def work_get_report_task(db_session: Session, start_dt: datetime, end_dt: datetime) -> Sequence[Row]:
-    start_ts = dt_to_ts(start_dt)
-    end_ts = dt_to_ts(end_dt)
-    now_ts = get_now_timestamp()
-
+    if report_engine is not None:
+        return report_engine.report_task(db_session, dt_to_ts(start_dt), dt_to_ts(end_dt), get_now_timestamp())
     return db_session.execute(text(
-        """
-        SELECT ww.task_id, t.name AS task_name, t.category_id, c.name AS category_name,
-        COALESCE(SUM(ww.end_ts - ww.start_ts), 0) AS work_seconds 
-        FROM (
-           SELECT wi.task_id,
-               CASE 
-                   WHEN (wi.start_timestamp < :start_ts) THEN :start_ts ELSE wi.start_timestamp
-               END start_ts,
-               CASE 
-                   WHEN (COALESCE(wi.end_timestamp, :now_ts) > :end_ts) THEN :end_ts ELSE COALESCE(wi.end_timestamp, :now_ts)
-               END end_ts
-           FROM main.work_items wi
-           WHERE (
-               wi.start_timestamp >= :start_ts AND wi.start_timestamp < :end_ts
-           ) OR (
-               COALESCE(wi.end_timestamp, :now_ts) > :start_ts AND COALESCE(wi.end_timestamp, :now_ts) <= :end_ts
-           ) OR (wi.start_timestamp < :start_ts AND wi.end_timestamp > :end_ts)
-        ) ww 
-        INNER JOIN main.tasks t ON (ww.task_id = t.id) 
-        JOIN main.categories c ON (t.category_id = c.id) 
-        GROUP BY ww.task_id, t.name, t.category_id
-        """).bindparams(
-            start_ts=start_ts,
-            end_ts=end_ts,
-            now_ts=now_ts,
-        ),
+        f"""
+        SELECT wt.task_id, t.name AS task_name, t.category_id, c.name AS category_name,
+        COALESCE(wt.work_seconds, 0) AS work_seconds
+        FROM ({WORK_SECONDS_BY_TASK_SQL}) wt
+        INNER JOIN main.tasks t ON (wt.task_id = t.id)
+        JOIN main.categories c ON (t.category_id = c.id)
+        ORDER BY wt.task_id
+        """).bindparams(**_work_seconds_by_task_params(start_dt, end_dt)),
     ).all()
 
 
 def work_get_report_total(db_session: Session, start_dt: datetime, end_dt: datetime) -> Sequence[Row]:
+    if report_engine is not None:
+        return report_engine.report_total(db_session, dt_to_ts(start_dt), dt_to_ts(end_dt), get_now_timestamp())
+    return db_session.execute(text(
+        f"""
+        SELECT COALESCE(SUM(wt.work_seconds), 0) AS work_seconds
+        FROM ({WORK_SECONDS_BY_TASK_SQL}) wt
+        """).bindparams(**_work_seconds_by_task_params(start_dt, end_dt)),
+    ).all()
+
+
+class WorkReport(NamedTuple):
+    by_category: list[tuple[int, str, int]]  # category_id, category_name, work_seconds
+    by_task: Sequence[Row]  # the same rows as `work_get_report_task`
+    total: int
+
+
+def work_get_report(db_session: Session, start_dt: datetime, end_dt: datetime) -> WorkReport:
+    """
+    All the reports for the range by a single query: the per task rows are aggregated
+    by categories and in total here instead of querying the work items again.
+    """
+    task_rows = work_get_report_task(db_session, start_dt, end_dt)
+
+    category_names = {}
+    category_seconds = defaultdict(int)
+    for row in task_rows:
+        category_names[row.category_id] = row.category_name
+        category_seconds[row.category_id] += row.work_seconds
+
+    return WorkReport(
+        by_category=[
+            (category_id, category_names[category_id], category_seconds[category_id])
+            for category_id in sorted(category_seconds)  # as `GROUP BY` of `work_get_report_category`
+        ],
+        by_task=task_rows,
+        total=sum(row.work_seconds for row in task_rows),
+    )
+
+
+class WorkReportBucket(NamedTuple):
+    start_ts: int
+    end_ts: int
+    total: int
+    by_category: list[tuple[int, str, int]] | None  # as `WorkReport.by_category`
+    by_task: list[tuple[int, str, int, str, int]] | None  # as the rows of `work_get_report_task`
+
+
+def work_get_report_buckets(
+    db_session: Session,
+    start_dt: datetime,
+    end_dt: datetime,
+    bucket: str,
+    tz: tzinfo | None = None,
+    group_by: str | None = None,
+) -> list[WorkReportBucket]:
+    """
+    The report for each of the days, weeks or months (see `get_bucket_boundaries`) of the range,
+    the totals only or grouped by 'task' or 'category'. The work items intersecting the range
+    (the R*Tree index) are clipped by the buckets and summed up by a single query, grouped by
+    the buckets and tasks: only the groups are read, not the work items.
+    The daily rollup is not used: its days are the local ones, not the days of the time zone.
+    """
     start_ts = dt_to_ts(start_dt)
     end_ts = dt_to_ts(end_dt)
     now_ts = get_now_timestamp()
-
-    return db_session.execute(text(
-        """
-        SELECT COALESCE(SUM(ww.end_ts - ww.start_ts), 0) AS work_seconds
-        FROM (
-           SELECT 
-               CASE 
-                   WHEN (wi.start_timestamp < :start_ts) THEN :start_ts ELSE wi.start_timestamp
-               END start_ts,
-               CASE 
-                   WHEN (COALESCE(wi.end_timestamp, :now_ts) > :end_ts) THEN :end_ts ELSE COALESCE(wi.end_timestamp, :now_ts)
-               END end_ts
-           FROM main.work_items wi
-           WHERE (
-               wi.start_timestamp >= :start_ts AND wi.start_timestamp < :end_ts
-           ) OR (
-               COALESCE(wi.end_timestamp, :now_ts) > :start_ts AND COALESCE(wi.end_timestamp, :now_ts) <= :end_ts
-           ) OR (wi.start_timestamp < :start_ts AND wi.end_timestamp > :end_ts)
-        ) ww
-        """).bindparams(
-            start_ts=start_ts,
-            end_ts=end_ts,
-            now_ts=now_ts,
-        ),
+    boundaries = get_bucket_boundaries(start_ts, end_ts, bucket, tz)
+    if not boundaries:
+        return []
+
+    # The (start_ts, end_ts) buckets by a single parameter (the number of the buckets is not limited)
+    buckets_json = func.json_each(json.dumps(list(zip(boundaries, boundaries[1:])))).table_valued('key', 'value')
+    buckets_range = select(
+        buckets_json.c.key.label('i'),
+        func.json_extract(buckets_json.c.value, '$[0]').label('start_ts'),
+        func.json_extract(buckets_json.c.value, '$[1]').label('end_ts'),
+    ).subquery('buckets')
+    work_end_timestamp = func.coalesce(WorkItem.end_timestamp, now_ts)
+    work_seconds = func.sum(
+        func.min(work_end_timestamp, buckets_range.c.end_ts)
+        - func.max(WorkItem.start_timestamp, buckets_range.c.start_ts)
+    )
+    rows = db_session.execute(
+        select(
+            buckets_range.c.i,
+            WorkItem.task_id,
+            Task.name.label('task_name'),
+            Task.category_id,
+            Category.name.label('category_name'),
+            work_seconds.label('work_seconds'),
+        ).select_from(
+            WorkItem,
+        ).join(
+            WorkItem.task,
+        ).join(
+            Task.category,
+        ).join(
+            buckets_range,
+            and_(WorkItem.start_timestamp < buckets_range.c.end_ts, work_end_timestamp > buckets_range.c.start_ts),
+        ).where(
+            WorkItem.id.in_(
+                select(work_items_rtree.c.id).where(
+                    work_items_rtree.c.start_ts < end_ts,
+                    work_items_rtree.c.end_ts > start_ts,
+                )
+            ),
+            WorkItem.start_timestamp < end_ts,
+            work_end_timestamp > start_ts,
+        ).group_by(
+            buckets_range.c.i, WorkItem.task_id, Task.name, Task.category_id, Category.name,
+        ).order_by(
+            buckets_range.c.i, WorkItem.task_id,
+        )
     ).all()
+
+    buckets_rows = [[] for _ in boundaries[1:]]
+    for row in rows:
+        buckets_rows[row.i].append(row)
+
+    buckets = []
+    for i, task_rows in enumerate(buckets_rows):
+        by_category = by_task = None
+        if group_by == 'task':
+            by_task = [
+                (row.task_id, row.task_name, row.category_id, row.category_name, row.work_seconds)
+                for row in task_rows
+            ]
+        elif group_by == 'category':
+            category_seconds = defaultdict(int)
+            category_names = {}
+            for row in task_rows:
+                category_seconds[row.category_id] += row.work_seconds
+                category_names[row.category_id] = row.category_name
+            by_category = [
+                (category_id, category_names[category_id], seconds)
+                for category_id, seconds in sorted(category_seconds.items())
+            ]
+        buckets.append(WorkReportBucket(
+            start_ts=boundaries[i],
+            end_ts=boundaries[i + 1],
+            total=sum(row.work_seconds for row in task_rows),
+            by_category=by_category,
+            by_task=by_task,
+        ))
+    return buckets
+
+
+class WorkToday(NamedTuple):
+    total: int  # work seconds of the current local day, including the current work item
+    current: Row | None  # (closed_seconds,) id, start_timestamp, task_id, task_name of the current work item
+
+
+def work_get_today(db_session: Session) -> WorkToday:
+    """
+    The today total and the current work item by a single statement: the finished work items
+    of the day are read from the daily rollup, unless `day_total_cache` holds them for the
+    data version (checked by the statement: every write moves it), the
+    time of the current one is added here.
+    """
+    now_ts = get_now_timestamp()
+    day_start_ts = get_day_start_timestamp(now_ts)
+    cached = day_total_cache.get(day_start_ts)
+
+    current = (
+        select(
+            WorkItem.id,
+            WorkItem.start_timestamp,
+            WorkItem.task_id,
+            Task.name.label('task_name'),
+        )
+        .join(WorkItem.task)
+        .where(WorkItem.end_timestamp == None)
+        .subquery()
+    )
+    closed_seconds_column = (
+        select(func.coalesce(func.sum(WorkDailyRollup.work_seconds), 0))
+        .where(WorkDailyRollup.day == day_start_ts)
+        .scalar_subquery()
+    )
+    if cached is not None:
+        cached_version, cached_seconds = cached
+        # The rollup subquery is evaluated on a version mismatch only
+        closed_seconds_column = case(
+            (DataVersion.version == cached_version, literal(cached_seconds, Integer)),
+            else_=closed_seconds_column,
+        )
+    row = db_session.execute(
+        select(DataVersion.version, closed_seconds_column.label('closed_seconds'), current)
+        .select_from(DataVersion)
+        .outerjoin(current, true())
+        .where(DataVersion.id == DATA_VERSION_ID)
+    ).one()
+
+    closed_seconds = row.closed_seconds
+    if cached is None or cached[0] != row.version:
+        day_total_cache.put(day_start_ts, row.version, closed_seconds)
+
+    if row.id is None:
+        return WorkToday(total=closed_seconds, current=None)
+
+    current_seconds = max(now_ts - max(row.start_timestamp, day_start_ts), 0)
+    return WorkToday(
+        total=closed_seconds + current_seconds,
+        current=row,
+    )
+
+
+def work_get_today_total(db_session: Session) -> int:
+    """Work seconds of the current local day."""
+    return work_get_today(db_session).total
+
+
+def work_rollup_rebuild(db_session: Session) -> int:
+    """
+    Recalculate the daily rollup used by the reports from the work items.
+    The reports may change, so the data version is bumped (ETags, the report caches).
+    """
+    rows_count = rollup_rebuild(db_session)
+    db_session.execute(
+        update(DataVersion).where(DataVersion.id == DATA_VERSION_ID).values(version=DataVersion.version + 1)
+    )
+    return rows_count
+
+
+# Async
+#
+# Run the sync implementations via `AsyncSession.run_sync`: with an async driver
+# the DB IO is awaited on the event loop instead of holding a threadpool thread.
+
+async def data_version_read_async(db_session: AsyncSession) -> Row:
+    return await db_session.run_sync(data_version_read)
+
+
+async def work_report_data_version_async(
+    db_session: AsyncSession,
+    start_dt: datetime,
+    end_dt: datetime,
+) -> tuple[int, int | None]:
+    return await db_session.run_sync(work_report_data_version, start_dt, end_dt)
+
+
+async def work_get_today_async(db_session: AsyncSession) -> WorkToday:
+    return await db_session.run_sync(work_get_today)
+
+
+async def work_get_today_total_async(db_session: AsyncSession) -> int:
+    return await db_session.run_sync(work_get_today_total)
+
+
+async def task_list_async(
+        db_session: AsyncSession,
+        is_archived: bool | None = None,
+        is_current: bool | None = None,
+) -> Sequence[Row]:
+    return await db_session.run_sync(task_list, is_archived, is_current)
+
+
+async def work_item_list_rows_async(
+    db_session: AsyncSession,
+    order_by: list[str],
+    params: AbstractParams | None = None,
+) -> tuple[Sequence[Row], int | None, AbstractParams]:
+    return await db_session.run_sync(work_item_list_rows, order_by, params)
+
+
+async def work_item_list_cursor_async(
+    db_session: AsyncSession,
+    order_by: list[str],
+    cursor: str | None,
+    size: int,
+) -> tuple[Sequence[Row], str | None]:
+    return await db_session.run_sync(work_item_list_cursor, order_by, cursor, size)
+
+
+async def work_get_report_category_async(
+    db_session: AsyncSession,
+    start_dt: datetime,
+    end_dt: datetime,
+) -> Sequence[Row]:
+    return await db_session.run_sync(work_get_report_category, start_dt, end_dt)
+
+
+async def work_get_report_task_async(db_session: AsyncSession, start_dt: datetime, end_dt: datetime) -> Sequence[Row]:
+    return await db_session.run_sync(work_get_report_task, start_dt, end_dt)
+
+
+async def work_get_report_total_async(db_session: AsyncSession, start_dt: datetime, end_dt: datetime) -> Sequence[Row]:
+    return await db_session.run_sync(work_get_report_total, start_dt, end_dt)
+
+
+async def work_get_report_buckets_async(
+    db_session: AsyncSession,
+    start_dt: datetime,
+    end_dt: datetime,
+    bucket: str,
+    tz: tzinfo | None = None,
+    group_by: str | None = None,
+) -> list[WorkReportBucket]:
+    return await db_session.run_sync(work_get_report_buckets, start_dt, end_dt, bucket, tz, group_by)
+
+
+async def work_get_report_async(db_session: AsyncSession, start_dt: datetime, end_dt: datetime) -> WorkReport:
+    return await db_session.run_sync(work_get_report, start_dt, end_dt)
@@ -0,0 +1,231 @@
+"""
+The columnar snapshots of the work items (with their tasks and categories) for the offline
+analysis: a file per local month, Arrow IPC (memory-mapped by `snapshot_read`) or Parquet.
+
+Only the finished months are written, i.e. the months before the current one and before
+the start of the current work item. The later runs write the new months and rewrite the
+months with the work items changed since the previous run (by the work item changes log
+and the data version recorded in the state file of the directory); all the months are
+rewritten if the log has been trimmed since or the tasks or categories have changed.
+A month has a single file: rewritten in another format, the file of the previous one is removed.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+import services
+from database import ReadSessionLocal
+from dt import dt_to_ts, get_bucket_boundaries, get_month_start_timestamp, get_now_timestamp, ts_to_dt
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMATS = {
+    'arrow': '.arrow',
+    'parquet': '.parquet',
+}
+SNAPSHOT_PREFIX = 'work_items-'
+# The data version and the last work item change id written to the directory
+SNAPSHOT_STATE = 'snapshot.json'
+
+
+def _schema() -> 'pa.Schema':
+    timestamp = pa.timestamp('s', tz='UTC')
+    return pa.schema([
+        ('id', pa.int64()),
+        ('task_id', pa.int64()),
+        ('task_name', pa.string()),
+        ('category_id', pa.int64()),
+        ('category_name', pa.string()),
+        ('start_dt', timestamp),
+        ('end_dt', timestamp),
+    ])
+
+
+def _timestamps(column: Sequence[int | None]) -> list[datetime | None]:
+    """The stored timestamps (shifted by the local offset, see `dt.dt_to_ts`) as the aware datetimes."""
+    return [None if ts is None else ts_to_dt(ts) for ts in column]
+
+
+def _record_batch(rows: Sequence[Row], schema: 'pa.Schema') -> 'pa.RecordBatch':
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(_timestamps(column) if pa.types.is_timestamp(field.type) else column, type=field.type)
+            for column, field in zip(columns, schema)
+        ],
+        schema=schema,
+    )
+
+
+def _write(path: Path, snapshot_format: str, partitions: Iterable[Sequence[Row]]) -> int:
+    """Write the rows partitions to the file atomically, returns the number of rows."""
+    schema = _schema()
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    rows_count = 0
+    if snapshot_format == 'arrow':
+        writer = pa.ipc.new_file(str(tmp_path), schema)
+    else:
+        writer = pa.parquet.ParquetWriter(str(tmp_path), schema)
+    with writer:
+        for rows in partitions:
+            writer.write_batch(_record_batch(rows, schema))
+            rows_count += len(rows)
+    os.replace(tmp_path, path)
+    return rows_count
+
+
+def _month(ts: int) -> str:
+    return f'{ts_to_dt(ts):%Y-%m}'
+
+
+def _read(path: Path) -> 'pa.Table':
+    if path.suffix == SNAPSHOT_FORMATS['arrow']:
+        return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    # Parquet keeps the timestamps of seconds as milliseconds
+    return pa.parquet.read_table(path, memory_map=True).cast(_schema())
+
+
+def _read_state(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _write_state(path: Path, state: dict) -> None:
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(json.dumps(state))
+    os.replace(tmp_path, path)
+
+
+def _changed_months(
+    db_session: Session,
+    state: dict | None,
+    current_state: Row,
+    month_paths: dict[str, list[Path]],
+) -> set[str] | None:
+    """The months of the work items changed since the state, None if unknown (i.e. all)."""
+    version, change_id, first_change_id = current_state
+    if state is None:
+        return None
+    if state['version'] == version:
+        return set()
+    is_logged = (
+        change_id >= state['change_id']
+        # every change since is a work item change, i.e. no tasks and categories changes
+        and version - state['version'] == change_id - state['change_id']
+        and first_change_id is not None and first_change_id <= state['change_id'] + 1
+    )
+    if not is_logged:
+        return None
+
+    changes = services.work_item_snapshot_changes(db_session, state['change_id'])
+    months = {_month(start_ts) for _, start_ts in changes if start_ts is not None}
+    # The months the changed work items were in: deleted or moved to another month
+    changed_ids = pa.array([work_item_id for work_item_id, _ in changes], type=pa.int64())
+    for month, paths in month_paths.items():
+        if month not in months and any(pa.compute.any(pa.compute.is_in(
+            _read(path).column('id'), value_set=changed_ids,
+        )).as_py() for path in paths):
+            months.add(month)
+    return months
+
+
+def snapshot_write(db_session: Session, directory: str, snapshot_format: str = 'arrow') -> list[Path]:
+    """
+    Write the finished months missing in the directory or changed since the previous run,
+    returns the written files.
+    """
+    if pa is None:
+        raise RuntimeError('The snapshots require PyArrow')
+    if snapshot_format not in SNAPSHOT_FORMATS:
+        raise ValueError(f'Unknown snapshot format: {snapshot_format}')
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    month_paths = defaultdict(list)
+    for path in directory.glob(f'{SNAPSHOT_PREFIX}*'):
+        if path.suffix in SNAPSHOT_FORMATS.values():
+            month_paths[path.name[len(SNAPSHOT_PREFIX):-len(path.suffix)]].append(path)
+    state_path = directory / SNAPSHOT_STATE
+    current_state = services.work_item_snapshot_state(db_session)
+    changed_months = _changed_months(db_session, _read_state(state_path), current_state, month_paths)
+
+    first_start_ts, current_start_ts = services.work_item_snapshot_bounds(db_session)
+    # The months of the written files before the first work item are rewritten empty if changed
+    month_starts_ts = [dt_to_ts(datetime.strptime(month, '%Y-%m').astimezone()) for month in month_paths]
+    if first_start_ts is not None:
+        month_starts_ts.append(get_month_start_timestamp(first_start_ts))
+    if not month_starts_ts:
+        return []
+    end_ts = get_month_start_timestamp(min(get_now_timestamp(), current_start_ts or get_now_timestamp()))
+
+    written = []
+    boundaries = get_bucket_boundaries(min(month_starts_ts), end_ts, 'month')
+    for month_start_ts, month_end_ts in zip(boundaries, boundaries[1:]):
+        month = _month(month_start_ts)
+        paths = month_paths.get(month, [])
+        if paths and changed_months is not None and month not in changed_months:
+            continue
+        path = directory / f'{SNAPSHOT_PREFIX}{month}{SNAPSHOT_FORMATS[snapshot_format]}'
+        rows_count = _write(
+            path,
+            snapshot_format,
+            services.work_item_snapshot(db_session, month_start_ts, month_end_ts),
+        )
+        for other_path in paths:
+            if other_path != path:
+                other_path.unlink()
+        logger.info('Snapshot %s written: %d work items', path, rows_count)
+        written.append(path)
+    _write_state(state_path, {'version': current_state.version, 'change_id': current_state.change_id})
+    return written
+
+
+def snapshot_read(directory: str) -> 'pa.Table':
+    """
+    All the months of the directory as a single table. The Arrow IPC files are memory-mapped:
+    the columns are not copied (nor read until accessed), the Parquet files are decoded.
+    """
+    if pa is None:
+        raise RuntimeError('The snapshots require PyArrow')
+
+    tables = [
+        _read(path)
+        for path in sorted(Path(directory).glob(f'{SNAPSHOT_PREFIX}*'))
+        if path.suffix in SNAPSHOT_FORMATS.values()
+    ]
+    if not tables:
+        return _schema().empty_table()
+    return pa.concat_tables(tables)
+
+
+def _snapshot_write_job(directory: str, snapshot_format: str) -> None:
+    with ReadSessionLocal.begin() as db_session:
+        snapshot_write(db_session, directory, snapshot_format)
+
+
+async def snapshot_job(directory: str, snapshot_format: str, interval: float) -> None:
+    """Write the new months every interval in a thread, by a read-only session."""
+    while True:
+        try:
+            await asyncio.to_thread(_snapshot_write_job, directory, snapshot_format)
+        except Exception:
+            logger.exception('Cannot write the snapshot')
+        await asyncio.sleep(interval)
@@ -0,0 +1,105 @@
+"""Per-statement SQL execution statistics and the slow query log."""
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event, Engine
+
+from config import get_slow_query_threshold
+
+slow_query_logger = logging.getLogger(f'{__name__}.slow')
+# Read once: checked after every statement
+slow_query_threshold = get_slow_query_threshold()
+
+# Upper bounds (ms) of the latency histogram buckets, the last bucket is unbounded
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDERS_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize the statement: drop literals and formatting to group similar statements together."""
+    statement = _STRING_LITERAL_RE.sub('?', statement)
+    statement = _NUMBER_LITERAL_RE.sub('?', statement)
+    statement = _WHITESPACE_RE.sub(' ', statement).strip()
+    return _PLACEHOLDERS_LIST_RE.sub('(...)', statement)
+
+
+class StatementStats:
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+    def add(self, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.histogram[bisect_left(HISTOGRAM_BUCKETS_MS, elapsed * 1000)] += 1
+
+    def as_dict(self) -> dict:
+        return {
+            'statement': self.statement,
+            'count': self.count,
+            'total_time': self.total_time,
+            'avg_time': self.total_time / self.count,
+            'max_time': self.max_time,
+            'histogram': {
+                f'le_{bound}ms': count
+                for bound, count in zip(HISTOGRAM_BUCKETS_MS + ('inf',), self.histogram)
+            },
+        }
+
+
+_stats: dict[str, StatementStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('sql_stats_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['sql_stats_start'].pop()
+    key = fingerprint(statement)
+    with _stats_lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = StatementStats(key)
+        stats.add(elapsed)
+
+    if elapsed * 1000 >= slow_query_threshold:
+        slow_query_logger.warning('Slow query (%.1f ms): %s; parameters: %r', elapsed * 1000, statement, parameters)
+
+
+def _handle_error(exception_context):
+    # The failed statement has no `after_cursor_execute`
+    starts = exception_context.connection is not None and exception_context.connection.info.get('sql_stats_start')
+    if starts:
+        starts.pop()
+
+
+def instrument(engine: Engine) -> None:
+    """Collect the statistics of all statements executed by the engine."""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+
+def get_stats() -> list[dict]:
+    """Aggregates per statement fingerprint, the most time consuming first."""
+    with _stats_lock:
+        rows = [stats.as_dict() for stats in _stats.values()]
+    return sorted(rows, key=lambda row: row['total_time'], reverse=True)
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
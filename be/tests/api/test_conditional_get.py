@@ -0,0 +1,70 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api import app
+from dt import dt_to_ts
+from tests.const import FROZEN_LOCAL_DT
+from tests.factories import CategoryFactory, TaskFactory, WorkItemFactory
+
+client = TestClient(app)
+
+
+def test_conditional_get_not_modified(session):
+    CategoryFactory()
+    response = client.get('/api/categories')
+    etag = response.headers['etag']
+
+    response = client.get('/api/categories', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.headers['etag'] == etag
+    assert response.content == b''
+
+
+def test_conditional_get_modified(session):
+    etag = client.get('/api/categories').headers['etag']
+
+    response = client.post('/api/categories', json={'name': 'CategoryName', 'description': None})
+    assert response.status_code == 201
+
+    response = client.get('/api/categories', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
+    assert [category['name'] for category in response.json()] == ['CategoryName']
+
+
+def test_conditional_get_params(session):
+    etag = client.get('/api/tasks', params={'is_archived': True}).headers['etag']
+
+    response = client.get('/api/tasks', params={'is_archived': False}, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
+
+
+def test_conditional_get_report_current_work_item(session, frozen_ts):
+    task = TaskFactory()
+    today = FROZEN_LOCAL_DT.replace(hour=0, minute=0, second=0, microsecond=0)
+    WorkItemFactory(task=task, start_timestamp=dt_to_ts(today), end_timestamp=dt_to_ts(today) + 3600)
+    params = {
+        'start_datetime': today.isoformat(),
+        'end_datetime': (today + timedelta(days=1)).isoformat(),
+    }
+    etag = client.get('/api/work/report_total', params=params).headers['etag']
+
+    # Not changed without the current work item
+    with patch('services.get_now_timestamp', return_value=frozen_ts + 60):
+        assert client.get('/api/work/report_total', params=params, headers={'If-None-Match': etag}).status_code == 304
+
+    WorkItemFactory(task=task, start_timestamp=frozen_ts - 60, end_timestamp=None)
+    response = client.get('/api/work/report_total', params=params, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    etag = response.headers['etag']
+
+    # The time of the current work item grows
+    with patch('services.get_now_timestamp', return_value=frozen_ts + 60):
+        response = client.get('/api/work/report_total', params=params, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json() == {'time': 3600 + 120}
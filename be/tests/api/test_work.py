@@ -1,5 +1,7 @@
+import pytest
 from starlette.testclient import TestClient
 
+import services
 from api import app
 from dt import ts_to_dt
 from tests.factories import TaskFactory, WorkItemFactory
@@ -33,7 +35,7 @@ def test_work_start(session, frozen_ts):
 def test_work_stop_current(session, frozen_ts):
     # Arrange
     task = TaskFactory()
-    wi_current = WorkItemFactory(task=task, end_timestamp=None)
+    wi_current = WorkItemFactory(task=task, start_timestamp=frozen_ts - 3600, end_timestamp=None)
     expected_end_timestamp = frozen_ts
 
     # Act
@@ -44,3 +46,90 @@ def test_work_stop_current(session, frozen_ts):
     assert response.json() == None
     session.refresh(wi_current)
     assert wi_current.end_timestamp == expected_end_timestamp
+
+
+@pytest.mark.parametrize('start_offset', [0, 60])
+def test_work_stop_current_within_start_second_error(session, frozen_ts, start_offset):
+    wi_current = WorkItemFactory(start_timestamp=frozen_ts + start_offset, end_timestamp=None)
+
+    response = client.post('/api/work/stop_current')
+
+    assert response.status_code == 400
+    assert response.json() == 'Cannot stop work: it has to last at least a second'
+    session.refresh(wi_current)
+    assert (wi_current.start_timestamp, wi_current.end_timestamp) == (frozen_ts + start_offset, None)
+
+
+def test_work_start_already_started_error(session, frozen_ts):
+    # Arrange
+    task = TaskFactory()
+    WorkItemFactory(task=task, start_timestamp=frozen_ts - 3600, end_timestamp=None)
+
+    # Act
+    response = client.post('/api/work/start', json={'task_id': task.id})
+
+    # Assert
+    assert response.status_code == 400
+    assert response.json() == 'Cannot start work: already started'
+
+
+def test_work_today(session, frozen_ts):
+    # Arrange
+    task = TaskFactory()
+    WorkItemFactory(task=task, start_timestamp=frozen_ts - 7200, end_timestamp=frozen_ts - 3600)
+    WorkItemFactory(task=task, start_timestamp=frozen_ts - 86400 * 2, end_timestamp=frozen_ts - 86400 * 2 + 60)
+    wi_current = WorkItemFactory(task=task, start_timestamp=frozen_ts - 600, end_timestamp=None)
+
+    # Act
+    response = client.get('/api/work/today')
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {
+        'total': {'time': 3600 + 600},
+        'current': {
+            'id': wi_current.id,
+            'task': {
+                'id': task.id,
+                'name': task.name,
+            },
+            'start_dt': ts_to_dt(wi_current.start_timestamp).isoformat(),
+            'end_dt': None,
+        },
+    }
+
+
+def test_work_today_closed_total_invalidated(session, frozen_ts):
+    # Arrange
+    task = TaskFactory()
+    WorkItemFactory(task=task, start_timestamp=frozen_ts - 7200, end_timestamp=frozen_ts - 3600)
+    session.commit()
+    assert client.get('/api/work/today').json() == {'total': {'time': 3600}, 'current': None}
+
+    # Act
+    client.post('/api/work/items/', json={
+        'task_id': task.id,
+        'start_dt': ts_to_dt(frozen_ts - 1800).isoformat(),
+        'end_dt': ts_to_dt(frozen_ts - 1200).isoformat(),
+    })
+    session.commit()
+    response = client.get('/api/work/today')
+
+    # Assert
+    assert response.json() == {'total': {'time': 3600 + 600}, 'current': None}
+
+
+def test_work_today_closed_total_of_other_process_write(session, frozen_ts):
+    # Arrange
+    task = TaskFactory()
+    WorkItemFactory(task=task, start_timestamp=frozen_ts - 7200, end_timestamp=frozen_ts - 3600)
+    session.commit()
+    assert client.get('/api/work/today').json() == {'total': {'time': 3600}, 'current': None}
+
+    # Act: the data version is moved by the triggers
+    services.work_item_create(session, ts_to_dt(frozen_ts - 1800), ts_to_dt(frozen_ts - 600), task.id)
+    session.commit()
+    response = client.get('/api/work/today')
+
+    # Assert
+    assert response.json() == {'total': {'time': 3600 + 1200}, 'current': None}
@@ -1,3 +1,7 @@
+import csv
+import io
+import json
+
 import pytest
 from starlette.testclient import TestClient
 
@@ -258,3 +262,237 @@ def test_work_item_update_start_equal_or_more_end_error(session, delta):
     assert response.json() == 'The start date and time of the work element must be before its end.'
     session.refresh(work_item)
     assert work_item.start_timestamp == old_start_timestamp
+
+
+@pytest.mark.parametrize('start_delta,end_delta', [
+    (150, 250),  # intersects the existing WI range
+    (200, 300),  # on the board of the existing WI range
+    (300, None),  # the second current WI
+])
+def test_work_items_add_conflict_error(session, start_delta, end_delta):
+    now = get_now_timestamp()
+    WorkItemFactory(start_timestamp=now+101, end_timestamp=now+200)
+    WorkItemFactory(start_timestamp=now+201, end_timestamp=None)  # current WorkItem
+    task = TaskFactory()
+    create_data = {
+        'task_id': task.id,
+        'start_dt': ts_to_dt(now+start_delta).isoformat(),
+        'end_dt': None if end_delta is None else ts_to_dt(now+end_delta).isoformat(),
+    }
+
+    response = client.post('/api/work/items/', json=create_data)
+
+    assert response.status_code == 400
+    assert response.json() == 'The work item with this date and time range already exists.'
+    assert session.query(WorkItem).filter(WorkItem.task_id == task.id).count() == 0
+
+
+def test_work_items_add_start_equal_or_more_end_error(session):
+    task = TaskFactory()
+    now = get_now_timestamp()
+    create_data = {
+        'task_id': task.id,
+        'start_dt': ts_to_dt(now).isoformat(),
+        'end_dt': ts_to_dt(now).isoformat(),
+    }
+
+    response = client.post('/api/work/items/', json=create_data)
+
+    assert response.status_code == 400
+    assert response.json() == 'The start date and time of the work element must be before its end.'
+    assert session.query(WorkItem).filter(WorkItem.task_id == task.id).count() == 0
+
+
+def test_work_items_add_bulk(session):
+    task = TaskFactory()
+    now = get_now_timestamp()
+    WorkItemFactory(start_timestamp=now-1000, end_timestamp=now-500)
+    create_data = [{
+        'task_id': task.id,
+        'start_dt': ts_to_dt(now + start_delta).isoformat(),
+        'end_dt': None if end_delta is None else ts_to_dt(now + end_delta).isoformat(),
+    } for start_delta, end_delta in [(300, 400), (0, 100), (500, None), (101, 200)]]
+
+    response = client.post('/api/work/items/bulk', json=create_data)
+
+    assert response.status_code == 201
+    res_json = response.json()
+    assert res_json == [{
+        'id': item['id'],
+        'task': {'id': task.id, 'name': task.name},
+        'start_dt': data['start_dt'],
+        'end_dt': data['end_dt'],
+    } for item, data in zip(res_json, sorted(create_data, key=lambda data: data['start_dt']))]
+    created = session.query(WorkItem).filter(WorkItem.task_id == task.id).order_by(WorkItem.start_timestamp).all()
+    assert [(wi.start_timestamp, wi.end_timestamp) for wi in created] == [
+        (now, now + 100), (now + 101, now + 200), (now + 300, now + 400), (now + 500, None),
+    ]
+
+
+@pytest.mark.parametrize('ranges', [
+    [(0, 100), (100, 200)],  # on the board of each other
+    [(0, 100), (50, None)],  # the current WI inside the other one
+    [(0, None), (50, None)],  # two current WIs
+    [(-1500, -1400)],  # inside the existing WI and contains another one
+    [(-600, -400)],  # on the board of the existing WI
+])
+def test_work_items_add_bulk_conflict_error(session, ranges):
+    task = TaskFactory()
+    now = get_now_timestamp()
+    WorkItemFactory(start_timestamp=now-2000, end_timestamp=now-1000)
+    WorkItemFactory(start_timestamp=now-1450, end_timestamp=now-1420)
+    WorkItemFactory(start_timestamp=now-800, end_timestamp=now-600)
+    create_data = [{
+        'task_id': task.id,
+        'start_dt': ts_to_dt(now + start_delta).isoformat(),
+        'end_dt': None if end_delta is None else ts_to_dt(now + end_delta).isoformat(),
+    } for start_delta, end_delta in ranges]
+
+    response = client.post('/api/work/items/bulk', json=create_data)
+
+    assert response.status_code == 400
+    assert response.json() == 'The work item with this date and time range already exists.'
+    assert session.query(WorkItem).filter(WorkItem.task_id == task.id).count() == 0
+
+
+def test_work_items_export_ndjson(session):
+    now = get_now_timestamp()
+    task = TaskFactory()
+    WorkItemFactory(task=task, start_timestamp=now-2000, end_timestamp=now-1000)  # before the range
+    work_item1 = WorkItemFactory(task=task, start_timestamp=now-500, end_timestamp=now+500)
+    WorkItemFactory(start_timestamp=now+600, end_timestamp=now+700)  # another task
+    work_item2 = WorkItemFactory(task=task, start_timestamp=now+800, end_timestamp=None)
+
+    response = client.get('/api/work/items/export', params={
+        'start_datetime': ts_to_dt(now).isoformat(),
+        'end_datetime': ts_to_dt(now + 1000).isoformat(),
+        'task_id': task.id,
+    })
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.text.splitlines()] == [{
+        'id': work_item.id,
+        'task_id': task.id,
+        'task_name': task.name,
+        'start_dt': ts_to_dt(work_item.start_timestamp).isoformat(),
+        'end_dt': work_item.end_timestamp and ts_to_dt(work_item.end_timestamp).isoformat(),
+    } for work_item in [work_item1, work_item2]]
+
+
+def test_work_items_export_csv(session):
+    work_items = WorkItemFactory.create_batch(3)
+
+    response = client.get('/api/work/items/export', params={'format': 'csv'})
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    assert list(csv.reader(io.StringIO(response.text))) == [
+        ['id', 'task_id', 'task_name', 'start_dt', 'end_dt'],
+        *([
+            str(wi.id),
+            str(wi.task.id),
+            wi.task.name,
+            ts_to_dt(wi.start_timestamp).isoformat(),
+            ts_to_dt(wi.end_timestamp).isoformat(),
+        ] for wi in work_items),
+    ]
+
+
+@pytest.mark.parametrize('order_by,sorted_key,reverse', [
+    (None, 'id', False),
+    ('start_dt', 'start_timestamp', False),
+    ('-start_dt', 'start_timestamp', True),
+    ('end_dt', 'end_timestamp', False),
+    ('-end_dt', 'end_timestamp', True),
+    ('task_id', 'task_id', False),
+])
+def test_work_items_list_cursor(session, order_by, sorted_key, reverse):
+    task1, task2 = TaskFactory(), TaskFactory()
+    work_items = [
+        *WorkItemFactory.create_batch(4, task=task1),
+        *WorkItemFactory.create_batch(3, task=task2),
+        WorkItemFactory(task=task1, end_timestamp=None),  # the current WI
+    ]
+    # NULL (the current WI) is the least value, the equal keys are ordered by ascending id
+    expected_ids = [wi.id for wi in sorted(
+        work_items,
+        key=lambda wi: (
+            getattr(wi, sorted_key) is not None,
+            getattr(wi, sorted_key) or 0,
+            -wi.id if reverse else wi.id,
+        ),
+        reverse=reverse,
+    )]
+    params = {'size': 3}
+    if order_by:
+        params['order_by'] = order_by
+
+    ids = []
+    pages = 0
+    while True:
+        response = client.get('/api/work/items/cursor', params=params)
+        assert response.status_code == 200
+        page = response.json()
+        ids.extend(item['id'] for item in page['items'])
+        pages += 1
+        if page['next_cursor'] is None:
+            break
+        params['cursor'] = page['next_cursor']
+
+    assert ids == expected_ids
+    assert pages == 3
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor',
+    'eyJvcmRlcl9ieSI6IFsiaWQiXSwgImtleSI6IFsxLCAyXX0=',  # {"order_by": ["id"], "key": [1, 2]}: another ordering
+])
+def test_work_items_list_cursor_error(session, cursor):
+    WorkItemFactory()
+
+    response = client.get('/api/work/items/cursor', params={'cursor': cursor})
+
+    assert response.status_code == 400
+
+
+def test_work_items_list_without_total(session):
+    work_items = WorkItemFactory.create_batch(3)
+
+    response = client.get('/api/work/items/?size=2&include_total=false')
+
+    assert response.status_code == 200
+    assert response.json() == {
+        'items': [{
+            'id': i.id,
+            'task': {'id': i.task.id, 'name': i.task.name},
+            'start_dt': ts_to_dt(i.start_timestamp).isoformat(),
+            'end_dt': ts_to_dt(i.end_timestamp).isoformat(),
+        } for i in work_items[:2]],
+        'page': 1,
+        'pages': None,
+        'size': 2,
+        'total': None,
+    }
+
+
+def test_work_items_list_total_row_count(session):
+    now = get_now_timestamp()
+    task = TaskFactory()
+    work_item = WorkItemFactory()
+    client.post('/api/work/items/', json={
+        'task_id': task.id,
+        'start_dt': ts_to_dt(now - 3000).isoformat(),
+        'end_dt': ts_to_dt(now - 2000).isoformat(),
+    })
+    client.post('/api/work/items/bulk', json=[{
+        'task_id': task.id,
+        'start_dt': ts_to_dt(now - 1000 + i * 100).isoformat(),
+        'end_dt': ts_to_dt(now - 950 + i * 100).isoformat(),
+    } for i in range(3)])
+    client.delete(f'/api/work/items/{work_item.id}')
+
+    response = client.get('/api/work/items/')
+
+    assert response.status_code == 200
+    assert response.json()['total'] == session.query(WorkItem).count() == 4
@@ -1,8 +1,12 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 
 from api import app
+from database import engine
 from dt import dt_to_ts
 from tests.const import LOCAL_TZ, FROZEN_LOCAL_DT
 from tests.factories import CategoryFactory, TaskFactory, WorkItemFactory
@@ -791,3 +795,207 @@ def test_get_work_report_start_out_end_out_range(session, frozen_ts):
         },
         'time': 24.0 * 60 * 60,
     }]
+
+
+def test_get_work_report_combined(session, frozen_ts):
+    """The combined report is the same as the separate reports, by a single query."""
+    # Arrange
+    category1 = CategoryFactory()
+    category2 = CategoryFactory()
+    task_c1_1 = TaskFactory(category=category1, work_items=[])
+    task_c1_2 = TaskFactory(category=category1, work_items=[])
+    task_c2_1 = TaskFactory(category=category2, work_items=[])
+    today = FROZEN_LOCAL_DT.replace(hour=0, minute=0, second=0, microsecond=0)
+    for days, task in enumerate([task_c1_1, task_c2_1, task_c1_2, task_c1_1]):
+        WorkItemFactory(
+            task=task,
+            start_timestamp=dt_to_ts(today - timedelta(days=days, hours=10)),
+            end_timestamp=dt_to_ts(today - timedelta(days=days, hours=7)),
+        )
+    WorkItemFactory(task=task_c2_1, start_timestamp=frozen_ts - 1800, end_timestamp=None)  # current
+    params = {
+        'start_datetime': (today - timedelta(days=4)).isoformat(),
+        'end_datetime': (today + timedelta(days=1)).isoformat(),
+    }
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Act
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get('/api/work/report', params=params)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {
+        'by_category': client.get('/api/work/report_by_category', params=params).json(),
+        'by_task': client.get('/api/work/report_by_task', params=params).json(),
+        'total': client.get('/api/work/report_total', params=params).json(),
+    }
+    assert response.json()['total'] == {'time': 4 * 3 * 60 * 60 + 1800}
+    report_statements = [
+        statement for statement in statements
+        if 'work_items' in statement and 'data_version' not in statement  # not the ETag lookup
+    ]
+    assert len(report_statements) == 1
+
+
+@pytest.mark.parametrize('params', [
+    {'start_datetime': datetime(2023, 3, 15, tzinfo=LOCAL_TZ).isoformat()},
+    {'end_datetime': datetime(2023, 4, 16, tzinfo=LOCAL_TZ).isoformat()},
+])
+@pytest.mark.parametrize('url', ['/api/work/report', '/api/work/report_buckets'])
+def test_get_work_report_half_specified_range(session, params, url):
+    response = client.get(url, params=params)
+
+    assert response.status_code == 400
+
+
+def test_get_work_report_buckets_dst(session, frozen_ts):
+    # Arrange
+    berlin = ZoneInfo('Europe/Berlin')
+    category = CategoryFactory(name='CategoryName1')
+    task1 = TaskFactory(name='TaskName1', category=category, work_items=[])
+    task2 = TaskFactory(name='TaskName2', category=category, work_items=[])
+    WorkItemFactory(
+        task=task1,
+        start_timestamp=dt_to_ts(datetime(2023, 3, 25, 22, tzinfo=berlin)),
+        end_timestamp=dt_to_ts(datetime(2023, 3, 26, 4, tzinfo=berlin)),
+    )  # 2 hours on 25th, 3 hours on 26th (the clocks go forward at 2:00)
+    WorkItemFactory(
+        task=task2,
+        start_timestamp=dt_to_ts(datetime(2023, 3, 27, 10, tzinfo=berlin)),
+        end_timestamp=dt_to_ts(datetime(2023, 3, 27, 11, tzinfo=berlin)),
+    )
+
+    # Act
+    response = client.get('/api/work/report_buckets', params={
+        'start_datetime': datetime(2023, 3, 25, tzinfo=berlin).isoformat(),
+        'end_datetime': datetime(2023, 3, 28, tzinfo=berlin).isoformat(),
+        'bucket': 'day',
+        'tz': 'Europe/Berlin',
+        'group_by': 'task',
+    })
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            'start_dt': '2023-03-25T00:00:00+01:00',
+            'end_dt': '2023-03-26T00:00:00+01:00',
+            'total': {'time': 2 * 3600},
+            'by_category': None,
+            'by_task': [{
+                'task': {'id': task1.id, 'name': 'TaskName1', 'category': {'id': category.id, 'name': 'CategoryName1'}},
+                'time': 2 * 3600,
+            }],
+        },
+        {
+            'start_dt': '2023-03-26T00:00:00+01:00',
+            'end_dt': '2023-03-27T00:00:00+02:00',  # 23 hours
+            'total': {'time': 3 * 3600},
+            'by_category': None,
+            'by_task': [{
+                'task': {'id': task1.id, 'name': 'TaskName1', 'category': {'id': category.id, 'name': 'CategoryName1'}},
+                'time': 3 * 3600,
+            }],
+        },
+        {
+            'start_dt': '2023-03-27T00:00:00+02:00',
+            'end_dt': '2023-03-28T00:00:00+02:00',
+            'total': {'time': 3600},
+            'by_category': None,
+            'by_task': [{
+                'task': {'id': task2.id, 'name': 'TaskName2', 'category': {'id': category.id, 'name': 'CategoryName1'}},
+                'time': 3600,
+            }],
+        },
+    ]
+
+
+@pytest.mark.parametrize('tz', ['Europe/Berlin', None])
+def test_get_work_report_buckets_non_utc_host(berlin_host, session, tz):
+    berlin = ZoneInfo('Europe/Berlin')
+    task = TaskFactory(work_items=[])
+    WorkItemFactory(
+        task=task,
+        start_timestamp=dt_to_ts(datetime(2024, 1, 1, 23, 30, tzinfo=berlin)),
+        end_timestamp=dt_to_ts(datetime(2024, 1, 2, 0, 30, tzinfo=berlin)),
+    )
+    WorkItemFactory(
+        task=task,
+        start_timestamp=dt_to_ts(datetime(2024, 1, 2, 10, tzinfo=berlin)),
+        end_timestamp=dt_to_ts(datetime(2024, 1, 2, 11, tzinfo=berlin)),
+    )
+
+    response = client.get('/api/work/report_buckets', params={
+        'start_datetime': datetime(2024, 1, 1, tzinfo=berlin).isoformat(),
+        'end_datetime': datetime(2024, 1, 3, tzinfo=berlin).isoformat(),
+        'bucket': 'day',
+        **({} if tz is None else {'tz': tz}),
+    })
+
+    assert response.status_code == 200
+    assert [(bucket['start_dt'], bucket['end_dt'], bucket['total']['time']) for bucket in response.json()] == [
+        ('2024-01-01T00:00:00+01:00', '2024-01-02T00:00:00+01:00', 1800),
+        ('2024-01-02T00:00:00+01:00', '2024-01-03T00:00:00+01:00', 1800 + 3600),
+    ]
+
+
+def test_get_work_report_buckets_month_by_category(session, frozen_ts):
+    # Arrange
+    category1 = CategoryFactory(name='CategoryName1')
+    category2 = CategoryFactory(name='CategoryName2')
+    task1 = TaskFactory(category=category1, work_items=[])
+    task2 = TaskFactory(category=category2, work_items=[])
+    WorkItemFactory(
+        task=task1,
+        start_timestamp=dt_to_ts(datetime(2023, 5, 31, 23, tzinfo=timezone.utc)),
+        end_timestamp=dt_to_ts(datetime(2023, 6, 1, 1, tzinfo=timezone.utc)),
+    )
+    WorkItemFactory(task=task2, start_timestamp=frozen_ts - 600, end_timestamp=None)  # the current one
+
+    # Act
+    response = client.get('/api/work/report_buckets', params={
+        'start_datetime': datetime(2023, 5, 15, tzinfo=timezone.utc).isoformat(),
+        'end_datetime': datetime(2023, 7, 1, tzinfo=timezone.utc).isoformat(),
+        'bucket': 'month',
+        'tz': 'UTC',
+        'group_by': 'category',
+    })
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            'start_dt': '2023-05-15T00:00:00+00:00',
+            'end_dt': '2023-06-01T00:00:00+00:00',
+            'total': {'time': 3600},
+            'by_category': [{'category': {'id': category1.id, 'name': 'CategoryName1'}, 'time': 3600}],
+            'by_task': None,
+        },
+        {
+            'start_dt': '2023-06-01T00:00:00+00:00',
+            'end_dt': '2023-07-01T00:00:00+00:00',
+            'total': {'time': 3600 + 600},
+            'by_category': [
+                {'category': {'id': category1.id, 'name': 'CategoryName1'}, 'time': 3600},
+                {'category': {'id': category2.id, 'name': 'CategoryName2'}, 'time': 600},
+            ],
+            'by_task': None,
+        },
+    ]
+
+
+def test_get_work_report_buckets_unknown_tz(session):
+    response = client.get('/api/work/report_buckets', params={
+        'start_datetime': datetime(2023, 5, 15, tzinfo=timezone.utc).isoformat(),
+        'end_datetime': datetime(2023, 7, 1, tzinfo=timezone.utc).isoformat(),
+        'tz': 'Mars/Olympus_Mons',
+    })
+
+    assert response.status_code == 400
@@ -0,0 +1,57 @@
+from sqlalchemy import select, update
+
+import services
+from models import ActiveWork, WorkItem
+from tests.factories import TaskFactory, WorkItemFactory
+from tests.test_query_plans import explain, last_statement
+
+
+def active_work(session) -> tuple[int, int] | None:
+    return session.execute(select(ActiveWork.work_item_id, ActiveWork.task_id)).one_or_none()
+
+
+def test_active_work_sync(session):
+    task, other_task = TaskFactory(), TaskFactory()
+    WorkItemFactory(task=task)
+    assert active_work(session) is None
+
+    work_item = WorkItemFactory(task=task, start_timestamp=1704067200, end_timestamp=None)
+    assert active_work(session) == (work_item.id, task.id)
+
+    work_item.task = other_task
+    session.flush()
+    assert active_work(session) == (work_item.id, other_task.id)
+
+    work_item.end_timestamp = 1704070800
+    session.flush()
+    assert active_work(session) is None
+
+    session.execute(update(WorkItem).where(WorkItem.id == work_item.id).values(end_timestamp=None))
+    assert active_work(session) == (work_item.id, other_task.id)
+
+    session.delete(work_item)
+    session.flush()
+    assert active_work(session) is None
+
+
+def test_active_work_services(session, frozen_ts):
+    task = TaskFactory()
+
+    work_item = services.work_item_start(session, task.id, frozen_ts - 3600)
+    assert active_work(session) == (work_item.id, task.id)
+    assert [row.id for row in services.task_list(session, is_current=True)] == [task.id]
+    assert services.task_read(session, task.id).is_current
+
+    services.work_item_stop_current(session)
+    assert active_work(session) is None
+    assert services.task_list(session, is_current=True) == []
+    assert not services.task_read(session, task.id).is_current
+
+
+def test_task_list_is_current_lookup(session):
+    statement, parameters = last_statement(session, lambda s: services.task_list(s, is_current=True))
+
+    plan = explain(session, statement, parameters)
+
+    assert not any('work_items' in line for line in plan), plan
+    assert any(line.startswith('SEARCH tasks USING INTEGER PRIMARY KEY') for line in plan), plan
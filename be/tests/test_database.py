@@ -0,0 +1,111 @@
+import logging
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+import database
+import services
+from config import SQLITE_PROFILES, get_database_filename
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+def make_request(method: str) -> Request:
+    return Request({'type': 'http', 'method': method, 'headers': []})
+
+
+@pytest.mark.parametrize('profile_name', SQLITE_PROFILES.keys())
+def test_sqlite_profile_pragmas_applied(monkeypatch, tmp_path, profile_name):
+    monkeypatch.setenv('TIMESHEET_DB_PROFILE', profile_name)
+    engine = database._create_engine(f'sqlite:///{tmp_path / "profile.db"}')
+
+    with engine.connect() as connection:
+        for name, value in SQLITE_PROFILES[profile_name].items():
+            actual = connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+            if name == 'synchronous':
+                actual = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}[actual]
+            elif name == 'temp_store':
+                actual = {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'}[actual]
+            assert str(actual).upper() == str(value).upper(), name
+    engine.dispose()
+
+
+def test_sqlite_profile_unknown(monkeypatch):
+    monkeypatch.setenv('TIMESHEET_DB_PROFILE', 'unknown')
+
+    with pytest.raises(ValueError):
+        database._create_engine('sqlite://').connect()
+
+
+@pytest.mark.parametrize('method,expected_engine', [
+    ('GET', 'read_engine'),
+    ('HEAD', 'read_engine'),
+    ('POST', 'engine'),
+    ('PUT', 'engine'),
+    ('PATCH', 'engine'),
+    ('DELETE', 'engine'),
+])
+def test_get_db_picks_engine_by_method(monkeypatch, method, expected_engine):
+    monkeypatch.setitem(database.db_session_context, 'session', None)
+
+    db_generator = database.get_db(make_request(method))
+    db_session = next(db_generator)
+
+    assert db_session.get_bind() is getattr(database, expected_engine)
+    db_generator.close()
+
+
+def test_read_engine_rejects_writes():
+    with Session(database.read_engine) as db_session:
+        with pytest.raises(OperationalError, match='readonly'):
+            db_session.execute(text("INSERT INTO categories (name) VALUES ('read-only')"))
+
+
+def test_writer_pool_has_single_connection():
+    assert database.engine.pool.size() == 1
+    assert database.engine.pool._max_overflow == 0
+
+
+@pytest.mark.anyio
+async def test_get_async_db_reads_through_async_engine(monkeypatch):
+    monkeypatch.setitem(database.db_session_context, 'session', None)
+
+    db_generator = database.get_async_db()
+    db_session = await db_generator.__anext__()
+
+    assert db_session.bind is database.async_read_engine
+    assert await services.task_list_async(db_session) == []
+    with pytest.raises(OperationalError, match='readonly'):
+        await db_session.execute(text("INSERT INTO categories (name) VALUES ('read-only')"))
+    await db_generator.aclose()
+
+
+def test_read_session_does_not_take_write_lock(monkeypatch):
+    monkeypatch.setitem(database.db_session_context, 'session', None)
+
+    with database.read_session() as db_session:
+        assert db_session.get_bind().engine is database.read_engine
+        assert services.task_list(db_session) == []
+        # The write lock is free: another connection takes it without waiting
+        writer = sqlite3.connect(get_database_filename(), timeout=0, isolation_level=None)
+        writer.execute('BEGIN IMMEDIATE')
+        writer.execute('ROLLBACK')
+        writer.close()
+
+
+def test_log_sqlite_settings_at_warning(monkeypatch, caplog):
+    # The app loggers are not configured by the app servers: below WARNING the report is dropped
+    monkeypatch.setenv('TIMESHEET_DB_PROFILE', 'default')
+    monkeypatch.setattr(database, 'get_sqlite_settings', lambda: {'journal_mode': 'wal'})
+
+    with caplog.at_level(logging.WARNING, logger='database'):
+        database.log_sqlite_settings()
+
+    assert [record.getMessage() for record in caplog.records] == ["SQLite profile: default {'journal_mode': 'wal'}"]
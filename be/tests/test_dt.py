@@ -0,0 +1,83 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import dt
+from dt import dt_to_ts, dt_to_ts_many, reset_local_tz, ts_to_dt, ts_to_dt_many
+
+# The DST changes (forward, back) of 2023 and the timestamps far from them
+TIME_ZONES = {
+    'UTC': [],
+    'Europe/Berlin': [1679792400, 1698541200],
+    'America/New_York': [1678604400, 1699164000],
+    'Australia/Lord_Howe': [1680361200, 1696087800],  # 30 minutes DST, southern hemisphere
+    'Asia/Kathmandu': [],  # +05:45
+}
+TIMESTAMPS = [0, 86400 * 365, 1686500039, 2 ** 31 + 12345, -86400 * 3650]
+
+
+@pytest.fixture(params=TIME_ZONES)
+def local_tz(request, monkeypatch):
+    monkeypatch.setenv('TZ', request.param)
+    time.tzset()
+    reset_local_tz()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+    reset_local_tz()
+
+
+def _timestamps(zone: str) -> list[int]:
+    """Every 15 minutes (and the seconds around) of the 3 days around the DST changes, and the far ones."""
+    timestamps = list(TIMESTAMPS)
+    for change_ts in TIME_ZONES[zone]:
+        for ts in range(change_ts - 86400 * 3, change_ts + 86400 * 3, 900):
+            timestamps.extend((ts - 1, ts, ts + 1))
+    return timestamps
+
+
+def test_ts_to_dt(local_tz):
+    for ts in _timestamps(local_tz):
+        expected = dt._ts_to_dt(ts)
+        actual = ts_to_dt(ts)
+        assert (actual, actual.utcoffset(), actual.tzname()) == (expected, expected.utcoffset(), expected.tzname()), ts
+
+
+def test_ts_to_dt_many(local_tz):
+    timestamps = [*_timestamps(local_tz), None, 1686500039.5]
+
+    assert ts_to_dt_many(timestamps) == [ts if ts is None else dt._ts_to_dt(ts) for ts in timestamps]
+
+
+def test_ts_to_dt_many_array(local_tz):
+    np = pytest.importorskip('numpy')
+    timestamps = _timestamps(local_tz)
+
+    assert ts_to_dt_many(np.array(timestamps, dtype=np.int64)) == [dt._ts_to_dt(ts) for ts in timestamps]
+
+
+def test_dt_to_ts(local_tz):
+    datetimes = []
+    for ts in _timestamps(local_tz):
+        local_dt = dt._ts_to_dt(ts)
+        datetimes.extend((
+            local_dt,
+            local_dt.replace(tzinfo=None),  # naive, by the current UTC offset
+            local_dt.replace(microsecond=999999),
+            local_dt.astimezone(timezone(timedelta(hours=-3))),
+            local_dt.astimezone(timezone.utc),
+        ))
+
+    for value in datetimes:
+        assert dt_to_ts(value) == dt._dt_to_ts(value), value
+    assert dt_to_ts_many([*datetimes, None]) == [*map(dt._dt_to_ts, datetimes), None]
+
+
+def test_round_trip(local_tz):
+    for ts in _timestamps(local_tz):
+        assert dt_to_ts(ts_to_dt(ts)) == dt._dt_to_ts(dt._ts_to_dt(ts))
+
+
+def test_get_local_tz(local_tz):
+    assert dt.get_local_tz() == datetime.now().astimezone().tzinfo
@@ -0,0 +1,97 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import app
+from dt import ts_to_dt, get_now_timestamp
+from events import EventHub, sse_message
+from tests.factories import TaskFactory
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+async def take(stream, count: int) -> list[str]:
+    return [await anext(stream) for _ in range(count)]
+
+
+@pytest.mark.anyio
+async def test_event_hub_fan_out():
+    today_total_calls = []
+
+    async def get_today_total():
+        today_total_calls.append(1)
+        return 100
+
+    hub = EventHub(tick=60)
+    hub.start(get_today_total)
+    streams = [hub.stream([sse_message('today', {'time': 0})]) for _ in range(3)]
+    try:
+        for stream in streams:
+            assert await anext(stream) == sse_message('today', {'time': 0})
+        assert hub.subscribers_count == 3
+
+        hub.publish('start', {'work_item_id': 1})
+        hub.publish('stop', {'work_item_id': 1})
+
+        for stream in streams:
+            assert await asyncio.wait_for(take(stream, 3), 1) == [
+                sse_message('start', {'work_item_id': 1}),
+                sse_message('stop', {'work_item_id': 1}),
+                sse_message('today', {'time': 100}),
+            ]
+        assert len(today_total_calls) == 1  # once for all the subscribers
+    finally:
+        for stream in streams:
+            await stream.aclose()
+        await hub.stop()
+
+    assert hub.subscribers_count == 0
+
+
+@pytest.mark.anyio
+async def test_event_hub_tick():
+    hub = EventHub(tick=0.01)
+
+    async def get_today_total():
+        return 100
+
+    hub.start(get_today_total)
+    stream = hub.stream([])
+    try:
+        assert await asyncio.wait_for(anext(stream), 1) == sse_message('today', {'time': 100})
+    finally:
+        await stream.aclose()
+        await hub.stop()
+
+
+def test_work_events_published_after_commit(session):
+    task = TaskFactory()
+    now = get_now_timestamp()
+    with patch('events.event_hub.publish') as publish:
+        response = client.post('/api/work/items/', json={
+            'task_id': task.id,
+            'start_dt': ts_to_dt(now).isoformat(),
+            'end_dt': ts_to_dt(now + 1000).isoformat(),
+        })
+        assert publish.call_count == 0
+
+        session.commit()
+
+    publish.assert_called_once_with('create', {'work_item_id': response.json()['id']})
+
+
+def test_work_events_discarded_on_rollback(session):
+    task = TaskFactory()
+    with patch('events.event_hub.publish') as publish:
+        client.post('/api/work/start', json={'task_id': task.id})
+        session.rollback()
+        session.commit()
+
+    publish.assert_not_called()
@@ -0,0 +1,124 @@
+import io
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from main import _command_session, batch_run
+from models import Category, TableRowCount, Task, WorkDailyRollup, WorkItem
+from services import WorkItemDtRangeValidationError
+from tests.factories import TaskFactory, WorkItemFactory
+
+
+def test_batch_run(session, frozen_ts):
+    results = io.StringIO()
+    lines = [
+        '# the setup\n',
+        'category add "Категория 1" "The first one"\n',
+        '\n',
+        '-t add Task 1\n',
+        'work add 2023-02-01T10:00:00 2023-02-01T11:00:00 1\n',
+        'work add 2023-02-01T08:00:00 2023-02-01T09:00:00 1  # before the previous one\n',
+        'task update 1 "Task 1" 1\n',
+        'work add 2023-02-02T08:00:00 2023-02-02T09:00:00 1\n',
+    ]
+
+    assert batch_run(session, lines, results) == 6
+
+    category = session.query(Category).one()
+    assert category.name == 'Категория 1'
+    assert session.query(Task).one().name == 'Task 1'
+    # The bulk insert is ordered by the start times, the results follow the lines
+    early, late, single = session.query(WorkItem).order_by(WorkItem.id).all()
+    assert late.start_timestamp > early.start_timestamp
+    assert results.getvalue().splitlines() == [
+        f'2: ok id={category.id}',
+        '4: ok id=1',
+        f'5: ok id={late.id}',
+        f'6: ok id={early.id}',
+        '7: ok id=1',
+        f'8: ok id={single.id}',
+    ]
+
+
+@pytest.mark.parametrize('lines, error', [
+    (['category add A a\n', 'category rename 1 B\n'], '2: error Exception'),
+    (['task add T 1\n', 'project add P\n'], '2: error Exception'),
+    (['work add 2023-02-01T10:00:00 2023-02-01T11:00:00 1\n'] * 2, '2: error WorkItemDtRangeValidationError'),
+    (
+        [
+            'work add 2023-02-01T12:00:00 2023-02-01T13:00:00 1\n',
+            'work add 2023-02-01T11:00:00 2023-02-01T10:00:00 1\n',
+            'work add 2023-02-01T14:00:00 2023-02-01T15:00:00 1\n',
+        ],
+        '2: error WorkItemDtRangeValidationError',
+    ),
+    (
+        [
+            'work add 2023-02-01T12:00:00 2023-02-01T13:00:00 1\n',
+            'work add 2023-02-01T12:30:00 2023-02-01T12:40:00 1\n',
+            'work add 2023-02-01T08:00:00 2023-02-01T09:00:00 1\n',
+        ],
+        '2: error WorkItemDtRangeValidationError',
+    ),
+    (
+        [
+            'work add 2023-02-01T12:00:00 2023-02-01T13:00:00 1\n',
+            'work add 2023-02-01 2023-02-01T14:00:00 1\n',
+        ],
+        '2: error ValueError',
+    ),
+])
+def test_batch_run_error(session, lines, error):
+    results = io.StringIO()
+
+    with pytest.raises(Exception):
+        batch_run(session, lines, results)
+
+    assert results.getvalue().splitlines()[-1].startswith(error)
+
+
+def test_batch_run_work_add_conflict(session):
+    with pytest.raises(WorkItemDtRangeValidationError):
+        batch_run(session, [
+            'work add 2023-02-01T10:00:00 2023-02-01T11:00:00 1\n',
+            'work add 2023-02-01T10:30:00 2023-02-01T12:00:00 1\n',
+        ], io.StringIO())
+
+    assert session.query(WorkItem).count() == 0
+
+
+def test_batch_run_task_remove(session):
+    task, other_task = TaskFactory.create_batch(2)
+    WorkItemFactory.create_batch(2, task=task)
+    other_work_item = WorkItemFactory(task=other_task)
+
+    assert batch_run(session, [f'task remove {task.id}\n'], io.StringIO()) == 1
+
+    assert session.query(Task).all() == [other_task]
+    assert session.query(WorkItem).all() == [other_work_item]
+    assert session.scalar(select(TableRowCount.row_count).where(TableRowCount.table_name == 'work_items')) == 1
+    assert session.scalar(select(func.count()).where(WorkDailyRollup.task_id == task.id)) == 0
+
+
+@pytest.mark.parametrize('args', ['ndjson {task_id}', 'ndjson 2023-02-01T00:00:00 2023-02-02T00:00:00 {task_id}'])
+def test_batch_run_work_export_tasks(session, capsys, args):
+    task, other_task = TaskFactory.create_batch(2)
+    work_item = WorkItemFactory(task=task, start_timestamp=1675245600, end_timestamp=1675249200)
+    WorkItemFactory(task=other_task, start_timestamp=1675252800, end_timestamp=1675256400)
+
+    batch_run(session, [f'work export {args.format(task_id=task.id)}\n'], io.StringIO())
+
+    assert [json.loads(line)['id'] for line in capsys.readouterr().out.splitlines()] == [work_item.id]
+
+
+@pytest.mark.parametrize('command,session_name', [
+    (['show'], 'read_session'),
+    (['export', 'csv'], 'read_session'),
+    (['report', 'category'], 'read_session'),
+    (['snapshot'], 'read_session'),
+    (['add', 'category'], 'transaction_session'),
+    (['stop'], 'transaction_session'),
+])
+def test_command_session(command, session_name):
+    assert _command_session(command).func.__name__ == session_name
@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, text
+
+import services
+from database import engine
+from tests.const import LOCAL_TZ
+
+WORK_ITEMS_INDEXES = ('ix_work_items_start_end_task', 'ix_work_items_end_start_task')
+
+
+@contextmanager
+def capture_statements():
+    """Collect (statement, parameters) of all statements executed by the engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def explain(session, statement, parameters, comment: str = '') -> list[str]:
+    # Cached (prepared) EXPLAIN statements are not re-prepared on schema changes,
+    # the comment makes a distinct statement
+    rows = session.connection().exec_driver_sql(
+        f'EXPLAIN QUERY PLAN /* {comment} */ {statement}',
+        parameters,
+    ).all()
+    return [row[-1] for row in rows]
+
+
+def has_work_items_scan(plan: list[str]) -> bool:
+    """Full scan of `work_items` (not the lookup in the `work_items_rtree` virtual table)."""
+    return any(line.split()[:2] in (['SCAN', 'wi'], ['SCAN', 'work_items']) for line in plan)
+
+
+def run_report_total(session):
+    services.work_get_report_total(
+        session,
+        datetime(2023, 3, 15, tzinfo=LOCAL_TZ),
+        datetime(2023, 4, 16, tzinfo=LOCAL_TZ),
+    )
+
+
+def run_dt_range_validation(session):
+    session.execute(services._work_item_dt_range_conflicts(1, 1000, 2000)).all()
+
+
+def run_today(session):
+    services.work_get_today(session)
+
+
+def last_statement(session, query_runner) -> tuple[str, tuple]:
+    with capture_statements() as statements:
+        query_runner(session)
+    return statements[-1]
+
+
+@pytest.mark.parametrize('query_runner', [run_report_total, run_dt_range_validation, run_today])
+def test_work_items_interval_queries_use_indexes(session, query_runner):
+    plan = explain(session, *last_statement(session, query_runner))
+
+    assert not has_work_items_scan(plan), plan
+
+
+def test_work_items_report_without_indexes_scans(session):
+    statement, parameters = last_statement(session, run_report_total)
+
+    for index_name in WORK_ITEMS_INDEXES:
+        session.execute(text(f'DROP INDEX {index_name}'))  # rolled back with the test transaction
+
+    assert has_work_items_scan(explain(session, statement, parameters, comment='without indexes'))
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import _accepts_gzip, app
+import services
+from dt import dt_to_ts
+from report_cache import ReportCache, ReportCacheEntry, report_cache
+from tests.factories import TaskFactory, WorkItemFactory
+from tests.test_query_plans import capture_statements
+
+client = TestClient(app)
+
+
+def test_report_cache_lru():
+    cache = ReportCache(maxsize=2)
+    for key in [('total', 0, 10), ('total', 10, 20)]:
+        cache.put(key, ReportCacheEntry(b'{}'))
+
+    assert cache.get(('total', 0, 10)) is not None  # the most recently used now
+    cache.put(('total', 20, 30), ReportCacheEntry(b'{}'))
+
+    assert cache.get(('total', 10, 20)) is None
+    assert cache.get(('total', 0, 10)) is not None
+    assert cache.get(('total', 20, 30)) is not None
+
+
+def test_report_cache_other_version_missed():
+    cache = ReportCache(maxsize=10)
+    cache.put(('total', 0, 10), ReportCacheEntry(b'{}', version=3))
+
+    assert cache.get(('total', 0, 10), 3) is not None
+    assert cache.get(('total', 0, 10), 4) is None
+    assert len(cache) == 0
+
+
+def test_report_cache_gzip():
+    assert ReportCacheEntry(b'{}').gzip_body is None
+    assert ReportCacheEntry(b' ' * 2048).gzip_body is not None
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    ('gzip, deflate, br', True),
+    ('deflate;q=1.0, GZIP;q=0.5', True),
+    ('gzip;q=0', False),
+    ('gzip; q=0.000, *', False),
+    ('*;q=0.1', True),
+    ('identity', False),
+    ('', False),
+])
+def test_accepts_gzip(accept_encoding, expected):
+    assert _accepts_gzip(accept_encoding) is expected
+
+
+def report_statements(request):
+    with capture_statements() as statements:
+        response = request()
+    return response, [statement for statement, _ in statements if 'work_daily_rollup' in statement]
+
+
+def test_report_cached_by_data_version(session):
+    task = TaskFactory()
+    day = datetime(2024, 1, 10).astimezone()
+    work_item = WorkItemFactory(task=task, start_timestamp=dt_to_ts(day), end_timestamp=dt_to_ts(day) + 3600)
+    other_work_item = WorkItemFactory(
+        task=task,
+        start_timestamp=dt_to_ts(day + timedelta(days=10)),
+        end_timestamp=dt_to_ts(day + timedelta(days=10)) + 3600,
+    )
+    session.commit()
+    params = {'start_datetime': day.isoformat(), 'end_datetime': (day + timedelta(days=1)).isoformat()}
+
+    def get_report():
+        return client.get('/api/work/report_total', params=params)
+
+    response, statements = report_statements(get_report)
+    assert response.json() == {'time': 3600}
+    assert len(statements) == 1
+
+    # A hit
+    response, statements = report_statements(get_report)
+    assert response.json() == {'time': 3600}
+    assert statements == []
+
+    # Not intersecting the report range: of the previous data version all the same, i.e. recalculated
+    client.patch(f'/api/work/items/{other_work_item.id}', json={
+        'task': {'id': task.id, 'name': task.name},
+        'end_dt': (day + timedelta(days=10, hours=2)).isoformat(),
+    })
+    assert len(report_cache) == 1
+    response, statements = report_statements(get_report)
+    assert response.json() == {'time': 3600}
+    assert len(statements) == 1
+
+    client.patch(f'/api/work/items/{work_item.id}', json={
+        'task': {'id': task.id, 'name': task.name},
+        'end_dt': (day + timedelta(hours=2)).isoformat(),
+    })
+    response, statements = report_statements(get_report)
+    assert response.json() == {'time': 7200}
+    assert len(statements) == 1
+    assert len(report_cache) == 1
+
+
+def test_report_cached_invalidated_by_other_process_write(session):
+    task = TaskFactory()
+    day = datetime(2024, 1, 10).astimezone()
+    WorkItemFactory(task=task, start_timestamp=dt_to_ts(day), end_timestamp=dt_to_ts(day) + 3600)
+    session.commit()
+    params = {'start_datetime': day.isoformat(), 'end_datetime': (day + timedelta(days=1)).isoformat()}
+    response = client.get('/api/work/report_total', params=params)
+    assert response.json() == {'time': 3600}
+
+    # A write of another process moves the data version (by the triggers) too
+    services.work_item_create(session, day + timedelta(hours=2), day + timedelta(hours=4), task.id)
+    session.commit()
+    assert len(report_cache) == 1
+    response = client.get('/api/work/report_total', params=params)
+
+    assert response.json() == {'time': 3600 + 7200}
+
+
+def test_report_with_current_work_item_cached_by_report_time(session, frozen_ts):
+    WorkItemFactory(start_timestamp=frozen_ts - 3600, end_timestamp=None)
+    params = {
+        'start_datetime': datetime.fromtimestamp(frozen_ts - 86400).astimezone().isoformat(),
+        'end_datetime': datetime.fromtimestamp(frozen_ts + 86400).astimezone().isoformat(),
+    }
+
+    def get_report():
+        return client.get('/api/work/report_total', params=params)
+
+    response, statements = report_statements(get_report)
+    assert response.json() == {'time': 3600}
+    assert len(statements) == 1
+
+    response, statements = report_statements(get_report)
+    assert response.json() == {'time': 3600}
+    assert statements == []
+
+    # The time of the current work item grows with now
+    with patch('services.get_now_timestamp', return_value=frozen_ts + 60):
+        response, statements = report_statements(get_report)
+    assert response.json() == {'time': 3660}
+    assert len(statements) == 1
@@ -0,0 +1,121 @@
+import random
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import delete
+
+import services
+from dt import dt_to_ts
+from models import WorkItemChange
+from tests.const import LOCAL_TZ
+from tests.factories import CategoryFactory, TaskFactory, WorkItemFactory
+
+np = pytest.importorskip('numpy')
+
+import report_engine  # noqa: E402
+from report_engine import NumpyReportEngine  # noqa: E402
+
+RANGES = [
+    (datetime(2023, 3, 15, tzinfo=LOCAL_TZ), datetime(2023, 4, 16, tzinfo=LOCAL_TZ)),
+    (datetime(2023, 3, 15, 13, 30, tzinfo=LOCAL_TZ), datetime(2023, 3, 16, 2, 15, tzinfo=LOCAL_TZ)),
+    (datetime(2020, 1, 1, tzinfo=LOCAL_TZ), datetime(2024, 1, 1, tzinfo=LOCAL_TZ)),
+]
+
+
+def create_work_items(count: int, frozen_ts: int) -> None:
+    rnd = random.Random(1)
+    tasks = [TaskFactory(category=category) for category in CategoryFactory.create_batch(3) for _ in range(3)]
+    ts = dt_to_ts(datetime(2023, 3, 1, tzinfo=LOCAL_TZ))
+    for _ in range(count):
+        duration = rnd.randint(60, 36000)
+        WorkItemFactory(task=rnd.choice(tasks), start_timestamp=ts, end_timestamp=ts + duration)
+        ts += duration + rnd.randint(1, 7200)
+    WorkItemFactory(task=tasks[0], start_timestamp=frozen_ts - 3600, end_timestamp=None)
+
+
+def assert_reports_equal(session, engine: NumpyReportEngine, now_ts: int, ranges=RANGES) -> None:
+    for start_dt, end_dt in ranges:
+        start_ts, end_ts = dt_to_ts(start_dt), dt_to_ts(end_dt)
+        assert engine.report_task(session, start_ts, end_ts, now_ts) == [
+            tuple(row) for row in services.work_get_report_task(session, start_dt, end_dt)
+        ]
+        assert engine.report_category(session, start_ts, end_ts, now_ts) == [
+            tuple(row) for row in services.work_get_report_category(session, start_dt, end_dt)
+        ]
+        assert engine.report_total(session, start_ts, end_ts, now_ts) == [
+            tuple(row) for row in services.work_get_report_total(session, start_dt, end_dt)
+        ]
+
+
+def test_report_engine_equals_sql(session, frozen_ts):
+    create_work_items(300, frozen_ts)
+
+    assert_reports_equal(session, NumpyReportEngine(), frozen_ts)
+
+
+@pytest.mark.parametrize('now_dt', [
+    datetime(2024, 1, 5, tzinfo=LOCAL_TZ),  # the current work item spans the range
+    datetime(2024, 1, 2, 12, tzinfo=LOCAL_TZ),
+    datetime(2024, 1, 1, 12, tzinfo=LOCAL_TZ),
+])
+def test_report_engine_current_work_item_equals_sql(session, now_dt):
+    WorkItemFactory(start_timestamp=dt_to_ts(datetime(2024, 1, 1, 10, tzinfo=LOCAL_TZ)), end_timestamp=None)
+    now_ts = dt_to_ts(now_dt)
+    ranges = [
+        (datetime(2024, 1, 2, tzinfo=LOCAL_TZ), datetime(2024, 1, 3, tzinfo=LOCAL_TZ)),
+        (datetime(2024, 1, 1, tzinfo=LOCAL_TZ), datetime(2024, 1, 2, tzinfo=LOCAL_TZ)),
+        (datetime(2024, 1, 1, 12, tzinfo=LOCAL_TZ), datetime(2024, 1, 6, tzinfo=LOCAL_TZ)),
+    ]
+
+    with patch('services.get_now_timestamp', return_value=now_ts):
+        assert_reports_equal(session, NumpyReportEngine(), now_ts, ranges)
+
+
+def test_report_engine_incremental_refresh(session, frozen_ts):
+    create_work_items(100, frozen_ts)
+    engine = NumpyReportEngine()
+    first_work_item_id = int(engine.refresh(session).ids.min())
+
+    # The changes of all kinds
+    task = TaskFactory(name='Renamed later')
+    services.work_item_stop_current(session)
+    work_item = WorkItemFactory(
+        task=task,
+        start_timestamp=dt_to_ts(datetime(2023, 2, 20, tzinfo=LOCAL_TZ)),
+        end_timestamp=dt_to_ts(datetime(2023, 2, 20, 5, tzinfo=LOCAL_TZ)),
+    )
+    services.work_item_update(
+        session,
+        work_item.id,
+        task.id,
+        datetime(2023, 2, 20, 1, tzinfo=LOCAL_TZ),
+        datetime(2023, 2, 20, 5, tzinfo=LOCAL_TZ),
+    )
+    services.work_item_delete(session, first_work_item_id)
+    task.name = 'Renamed'
+    session.flush()
+
+    with patch('report_engine._work_items_arrays', wraps=report_engine._work_items_arrays) as work_items_arrays:
+        assert_reports_equal(session, engine, frozen_ts)
+
+    work_items_arrays.assert_called_once()
+    assert len(work_items_arrays.call_args.args[0]) == 2  # the stopped and the new one, not the deleted one
+    assert first_work_item_id not in engine.refresh(session).ids
+
+
+def test_report_engine_full_reload_after_log_trim(session, frozen_ts):
+    create_work_items(10, frozen_ts)
+    engine = NumpyReportEngine()
+    change_id = engine.refresh(session).change_id
+    for day in (20, 21):
+        WorkItemFactory(
+            start_timestamp=dt_to_ts(datetime(2023, 2, day, tzinfo=LOCAL_TZ)),
+            end_timestamp=dt_to_ts(datetime(2023, 2, day, 1, tzinfo=LOCAL_TZ)),
+        )
+    session.execute(delete(WorkItemChange).where(WorkItemChange.id <= change_id + 1))  # trimmed
+
+    with patch('report_engine._work_items_arrays', wraps=report_engine._work_items_arrays) as work_items_arrays:
+        assert_reports_equal(session, engine, frozen_ts)
+
+    assert len(work_items_arrays.call_args.args[0]) == 10 + 1 + 2
@@ -0,0 +1,131 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+import services
+from dt import dt_to_ts
+from models import WorkDailyRollup
+from rollup import rollup_rebuild
+from tests.factories import TaskFactory, WorkItemFactory
+from tests.test_query_plans import capture_statements, explain
+
+
+def local_dt(*args) -> datetime:
+    return datetime(*args).astimezone()
+
+
+def ts(*args) -> int:
+    return dt_to_ts(local_dt(*args))
+
+
+def rollup_rows(session) -> list[tuple[int, int, int]]:
+    return [tuple(row) for row in session.execute(
+        select(WorkDailyRollup.day, WorkDailyRollup.task_id, WorkDailyRollup.work_seconds)
+        .order_by(WorkDailyRollup.day, WorkDailyRollup.task_id)
+    )]
+
+
+def test_rollup_work_item_create_update_delete(session):
+    task1 = TaskFactory()
+    task2 = TaskFactory()
+
+    # Create: split by the local days
+    work_item = WorkItemFactory(task=task1, start_timestamp=ts(2024, 1, 1, 22), end_timestamp=ts(2024, 1, 2, 1))
+    assert rollup_rows(session) == [
+        (ts(2024, 1, 1), task1.id, 2 * 3600),
+        (ts(2024, 1, 2), task1.id, 3600),
+    ]
+
+    # Update
+    work_item.task = task2
+    work_item.end_timestamp = ts(2024, 1, 1, 23)
+    session.flush()
+    assert rollup_rows(session) == [
+        (ts(2024, 1, 1), task2.id, 3600),
+    ]
+
+    # Delete
+    session.delete(work_item)
+    session.flush()
+    assert rollup_rows(session) == []
+
+
+def test_rollup_delete_emptied_rows_by_primary_key(session):
+    work_item = WorkItemFactory(start_timestamp=ts(2024, 1, 1, 22), end_timestamp=ts(2024, 1, 2, 1))
+
+    with capture_statements() as statements:
+        session.delete(work_item)
+        session.flush()
+
+    [(statement, parameters)] = [
+        (statement, parameters) for statement, parameters in statements
+        if statement.startswith('DELETE FROM work_daily_rollup')
+    ]
+    plan = explain(session, statement, parameters[0], 'rollup delete')
+    assert not any(line.startswith('SCAN') for line in plan), plan
+
+
+def test_rollup_current_work_item_stop(session, frozen_ts):
+    task = TaskFactory()
+    start_timestamp = frozen_ts - 600
+    services.work_item_start(session, task.id, start_timestamp)
+    assert rollup_rows(session) == []
+
+    services.work_item_stop_current(session)
+
+    assert [(task_id, work_seconds) for _, task_id, work_seconds in rollup_rows(session)] == [(task.id, 600)]
+
+
+def test_rollup_rebuild(session):
+    tasks = TaskFactory.create_batch(2)
+    for i in range(10):
+        start = ts(2024, 1, 1, 10) + i * 8 * 3600
+        WorkItemFactory(task=tasks[i % 2], start_timestamp=start, end_timestamp=start + 7 * 3600)
+    WorkItemFactory(task=tasks[0], start_timestamp=ts(2024, 1, 5), end_timestamp=None)
+    maintained_rows = rollup_rows(session)
+
+    rollup_rebuild(session)
+
+    assert rollup_rows(session) == maintained_rows
+    assert sum(row[2] for row in maintained_rows) == 10 * 7 * 3600
+
+
+def test_work_rollup_rebuild_bumps_data_version(session):
+    WorkItemFactory(start_timestamp=ts(2024, 1, 1, 10), end_timestamp=ts(2024, 1, 1, 11))
+    session.commit()
+    version = services.data_version_read(session).version
+
+    services.work_rollup_rebuild(session)
+
+    assert services.data_version_read(session).version == version + 1
+
+
+@pytest.mark.parametrize('start,end', [
+    ((2024, 1, 1), (2024, 1, 10)),  # whole days
+    ((2024, 1, 1, 13), (2024, 1, 4, 11, 30)),  # partial edge days
+    ((2024, 1, 2, 9), (2024, 1, 2, 19)),  # within a day
+])
+def test_report_by_task_matches_raw_work_items(session, frozen_ts, start, end):
+    tasks = TaskFactory.create_batch(3)
+    work_items = []
+    for i in range(12):
+        item_start = ts(2024, 1, 1, 9) + i * 5 * 3600
+        work_items.append(
+            WorkItemFactory(task=tasks[i % 3], start_timestamp=item_start, end_timestamp=item_start + 4 * 3600)
+        )
+    start_ts = ts(*start)
+    end_ts = ts(*end)
+    expected = {}
+    for wi in work_items:
+        seconds = min(wi.end_timestamp, end_ts) - max(wi.start_timestamp, start_ts)
+        if seconds > 0:
+            expected[wi.task_id] = expected.get(wi.task_id, 0) + seconds
+
+    rows = services.work_get_report_task(
+        session,
+        local_dt(*start),
+        local_dt(*end),
+    )
+
+    assert {row.task_id: row.work_seconds for row in rows} == expected
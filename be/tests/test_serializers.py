@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi_pagination import Page, Params
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+import schemas
+import serializers
+import services
+from dt import ts_to_dt
+from tests.const import LOCAL_TZ
+from tests.factories import CategoryFactory, TaskFactory, WorkItemFactory
+
+
+def schema_body(model: BaseModel | list[BaseModel]) -> bytes:
+    """The body FastAPI renders for the `response_model` value."""
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+@pytest.fixture
+def work_items(session, frozen_ts):
+    category = CategoryFactory(name='Катэгорыя "1"', description=None)
+    task = TaskFactory(name='Задача ✓', category=category)
+    return [
+        WorkItemFactory(task=task, start_timestamp=frozen_ts - 7200, end_timestamp=frozen_ts - 3600),
+        WorkItemFactory(task=task, start_timestamp=frozen_ts - 600, end_timestamp=None),
+    ]
+
+
+def test_category_values(session):
+    categories = [CategoryFactory(name='Катэгорыя', description=None), CategoryFactory()]
+
+    assert serializers.dumps([serializers.category_values(category) for category in categories]) == schema_body(
+        [schemas.CategoryOut.from_orm(category) for category in categories]
+    )
+
+
+def test_task_values(session, work_items):
+    TaskFactory(is_archived=True)
+    rows = services.task_list(session)
+
+    assert serializers.dumps([serializers.task_values(row) for row in rows]) == schema_body([
+        schemas.TaskOut(
+            id=row.id,
+            name=row.name,
+            category=schemas.CategoryMinimal(id=row.category_id, name=row.category_name),
+            is_current=row.is_current,
+            is_archived=row.is_archived,
+        ) for row in rows
+    ])
+
+
+@pytest.mark.parametrize('include_total', [True, False])
+def test_work_item_page_values(session, work_items, include_total):
+    params = schemas.WorkItemListParams(page=1, size=1, include_total=include_total)
+    rows, total, params = services.work_item_list_rows(session, ['-start_timestamp'], params)
+
+    values = serializers.page_values(serializers.work_items_values(rows), total, params)
+
+    assert serializers.dumps(values) == schema_body(Page[schemas.WorkItemOut].create(
+        [
+            schemas.WorkItemOut(
+                id=row.id,
+                task=schemas.TaskMinimal(id=row.task_id, name=row.task_name),
+                start_dt=ts_to_dt(row.start_timestamp),
+                end_dt=row.end_timestamp and ts_to_dt(row.end_timestamp),
+            ) for row in rows
+        ],
+        Params(page=1, size=1),
+        total=total,
+    ))
+
+
+def test_work_report_values(session, work_items):
+    report = services.work_get_report(
+        session,
+        datetime(2023, 6, 1, tzinfo=LOCAL_TZ),
+        datetime(2023, 7, 1, tzinfo=LOCAL_TZ),
+    )
+
+    values = {
+        'by_category': [serializers.work_report_category_values(row) for row in report.by_category],
+        'by_task': [serializers.work_report_task_values(row) for row in report.by_task],
+        'total': serializers.work_report_total_values(report.total),
+    }
+
+    assert serializers.dumps(values) == schema_body(schemas.WorkReport(
+        by_category=[
+            schemas.WorkReportCategory(
+                category=schemas.CategoryMinimal(id=row[0], name=row[1]),
+                time=row[2],
+            ) for row in report.by_category
+        ],
+        by_task=[
+            schemas.WorkReportTask(
+                task=schemas.TaskWithCategoryMinimal(
+                    id=row[0],
+                    name=row[1],
+                    category=schemas.CategoryMinimal(id=row[2], name=row[3]),
+                ),
+                time=row[4],
+            ) for row in report.by_task
+        ],
+        total=schemas.WorkReportTotal(time=report.total),
+    ))
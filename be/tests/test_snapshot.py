@@ -0,0 +1,143 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from dt import dt_to_ts
+from tests.const import LOCAL_TZ
+from tests.factories import TaskFactory, WorkItemFactory
+
+pa = pytest.importorskip('pyarrow')
+
+from snapshot import snapshot_read, snapshot_write  # noqa: E402
+
+
+def ts(*args) -> int:
+    return dt_to_ts(datetime(*args, tzinfo=LOCAL_TZ))
+
+
+@pytest.mark.parametrize('snapshot_format', ['arrow', 'parquet'])
+def test_snapshot_write_finished_months(session, frozen_ts, tmp_path, snapshot_format):
+    task = TaskFactory(name='Задача')
+    april = WorkItemFactory(task=task, start_timestamp=ts(2023, 4, 30, 23), end_timestamp=ts(2023, 5, 1, 1))
+    may = WorkItemFactory(task=task, start_timestamp=ts(2023, 5, 10), end_timestamp=ts(2023, 5, 10, 2))
+    WorkItemFactory(task=task, start_timestamp=ts(2023, 6, 1), end_timestamp=ts(2023, 6, 1, 2))  # the current month
+
+    written = snapshot_write(session, str(tmp_path), snapshot_format)
+
+    assert [path.name for path in written] == [
+        f'work_items-2023-04.{snapshot_format}',
+        f'work_items-2023-05.{snapshot_format}',
+    ]
+    table = snapshot_read(str(tmp_path))
+    assert table.column_names == ['id', 'task_id', 'task_name', 'category_id', 'category_name', 'start_dt', 'end_dt']
+    assert table.column('id').to_pylist() == [april.id, may.id]
+    assert table.column('task_name').to_pylist() == ['Задача', 'Задача']
+    assert table.column('category_name').to_pylist() == [task.category.name] * 2
+    assert table.column('end_dt').to_pylist() == [
+        datetime(2023, 5, 1, 1, tzinfo=LOCAL_TZ),
+        datetime(2023, 5, 10, 2, tzinfo=LOCAL_TZ),
+    ]
+
+
+def test_snapshot_write_appends_new_months(session, frozen_ts, tmp_path):
+    task = TaskFactory()
+    WorkItemFactory(task=task, start_timestamp=ts(2023, 3, 10), end_timestamp=ts(2023, 3, 10, 2))
+    current = WorkItemFactory(task=task, start_timestamp=ts(2023, 4, 30), end_timestamp=None)
+    assert [path.name for path in snapshot_write(session, str(tmp_path))] == ['work_items-2023-03.arrow']
+
+    current.end_timestamp = ts(2023, 4, 30, 1)
+    session.flush()
+
+    assert [path.name for path in snapshot_write(session, str(tmp_path))] == [
+        'work_items-2023-04.arrow',
+        'work_items-2023-05.arrow',  # empty
+    ]
+    assert snapshot_write(session, str(tmp_path)) == []
+    assert snapshot_read(str(tmp_path)).num_rows == 2
+
+
+def test_snapshot_read_memory_mapped(session, frozen_ts, tmp_path):
+    WorkItemFactory(start_timestamp=ts(2023, 3, 10), end_timestamp=ts(2023, 3, 10, 2))
+    snapshot_write(session, str(tmp_path))
+    allocated = pa.total_allocated_bytes()
+
+    table = snapshot_read(str(tmp_path))
+
+    assert table.num_rows == 1
+    assert pa.total_allocated_bytes() == allocated  # the columns are not copied
+
+
+def test_snapshot_write_rewrites_changed_months(session, frozen_ts, tmp_path):
+    task = TaskFactory()
+    march = WorkItemFactory(task=task, start_timestamp=ts(2023, 3, 10), end_timestamp=ts(2023, 3, 10, 2))
+    april = WorkItemFactory(task=task, start_timestamp=ts(2023, 4, 10), end_timestamp=ts(2023, 4, 10, 2))
+    WorkItemFactory(task=task, start_timestamp=ts(2023, 5, 10), end_timestamp=ts(2023, 5, 10, 2))
+    snapshot_write(session, str(tmp_path))
+
+    march.end_timestamp = ts(2023, 3, 10, 3)
+    session.delete(april)
+    session.flush()
+
+    assert [path.name for path in snapshot_write(session, str(tmp_path))] == [
+        'work_items-2023-03.arrow',
+        'work_items-2023-04.arrow',
+    ]
+    assert snapshot_write(session, str(tmp_path)) == []
+    table = snapshot_read(str(tmp_path))
+    assert table.num_rows == 2
+    assert table.column('end_dt').to_pylist()[0].timestamp() == ts(2023, 3, 10, 3)
+
+    # Moved to another month
+    march.start_timestamp = ts(2023, 5, 20)
+    march.end_timestamp = ts(2023, 5, 20, 1)
+    session.flush()
+
+    assert [path.name for path in snapshot_write(session, str(tmp_path))] == [
+        'work_items-2023-03.arrow',
+        'work_items-2023-05.arrow',
+    ]
+    assert snapshot_read(str(tmp_path)).num_rows == 2
+
+
+def test_snapshot_write_rewrites_all_months_on_task_change(session, frozen_ts, tmp_path):
+    task = TaskFactory()
+    WorkItemFactory(task=task, start_timestamp=ts(2023, 3, 10), end_timestamp=ts(2023, 3, 10, 2))
+    WorkItemFactory(task=task, start_timestamp=ts(2023, 4, 10), end_timestamp=ts(2023, 4, 10, 2))
+    snapshot_write(session, str(tmp_path))
+
+    task.name = 'Renamed'
+    session.flush()
+
+    assert len(snapshot_write(session, str(tmp_path))) == 3
+    assert snapshot_read(str(tmp_path)).column('task_name').to_pylist() == ['Renamed'] * 2
+
+
+def test_snapshot_write_other_format(session, frozen_ts, tmp_path):
+    march = WorkItemFactory(start_timestamp=ts(2023, 3, 10), end_timestamp=ts(2023, 3, 10, 2))
+    WorkItemFactory(start_timestamp=ts(2023, 4, 10), end_timestamp=ts(2023, 4, 10, 2))
+    snapshot_write(session, str(tmp_path))
+
+    assert snapshot_write(session, str(tmp_path), 'parquet') == []
+
+    march.end_timestamp = ts(2023, 3, 10, 3)
+    session.flush()
+
+    assert [path.name for path in snapshot_write(session, str(tmp_path), 'parquet')] == ['work_items-2023-03.parquet']
+    assert sorted(path.name for path in tmp_path.glob('work_items-*')) == [
+        'work_items-2023-03.parquet',
+        'work_items-2023-04.arrow',
+        'work_items-2023-05.arrow',
+    ]
+    assert snapshot_read(str(tmp_path)).num_rows == 2
+
+
+def test_snapshot_write_true_utc_timestamps_non_utc_host(berlin_host, session, frozen_ts, tmp_path):
+    start_ts = dt_to_ts(datetime(2023, 3, 10, 9, tzinfo=ZoneInfo('Europe/Berlin')))
+    WorkItemFactory(start_timestamp=start_ts, end_timestamp=start_ts + 3600)
+
+    snapshot_write(session, str(tmp_path))
+    table = snapshot_read(str(tmp_path))
+
+    assert table.column('start_dt').to_pylist() == [datetime(2023, 3, 10, 8, tzinfo=timezone.utc)]
+    assert table.column('end_dt').to_pylist() == [datetime(2023, 3, 10, 9, tzinfo=timezone.utc)]
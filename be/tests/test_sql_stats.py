@@ -0,0 +1,54 @@
+import logging
+
+import pytest
+from starlette.testclient import TestClient
+
+import sql_stats
+from api import app
+from tests.factories import TaskFactory
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def clean_sql_stats():
+    sql_stats.reset_stats()
+    yield
+    sql_stats.reset_stats()
+
+
+@pytest.mark.parametrize('statement,expected', [
+    ('SELECT * FROM tasks WHERE id = 1', 'SELECT * FROM tasks WHERE id = ?'),
+    ("SELECT *\n  FROM tasks\n  WHERE name = 'It''s'", 'SELECT * FROM tasks WHERE name = ?'),
+    ('SELECT * FROM tasks WHERE id IN (?, ?, ?)', 'SELECT * FROM tasks WHERE id IN (...)'),
+    ('SELECT * FROM tasks LIMIT ? OFFSET ?', 'SELECT * FROM tasks LIMIT ? OFFSET ?'),
+    ('SELECT ix_tasks_1.id FROM tasks AS ix_tasks_1', 'SELECT ix_tasks_1.id FROM tasks AS ix_tasks_1'),
+])
+def test_fingerprint(statement, expected):
+    assert sql_stats.fingerprint(statement) == expected
+
+
+def test_sql_stats_list(session, clean_sql_stats):
+    TaskFactory.create_batch(2)
+    client.get('/api/tasks')
+    client.get('/api/tasks')
+
+    response = client.get('/api/stats/sql')
+
+    assert response.status_code == 200
+    stats = response.json()
+    assert [row['statement'] for row in stats if row['statement'].startswith('INSERT INTO tasks')]
+    tasks_select = [row for row in stats if row['statement'].startswith('SELECT tasks.id')]
+    assert len(tasks_select) == 1
+    assert tasks_select[0]['count'] == 2
+    assert sum(tasks_select[0]['histogram'].values()) == 2
+    assert tasks_select[0]['total_time'] >= tasks_select[0]['max_time'] > 0
+
+
+def test_slow_query_log(session, clean_sql_stats, monkeypatch, caplog):
+    monkeypatch.setattr(sql_stats, 'slow_query_threshold', 0)
+
+    with caplog.at_level(logging.WARNING, logger='sql_stats.slow'):
+        client.get('/api/categories/42')
+
+    assert any('FROM categories' in record.getMessage() and '(42' in record.getMessage() for record in caplog.records)
@@ -0,0 +1,47 @@
+from sqlalchemy import select
+
+from models import work_items_rtree, WORK_ITEMS_RTREE_OPEN_END
+from tests.factories import WorkItemFactory
+
+
+def rtree_box(session, id_: int) -> tuple[float, float] | None:
+    return session.execute(
+        select(work_items_rtree.c.start_ts, work_items_rtree.c.end_ts).where(work_items_rtree.c.id == id_)
+    ).one_or_none()
+
+
+def test_work_items_rtree_sync(session):
+    work_item = WorkItemFactory(start_timestamp=1704067200, end_timestamp=None)
+    start_ts, end_ts = rtree_box(session, work_item.id)
+    assert start_ts <= 1704067200
+    assert end_ts >= WORK_ITEMS_RTREE_OPEN_END
+
+    work_item.end_timestamp = 1704070800
+    session.flush()
+    start_ts, end_ts = rtree_box(session, work_item.id)
+    assert start_ts <= 1704067200 < 1704070800 <= end_ts
+    assert end_ts - start_ts < 3600 + 512  # 32-bit float precision
+
+    session.delete(work_item)
+    session.flush()
+    assert rtree_box(session, work_item.id) is None
+
+
+def test_work_items_rtree_intersection(session):
+    work_items = [
+        WorkItemFactory(start_timestamp=1704067200 + i * 3600, end_timestamp=1704067200 + i * 3600 + 1800)
+        for i in range(10)
+    ]
+    range_start, range_end = 1704067200 + 3 * 3600 + 900, 1704067200 + 6 * 3600
+
+    candidate_ids = session.scalars(
+        select(work_items_rtree.c.id).where(
+            work_items_rtree.c.start_ts < range_end,
+            work_items_rtree.c.end_ts > range_start,
+        )
+    ).all()
+
+    # A superset (the float coordinates are rounded outwards) of the exact intersection
+    expected_ids = {wi.id for wi in work_items[3:6]}
+    assert expected_ids <= set(candidate_ids)
+    assert len(candidate_ids) <= len(expected_ids) + 2